@@ -0,0 +1,60 @@
+"""add_transcript_signatures
+
+Revision ID: 0baf00f8285d
+Revises: 4166e54390c3
+Create Date: 2025-12-05 09:41:27.183554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0baf00f8285d'
+down_revision: Union[str, Sequence[str], None] = '4166e54390c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('unstructured_analysis', sa.Column('derived_from_id', sa.Integer(), nullable=True))
+    op.add_column('unstructured_analysis', sa.Column('derived_similarity', sa.Float(), nullable=True))
+    op.create_foreign_key(
+        'unstructured_analysis_derived_from_id_fkey', 'unstructured_analysis', 'unstructured_analysis',
+        ['derived_from_id'], ['id'], ondelete='SET NULL'
+    )
+
+    op.create_table(
+        'transcript_signatures',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('call_id', sa.Integer(), nullable=False),
+        sa.Column('analysis_id', sa.Integer(), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('band_hashes', postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.Column('word_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['call_id'], ['call_logs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['analysis_id'], ['unstructured_analysis.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('call_id')
+    )
+    op.create_index(op.f('ix_transcript_signatures_id'), 'transcript_signatures', ['id'], unique=False)
+    op.create_index(
+        'ix_transcript_signatures_band_hashes', 'transcript_signatures', ['band_hashes'],
+        unique=False, postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transcript_signatures_band_hashes', table_name='transcript_signatures')
+    op.drop_index(op.f('ix_transcript_signatures_id'), table_name='transcript_signatures')
+    op.drop_table('transcript_signatures')
+
+    op.drop_constraint('unstructured_analysis_derived_from_id_fkey', 'unstructured_analysis', type_='foreignkey')
+    op.drop_column('unstructured_analysis', 'derived_similarity')
+    op.drop_column('unstructured_analysis', 'derived_from_id')
@@ -0,0 +1,45 @@
+"""add_analysis_cache
+
+Revision ID: 325980c32ea1
+Revises: 3253d65ad22a
+Create Date: 2025-12-01 10:12:44.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '325980c32ea1'
+down_revision: Union[str, Sequence[str], None] = '3253d65ad22a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'analysis_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('model_name', sa.String(length=50), nullable=True),
+        sa.Column('prompt_version', sa.String(length=100), nullable=True),
+        sa.Column('sections', sa.JSON(), nullable=True),
+        sa.Column('hit_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column('last_hit_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_cache_id'), 'analysis_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_analysis_cache_cache_key'), 'analysis_cache', ['cache_key'], unique=True)
+    op.create_index(op.f('ix_analysis_cache_last_hit_at'), 'analysis_cache', ['last_hit_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_cache_last_hit_at'), table_name='analysis_cache')
+    op.drop_index(op.f('ix_analysis_cache_cache_key'), table_name='analysis_cache')
+    op.drop_index(op.f('ix_analysis_cache_id'), table_name='analysis_cache')
+    op.drop_table('analysis_cache')
@@ -0,0 +1,28 @@
+"""add_section_status_to_unstructured_analysis
+
+Revision ID: 4166e54390c3
+Revises: 325980c32ea1
+Create Date: 2025-12-03 14:27:09.771020
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4166e54390c3'
+down_revision: Union[str, Sequence[str], None] = '325980c32ea1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('unstructured_analysis', sa.Column('section_status', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('unstructured_analysis', 'section_status')
@@ -0,0 +1,28 @@
+"""add_prompt_versions_to_unstructured_analysis
+
+Revision ID: 69aa63ebddf1
+Revises: bb2dba286e2b
+Create Date: 2025-12-08 16:04:52.718390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '69aa63ebddf1'
+down_revision: Union[str, Sequence[str], None] = 'bb2dba286e2b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('unstructured_analysis', sa.Column('prompt_versions', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('unstructured_analysis', 'prompt_versions')
@@ -0,0 +1,28 @@
+"""add_triage_score_to_unstructured_analysis
+
+Revision ID: b0ca9049b167
+Revises: 69aa63ebddf1
+Create Date: 2025-12-09 11:37:05.264811
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b0ca9049b167'
+down_revision: Union[str, Sequence[str], None] = '69aa63ebddf1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('unstructured_analysis', sa.Column('triage_score', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('unstructured_analysis', 'triage_score')
@@ -0,0 +1,28 @@
+"""add_llm_call_stats_to_unstructured_analysis
+
+Revision ID: bb2dba286e2b
+Revises: 0baf00f8285d
+Create Date: 2025-12-06 10:12:48.305117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bb2dba286e2b'
+down_revision: Union[str, Sequence[str], None] = '0baf00f8285d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('unstructured_analysis', sa.Column('llm_call_stats', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('unstructured_analysis', 'llm_call_stats')
@@ -0,0 +1,28 @@
+"""add_talk_time_to_unstructured_analysis
+
+Revision ID: f17834f47045
+Revises: b0ca9049b167
+Create Date: 2025-12-10 09:42:18.531907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f17834f47045'
+down_revision: Union[str, Sequence[str], None] = 'b0ca9049b167'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('unstructured_analysis', sa.Column('talk_time', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('unstructured_analysis', 'talk_time')
@@ -5,10 +5,28 @@ This script processes all leads in the database:
 1. Analyzes call transcriptions using Gemini AI
 2. Calculates and saves lead scores
 
+Gemini throughput is governed by the shared LLM scheduler
+(LLM_RPM_LIMIT / LLM_TPM_LIMIT / LLM_MAX_IN_FLIGHT), not by sleeps.
+Safe to run alongside the API: a call being analyzed elsewhere is waited
+for and reused instead of analyzed twice.
+
+With --batch, calls that have never been analyzed are first analyzed with
+multi-transcript batch prompts (several short calls per LLM request), which
+multiplies throughput under the same request quota. Each batch result is saved
+under the same per-call lock as the API and discarded if the call was
+analyzed in the meantime.
+
+With triage enabled (ANALYSIS_TRIAGE_ENABLED=true), calls below the triage
+threshold get a local-only analysis; --force-llm skips triage and upgrades
+existing local-only analyses with the LLM.
+
 Usage:
     python analyze_all_leads.py
+    python analyze_all_leads.py --batch
+    python analyze_all_leads.py --force-llm
 """
 
+import argparse
 import asyncio
 import sys
 from pathlib import Path
@@ -24,7 +42,11 @@ from app.models.lead import Lead
 from app.models.call_log import CallLog
 from app.models.unstructured_analysis import UnstructuredAnalysis
 from app.models.lead_score import LeadScore
-from app.services.transcription_analyzer_langchain import analyze_transcription_gemini
+from app.services.transcription_analyzer_langchain import failed_sections, offline_sections, skipped_sections
+from app.services.analysis_coalescer import (
+    analyze_call_coalesced, retry_failed_sections_coalesced, upgrade_local_only_coalesced
+)
+from app.services.batch_analyzer import analyze_transcriptions_batch
 from app.services.lead_scorer import calculate_lead_score
 import logging
 
@@ -35,15 +57,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Calls loaded and analyzed per batch-mode round
+BATCH_ROUND_SIZE = 500
+
 
-async def analyze_call(call_id: int, transcription: str, db: AsyncSession) -> bool:
+async def analyze_call(call_id: int, transcription: str, db: AsyncSession, force_llm: bool = False) -> bool:
     """
     Analyze a single call transcription using Gemini AI.
+    A call whose analysis has failed sections only re-runs those sections.
     
     Args:
         call_id: The ID of the call to analyze
         transcription: The call transcription text
         db: Database session
+        force_llm: Skip triage and upgrade a local-only analysis
         
     Returns:
         bool: True if successful, False otherwise
@@ -51,18 +78,41 @@ async def analyze_call(call_id: int, transcription: str, db: AsyncSession) -> bo
     try:
         # Check if already analyzed
         result = await db.execute(
-            select(UnstructuredAnalysis).where(UnstructuredAnalysis.call_id == call_id)
+            select(UnstructuredAnalysis)
+            .where(UnstructuredAnalysis.call_id == call_id)
+            .order_by(UnstructuredAnalysis.id.desc())
+            .limit(1)
         )
         existing = result.scalar_one_or_none()
         
-        if existing:
+        upgrade = force_llm and existing is not None and bool(skipped_sections(existing))
+        if existing and not failed_sections(existing) and not upgrade:
             logger.info(f"  ⏭️  Call {call_id} already analyzed, skipping...")
             return True
         
-        # Analyze with Gemini
-        logger.info(f"  🤖 Analyzing call {call_id} with Gemini AI...")
-        await analyze_transcription_gemini(call_id, transcription, db)
-        logger.info(f"  ✅ Call {call_id} analysis completed")
+        if upgrade:
+            logger.info(f"  ⬆️  Call {call_id} has a local-only analysis, upgrading with Gemini AI...")
+            analysis = await upgrade_local_only_coalesced(existing, transcription, db)
+        elif existing:
+            logger.info(f"  🔁 Call {call_id} partially analyzed, retrying {failed_sections(existing)}...")
+            analysis = await retry_failed_sections_coalesced(existing, transcription, db)
+        else:
+            # Analyze with Gemini
+            logger.info(f"  🤖 Analyzing call {call_id} with Gemini AI...")
+            analysis = await analyze_call_coalesced(call_id, transcription, db, force_llm=force_llm)
+        
+        offline = offline_sections(analysis)
+        missing = [name for name in failed_sections(analysis) if name not in offline]
+        if missing:
+            # Saved, but the next run retries the missing sections
+            logger.warning(f"  ⚠️  Call {call_id} incomplete, failed sections: {missing}")
+        elif offline:
+            # Scored from heuristics for now; the next run upgrades them with the LLM
+            logger.info(f"  📴 Call {call_id} LLM unavailable, sections filled offline: {offline}")
+        elif skipped_sections(analysis):
+            logger.info(f"  🪫 Call {call_id} below the triage threshold, saved local-only analysis")
+        else:
+            logger.info(f"  ✅ Call {call_id} analysis completed")
         return True
         
     except Exception as e:
@@ -124,9 +174,48 @@ async def score_lead(lead_id: int, db: AsyncSession) -> bool:
         return False
 
 
-async def process_all_leads():
+async def analyze_unanalyzed_calls_batched(db: AsyncSession, force_llm: bool = False) -> int:
+    """
+    Analyze every call without an analysis using batch prompting.
+    
+    Args:
+        db: Database session
+        force_llm: Skip triage
+        
+    Returns:
+        int: Number of calls analyzed
+    """
+    analyzed = 0
+    failed_ids = set()
+    while True:
+        query = (
+            select(CallLog.id, CallLog.transcription)
+            .where(CallLog.transcription.isnot(None))
+            .where(~CallLog.unstructured_analyses.any())
+            .order_by(CallLog.id)
+            .limit(BATCH_ROUND_SIZE)
+        )
+        if failed_ids:
+            query = query.where(CallLog.id.not_in(failed_ids))
+        result = await db.execute(query)
+        items = [(call_id, transcription) for call_id, transcription in result.all()]
+        if not items:
+            return analyzed
+        
+        logger.info(f"  📦 Batch-analyzing {len(items)} unanalyzed calls...")
+        saved = await analyze_transcriptions_batch(items, db, force_llm=force_llm)
+        analyzed += len(saved)
+        # Calls that failed entirely are left to the per-call pass
+        failed_ids.update(call_id for call_id, _ in items if call_id not in saved)
+
+
+async def process_all_leads(batch: bool = False, force_llm: bool = False):
     """
     Main function to process all leads in the database.
+    
+    Args:
+        batch: Analyze unanalyzed calls with multi-transcript batch prompts first
+        force_llm: Skip triage and upgrade local-only analyses
     """
     logger.info("=" * 70)
     logger.info("🚀 STARTING BULK LEAD ANALYSIS & SCORING")
@@ -149,6 +238,11 @@ async def process_all_leads():
             logger.info(f"  • Total Calls with Transcriptions: {total_calls}")
             logger.info("")
             
+            if batch:
+                logger.info("📦 Batch mode: analyzing unanalyzed calls with multi-transcript prompts")
+                batch_analyzed = await analyze_unanalyzed_calls_batched(db, force_llm)
+                logger.info(f"  ✅ Batch-analyzed {batch_analyzed} calls")
+            
             # Get all leads with their calls
             result = await db.execute(
                 select(Lead)
@@ -189,7 +283,7 @@ async def process_all_leads():
                 # Analyze each call
                 call_success = 0
                 for call in calls:
-                    if await analyze_call(call.id, call.transcription, db):
+                    if await analyze_call(call.id, call.transcription, db, force_llm):
                         call_success += 1
                 
                 if call_success > 0:
@@ -201,9 +295,6 @@ async def process_all_leads():
                 else:
                     logger.warning(f"  ⚠️  No calls successfully analyzed for lead {lead.id}")
                     skipped_count += 1
-                
-                # Small delay to avoid rate limiting
-                await asyncio.sleep(0.5)
             
             # Final summary
             logger.info("\n" + "=" * 70)
@@ -225,8 +316,19 @@ async def process_all_leads():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze and score all leads")
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="Pack several short transcripts into each LLM request (bulk backfills)"
+    )
+    parser.add_argument(
+        "--force-llm", action="store_true",
+        help="Skip triage and upgrade local-only analyses with the LLM"
+    )
+    args = parser.parse_args()
+    
     try:
-        asyncio.run(process_all_leads())
+        asyncio.run(process_all_leads(batch=args.batch, force_llm=args.force_llm))
     except KeyboardInterrupt:
         logger.info("\n\n⚠️  Process interrupted by user")
         sys.exit(0)
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,6 +9,7 @@ import logging
 from app.core.database import get_db
 from app.core.logger import setup_logging
 from app.routers import lead_router, officer_router, analysis, dashboard_router
+from app.services.metrics_pool import metrics_pool
 
 
 # ---------------------------------------------------------
@@ -16,10 +18,22 @@ from app.routers import lead_router, officer_router, analysis, dashboard_router
 logger = setup_logging()
 logger.info("🚀 Starting FastAPI backend...")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Local transcript metrics run in worker processes, off the event loop
+    metrics_pool.start()
+    try:
+        yield
+    finally:
+        metrics_pool.shutdown()
+
+
 app = FastAPI(
     title="CRM Backend API",
     description="FastAPI + PostgreSQL backend for CRM project",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # ---------------------------------------------------------
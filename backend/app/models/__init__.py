@@ -7,3 +7,5 @@ from app.models.structured_scoring import StructuredScoring
 from app.models.combined_analysis import CombinedAnalysis
 from app.models.feature_store_keyword import FeatureStoreKeyword
 from app.models.lead_score import LeadScore
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.models.transcript_signature import TranscriptSignature
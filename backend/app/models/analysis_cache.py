@@ -0,0 +1,16 @@
+# app/models/analysis_cache.py
+from sqlalchemy import Column, Integer, String, DateTime, func, JSON
+from app.core.database import Base
+
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of transcript + prompts + model
+    model_name = Column(String(50))
+    prompt_version = Column(String(100))
+    sections = Column(JSON)  # LLM output grouped by analysis section
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+    last_hit_at = Column(DateTime, server_default=func.now(), index=True)  # eviction scans by recency
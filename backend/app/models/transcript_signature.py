@@ -0,0 +1,22 @@
+# app/models/transcript_signature.py
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, LargeBinary, BigInteger, Index, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.core.database import Base
+
+
+class TranscriptSignature(Base):
+    """MinHash signature of an analyzed call transcript, for near-duplicate lookup."""
+    __tablename__ = "transcript_signatures"
+
+    id = Column(Integer, primary_key=True, index=True)
+    call_id = Column(Integer, ForeignKey("call_logs.id", ondelete="CASCADE"), unique=True, nullable=False)
+    # Analysis a near-identical transcript can reuse (the original, never a derived copy)
+    analysis_id = Column(Integer, ForeignKey("unstructured_analysis.id", ondelete="CASCADE"), nullable=False)
+    signature = Column(LargeBinary, nullable=False)  # MinHash values packed as uint64
+    band_hashes = Column(ARRAY(BigInteger), nullable=False)  # one LSH bucket per band
+    word_count = Column(Integer)
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_transcript_signatures_band_hashes", "band_hashes", postgresql_using="gin"),
+    )
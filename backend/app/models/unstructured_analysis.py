@@ -50,6 +50,7 @@ class UnstructuredAnalysis(Base):
     talk_ratio = Column(JSON)
     interruptions = Column(Integer)
     response_latency = Column(Float)
+    talk_time = Column(JSON)
 
     # Summaries and outcomes
     summary_ai = Column(Text)
@@ -59,6 +60,18 @@ class UnstructuredAnalysis(Base):
 
     # General metadata
     confidence = Column(Float)
+    # LLM section name -> "completed" / "failed" / "skipped" (triage) / "offline" (heuristic fallback);
+    # NULL for rows saved before it existed
+    section_status = Column(JSON)
+    # LLM section name -> "<prompt>:<version>" it was produced with; NULL for rows saved before it existed
+    prompt_versions = Column(JSON)
+    # Set when the LLM fields were copied from a near-identical transcript's analysis
+    derived_from_id = Column(Integer, ForeignKey("unstructured_analysis.id", ondelete="SET NULL"))
+    derived_similarity = Column(Float)
+    # Per-call records of the LLM requests behind this row (prompt, model, tokens, latency, retries, outcome)
+    llm_call_stats = Column(JSON)
+    # 0-100 score of the triage tier, when it ran (see app/services/call_triage.py)
+    triage_score = Column(Float)
     created_at = Column(DateTime, server_default=func.now())
 
     # Relationships
@@ -1,12 +1,20 @@
 # app/api/routes/analysis.py
+import asyncio
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.models.call_log import CallLog
 from app.models.lead_score import LeadScore
 from app.models.lead import Lead
-from app.services.transcription_analyzer_langchain import analyze_transcription_gemini
+from app.services.transcription_analyzer_langchain import ANALYSIS_MODES
+from app.services.analysis_coalescer import analyze_call_coalesced
 from app.services.lead_scorer import calculate_lead_score
+from app.services.analysis_cache import cache_stats
+from app.services.llm_scheduler import llm_scheduler
+from app.services.llm_metrics import llm_metrics
+from app.services.metrics_pool import MetricsPoolFull, metrics_pool
+from app.services.term_index import term_index
 
 router = APIRouter(prefix="/analysis", tags=["Analysis"])
 
@@ -14,19 +22,85 @@ router = APIRouter(prefix="/analysis", tags=["Analysis"])
 # 🔹 1. Analyze Transcription with Gemini
 # ---------------------------------------------------------
 @router.post("/gemini/{call_id}")
-async def analyze_with_gemini(call_id: int, db: AsyncSession = Depends(get_db)):
+async def analyze_with_gemini(
+    call_id: int, mode: Optional[str] = None, refresh: bool = False, db: AsyncSession = Depends(get_db)
+):
     """
     Uses Gemini 2.5 Flash to analyze a call transcription
     and store unstructured data insights into the DB.
+    Optional `mode` query param: "multi" (four prompts) or "consolidated" (one prompt).
+    `refresh=true` bypasses the analysis cache and always calls Gemini.
+    Concurrent requests for the same call share one analysis.
+    An explicit request always gets the LLM analysis, whatever the triage score.
     """
+    if mode is not None and mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(ANALYSIS_MODES)}")
+
     call = await db.get(CallLog, call_id)
     if not call or not call.transcription:
         raise HTTPException(status_code=404, detail="Call or transcription not found")
 
-    result = await analyze_transcription_gemini(call_id, call.transcription, db)
+    try:
+        result = await analyze_call_coalesced(
+            call_id, call.transcription, db, mode=mode, use_cache=not refresh, force_llm=True
+        )
+    except MetricsPoolFull as e:
+        raise HTTPException(status_code=503, detail=f"Analysis workers are busy, retry later ({e})")
     return {"message": "Gemini analysis completed ✅", "data": result}
 
 
+# ---------------------------------------------------------
+# 🔹 1b. Analysis Cache Stats
+# ---------------------------------------------------------
+@router.get("/cache/stats")
+async def get_cache_stats(db: AsyncSession = Depends(get_db)):
+    """
+    Hit/miss counters of the LLM analysis cache (per worker process)
+    and the number of cached entries.
+    """
+    return await cache_stats(db)
+
+
+@router.get("/llm/scheduler")
+async def get_llm_scheduler_stats():
+    """
+    Current state of this worker's LLM scheduler: in-flight calls,
+    adaptive concurrency limit, remaining RPM/TPM budget and outcome counters.
+    """
+    return llm_scheduler.stats()
+
+
+@router.get("/llm/metrics")
+async def get_llm_metrics():
+    """
+    Per-prompt LLM call metrics of this worker since startup: outcome counts,
+    retries, estimated cost and latency / token histograms (p50/p95/p99),
+    slowest prompts first. Per-analysis records are in `llm_call_stats`.
+    """
+    return llm_metrics.snapshot()
+
+
+@router.get("/metrics-pool")
+async def get_metrics_pool_stats():
+    """
+    State of this worker's local metrics pool: worker processes, running and
+    queued calculations, and how many were rejected because the queue was full.
+    """
+    return metrics_pool.stats()
+
+
+@router.get("/terms")
+async def get_top_terms(limit: int = 20):
+    """
+    Corpus term index used for TF-IDF keywords: number of calls and terms
+    indexed, and the terms occurring in the most calls (document frequency).
+    """
+    if term_index is None:
+        raise HTTPException(status_code=404, detail="Term index is disabled (TERM_INDEX_ENABLED=false)")
+    top_terms = await asyncio.to_thread(term_index.top_terms, limit)
+    return {**term_index.stats(), "top_terms": [{"term": t, "calls": df} for t, df in top_terms]}
+
+
 # ---------------------------------------------------------
 # 🔹 2. Calculate Final Lead Score (Structured + Unstructured)
 # ---------------------------------------------------------
@@ -146,6 +220,7 @@ async def get_unstructured_analysis(call_id: int, db: AsyncSession = Depends(get
             "talk_ratio": analysis.talk_ratio,
             "interruptions": analysis.interruptions,
             "response_latency": analysis.response_latency,
+            "talk_time": analysis.talk_time,
             "summary_ai": analysis.summary_ai,
             "outcome_classification": analysis.outcome_classification,
             "highlights": analysis.highlights,
@@ -15,7 +15,9 @@ from app.models.lead import Lead
 from app.models.call_log import CallLog
 from app.models.unstructured_analysis import UnstructuredAnalysis
 from app.models.lead_score import LeadScore
+from app.services.term_index import term_index
 from datetime import datetime, timedelta
+import asyncio
 import logging
 import json
 
@@ -319,33 +321,35 @@ async def get_dashboard_data(db: AsyncSession = Depends(get_db)):
                 avg_trust=round(avg_trust, 2)
             ))
     
-    # Top keywords (extract from JSON keywords field)
-    keywords_result = await db.execute(
-        select(UnstructuredAnalysis.keywords)
-        .where(UnstructuredAnalysis.keywords.isnot(None))
-    )
-    
-    keyword_freq = {}
-    for row in keywords_result.all():
-        keywords_data = row[0]
-        if keywords_data:
-            if isinstance(keywords_data, str):
-                try:
-                    keywords_data = json.loads(keywords_data)
-                except:
-                    continue
-            
-            if isinstance(keywords_data, list):
-                for kw in keywords_data:
-                    if isinstance(kw, str):
-                        keyword_freq[kw] = keyword_freq.get(kw, 0) + 1
-                    elif isinstance(kw, dict) and 'word' in kw:
-                        keyword_freq[kw['word']] = keyword_freq.get(kw['word'], 0) + 1
-    
-    top_keywords = [
-        TopKeyword(keyword=k, frequency=v)
-        for k, v in sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)[:10]
-    ]
+    # Top keywords: terms found in the most calls, read from the corpus term index
+    if term_index is not None:
+        top_terms = await asyncio.to_thread(term_index.top_terms, 10)
+    else:
+        # Index disabled: count the per-call keyword lists instead
+        keywords_result = await db.execute(
+            select(UnstructuredAnalysis.keywords)
+            .where(UnstructuredAnalysis.keywords.isnot(None))
+        )
+        
+        keyword_freq = {}
+        for row in keywords_result.all():
+            keywords_data = row[0]
+            if keywords_data:
+                if isinstance(keywords_data, str):
+                    try:
+                        keywords_data = json.loads(keywords_data)
+                    except:
+                        continue
+                
+                if isinstance(keywords_data, list):
+                    for kw in keywords_data:
+                        if isinstance(kw, str):
+                            keyword_freq[kw] = keyword_freq.get(kw, 0) + 1
+                        elif isinstance(kw, dict) and 'keyword' in kw:
+                            keyword_freq[kw['keyword']] = keyword_freq.get(kw['keyword'], 0) + 1
+        top_terms = sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)[:10]
+    
+    top_keywords = [TopKeyword(keyword=k, frequency=v) for k, v in top_terms]
     
     # Top pain points
     pain_points_result = await db.execute(
@@ -7,7 +7,10 @@ from app.schemas.lead_detail import LeadDetailResponse
 from app.crud import lead_crud
 from app.models.unstructured_analysis import UnstructuredAnalysis
 from app.models.lead_score import LeadScore
-from app.services.transcription_analyzer_langchain import analyze_transcription_gemini
+from app.services.transcription_analyzer_langchain import failed_sections, offline_sections, skipped_sections
+from app.services.analysis_coalescer import (
+    analyze_call_coalesced, retry_failed_sections_coalesced, upgrade_local_only_coalesced
+)
 from app.services.lead_scorer import calculate_lead_score
 import logging
 
@@ -41,10 +44,14 @@ async def get_lead_details(lead_id: int, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/{lead_id}/analyze")
-async def analyze_lead(lead_id: int, db: AsyncSession = Depends(get_db)):
+async def analyze_lead(lead_id: int, force_llm: bool = False, db: AsyncSession = Depends(get_db)):
     """
     Manually trigger analysis and scoring for a lead.
-    Analyzes all unanalyzed calls and calculates/updates lead score.
+    Analyzes all unanalyzed calls, retries the failed sections of partially
+    analyzed ones and calculates/updates lead score.
+    `force_llm=true` bypasses triage and upgrades local-only analyses with the LLM.
+    While the LLM is failing, calls get an offline heuristic analysis so the
+    lead can still be scored; a later call to this endpoint upgrades them.
     """
     logger.info(f"🤖 Manual analysis triggered for lead_id={lead_id}")
     
@@ -91,12 +98,22 @@ async def analyze_lead(lead_id: int, db: AsyncSession = Depends(get_db)):
         logger.info(f"🤖 Analyzing {len(calls_to_analyze)} unanalyzed calls for lead {lead_id}")
         status["actions_taken"].append(f"Started analyzing {len(calls_to_analyze)} calls")
         
+        local_only = 0
+        offline = 0
         for call in calls_to_analyze:
             try:
                 logger.info(f"  → Analyzing call {call.id}")
-                await analyze_transcription_gemini(call.id, call.transcription, db)
+                analysis = await analyze_call_coalesced(call.id, call.transcription, db, force_llm=force_llm)
                 logger.info(f"  ✅ Call {call.id} analyzed successfully")
                 status["newly_analyzed"] += 1
+                if skipped_sections(analysis):
+                    local_only += 1
+                if offline_sections(analysis):
+                    offline += 1
+                missing = [name for name in failed_sections(analysis) if name not in offline_sections(analysis)]
+                if missing:
+                    status["analysis_errors"].append(f"Call {call.id} incomplete sections: {', '.join(missing)}")
+                    status["success"] = False
             except Exception as e:
                 error_msg = f"Call {call.id} failed: {str(e)}"
                 logger.error(f"  ❌ {error_msg}")
@@ -105,10 +122,52 @@ async def analyze_lead(lead_id: int, db: AsyncSession = Depends(get_db)):
         
         status["analyzed_calls"] = already_analyzed + status["newly_analyzed"]
         status["actions_taken"].append(f"Successfully analyzed {status['newly_analyzed']} new calls")
+        if local_only:
+            status["actions_taken"].append(
+                f"{local_only} calls below the triage threshold got a local-only analysis (use force_llm=true to upgrade)"
+            )
+        if offline:
+            status["actions_taken"].append(
+                f"{offline} calls got an offline heuristic analysis because the LLM is unavailable (analyze again to upgrade)"
+            )
     else:
         logger.info(f"✅ All calls for lead {lead_id} are already analyzed")
         status["actions_taken"].append("All calls already analyzed - skipped analysis")
     
+    # Re-run only the failed sections of partially analyzed calls (and, on demand, local-only ones)
+    retried, upgraded, still_offline = 0, 0, 0
+    for call in lead.call_logs:
+        if not call.transcription or not call.unstructured_analyses or call in calls_to_analyze:
+            continue
+        latest = max(call.unstructured_analyses, key=lambda a: a.id)
+        upgrade = force_llm and bool(skipped_sections(latest))
+        if not failed_sections(latest) and not upgrade:
+            continue
+        try:
+            if upgrade:
+                await upgrade_local_only_coalesced(latest, call.transcription, db)
+                upgraded += 1
+            else:
+                await retry_failed_sections_coalesced(latest, call.transcription, db)
+                retried += 1
+            if offline_sections(latest):
+                still_offline += 1
+            missing = [name for name in failed_sections(latest) if name not in offline_sections(latest)]
+            if missing:
+                status["analysis_errors"].append(f"Call {call.id} incomplete sections: {', '.join(missing)}")
+                status["success"] = False
+        except Exception as e:
+            error_msg = f"Call {call.id} retry failed: {str(e)}"
+            logger.error(f"  ❌ {error_msg}")
+            status["analysis_errors"].append(error_msg)
+            status["success"] = False
+    if retried:
+        status["actions_taken"].append(f"Retried failed sections for {retried} calls")
+    if upgraded:
+        status["actions_taken"].append(f"Upgraded {upgraded} local-only analyses with the LLM")
+    if still_offline:
+        status["actions_taken"].append(f"{still_offline} calls still use an offline heuristic analysis")
+    
     # Calculate/update score
     score_result = await db.execute(
         select(LeadScore)
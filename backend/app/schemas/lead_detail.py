@@ -47,11 +47,18 @@ class UnstructuredAnalysisBase(BaseModel):
     talk_ratio: Optional[Any] = None
     interruptions: Optional[int] = None
     response_latency: Optional[float] = None
+    talk_time: Optional[Any] = None
     summary_ai: Optional[str] = None
     outcome_classification: Optional[str] = None
     highlights: Optional[Any] = None
     themes: Optional[Any] = None
     confidence: Optional[float] = None
+    section_status: Optional[Any] = None
+    prompt_versions: Optional[Any] = None
+    derived_from_id: Optional[int] = None
+    derived_similarity: Optional[float] = None
+    llm_call_stats: Optional[Any] = None
+    triage_score: Optional[float] = None
     created_at: Optional[datetime] = None
 
     class Config:
@@ -0,0 +1,141 @@
+# app/services/analysis_cache.py
+"""
+Content-addressed cache for LLM analysis results.
+
+Entries are keyed by a hash of the normalized transcript, the prompt template
+version and the model name, so a re-submitted transcript is served from the
+database without any LLM call. Entries expire after ANALYSIS_CACHE_TTL_DAYS and
+the table is trimmed to ANALYSIS_CACHE_MAX_ENTRIES (least recently hit first).
+"""
+import copy
+import hashlib
+import os
+import re
+import unicodedata
+from datetime import timedelta
+from typing import Dict, Optional
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.analysis_cache import AnalysisCacheEntry
+import logging
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_TTL_DAYS = int(os.getenv("ANALYSIS_CACHE_TTL_DAYS", "30"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "100000"))
+# Run eviction once every N stores instead of on every write
+ANALYSIS_CACHE_EVICT_EVERY = int(os.getenv("ANALYSIS_CACHE_EVICT_EVERY", "100"))
+
+# Process-local counters, exposed through cache_stats()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+
+_WHITESPACE = re.compile(r"[ \t\r\f\v]+")
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Normalize unicode, collapse runs of whitespace and drop blank lines."""
+    text = unicodedata.normalize("NFC", transcript)
+    lines = (_WHITESPACE.sub(" ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def analysis_cache_key(transcript: str, prompt_version: str, model_name: str) -> str:
+    """sha256 over the normalized transcript, prompt template version and model name."""
+    digest = hashlib.sha256()
+    for part in (model_name, prompt_version, normalize_transcript(transcript)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+async def get_cached_sections(db: AsyncSession, key: str) -> Optional[Dict[str, dict]]:
+    """
+    Return a copy of the cached LLM sections for `key`, or None on a miss.
+    A hit is recorded on the entry and becomes durable with the caller's commit.
+    """
+    if not ANALYSIS_CACHE_ENABLED:
+        return None
+
+    result = await db.execute(
+        select(AnalysisCacheEntry)
+        .where(AnalysisCacheEntry.cache_key == key)
+        .where(AnalysisCacheEntry.created_at >= func.now() - timedelta(days=ANALYSIS_CACHE_TTL_DAYS))
+    )
+    entry = result.scalar_one_or_none()
+    if entry is None:
+        _stats["misses"] += 1
+        return None
+
+    _stats["hits"] += 1
+    await db.execute(
+        update(AnalysisCacheEntry)
+        .where(AnalysisCacheEntry.id == entry.id)
+        .values(hit_count=AnalysisCacheEntry.hit_count + 1, last_hit_at=func.now())
+    )
+    return copy.deepcopy(entry.sections)
+
+
+async def store_cached_sections(
+    db: AsyncSession, key: str, sections: Dict[str, dict], model_name: str, prompt_version: str
+):
+    """Insert (or refresh) the cache entry for `key`; committed with the caller's transaction."""
+    if not ANALYSIS_CACHE_ENABLED:
+        return
+
+    stmt = insert(AnalysisCacheEntry).values(
+        cache_key=key,
+        model_name=model_name,
+        prompt_version=prompt_version,
+        sections=sections,
+        hit_count=0,
+    )
+    # An expired entry with the same key is replaced in place
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AnalysisCacheEntry.cache_key],
+        set_={"sections": stmt.excluded.sections, "created_at": func.now(), "last_hit_at": func.now()},
+    )
+    await db.execute(stmt)
+
+    _stats["stores"] += 1
+    if _stats["stores"] % ANALYSIS_CACHE_EVICT_EVERY == 0:
+        await evict_analysis_cache(db)
+
+
+async def evict_analysis_cache(db: AsyncSession) -> int:
+    """
+    Delete expired entries, then the least recently hit ones beyond
+    ANALYSIS_CACHE_MAX_ENTRIES. Returns the number of rows removed.
+    """
+    expired = await db.execute(
+        delete(AnalysisCacheEntry)
+        .where(AnalysisCacheEntry.created_at < func.now() - timedelta(days=ANALYSIS_CACHE_TTL_DAYS))
+    )
+    keep = (
+        select(AnalysisCacheEntry.id)
+        .order_by(AnalysisCacheEntry.last_hit_at.desc())
+        .limit(ANALYSIS_CACHE_MAX_ENTRIES)
+    )
+    overflow = await db.execute(
+        delete(AnalysisCacheEntry).where(AnalysisCacheEntry.id.not_in(keep))
+    )
+
+    removed = (expired.rowcount or 0) + (overflow.rowcount or 0)
+    _stats["evicted"] += removed
+    if removed:
+        logger.info(f"🧹 Evicted {removed} analysis cache entries")
+    return removed
+
+
+async def cache_stats(db: AsyncSession) -> dict:
+    """Hit/miss counters for this process plus the current table size."""
+    size_result = await db.execute(select(func.count(AnalysisCacheEntry.id)))
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else None,
+        "entries": size_result.scalar() or 0,
+        "ttl_days": ANALYSIS_CACHE_TTL_DAYS,
+        "max_entries": ANALYSIS_CACHE_MAX_ENTRIES,
+    }
@@ -0,0 +1,175 @@
+# app/services/analysis_coalescer.py
+"""
+Single-flight coalescing of analyses of the same call.
+
+Concurrent requests to analyze one call_id share a single LLM run instead of
+each producing a duplicate UnstructuredAnalysis row (and bill):
+
+- Within a process, callers join an in-flight asyncio future keyed by call_id,
+  operation and force_llm, so an analysis, a retry and an upgrade of the same
+  call never hand each other their results.
+- Across uvicorn workers and hosts, the leader holds a Postgres advisory lock
+  on the call. A caller that had to wait for the lock reuses the analysis the
+  lock holder saved instead of starting its own.
+
+The lock is held on a dedicated pooled connection for the duration of the
+analysis, so each analysis in progress uses one extra DB connection.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import engine
+from app.models.unstructured_analysis import UnstructuredAnalysis
+from app.services.transcription_analyzer_langchain import (
+    LOCAL_ONLY_MODEL_NAME, analyze_transcription_gemini, failed_sections, retry_failed_sections,
+    skipped_sections, upgrade_local_only
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-key advisory lock, so call ids do not collide with other lock users
+ANALYSIS_LOCK_NAMESPACE = 0x4C50
+# Give up waiting for another worker's analysis after this long
+ANALYSIS_LOCK_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_LOCK_TIMEOUT_SECONDS", "600"))
+
+# (call_id, operation, force_llm)
+FlightKey = Tuple[int, str, bool]
+
+# Flight key -> future resolving to the id of the analysis being produced in this process
+_in_flight: Dict[FlightKey, asyncio.Future] = {}
+
+
+@asynccontextmanager
+async def analysis_lock(call_id: int):
+    """Hold the cross-process advisory lock for `call_id` (waits up to ANALYSIS_LOCK_TIMEOUT_SECONDS)."""
+    async with engine.connect() as conn:
+        await conn.execute(text(f"SET LOCAL lock_timeout = {int(ANALYSIS_LOCK_TIMEOUT_SECONDS * 1000)}"))
+        await conn.execute(
+            text("SELECT pg_advisory_lock(:namespace, :call_id)"),
+            {"namespace": ANALYSIS_LOCK_NAMESPACE, "call_id": call_id},
+        )
+        # Session-level lock: survives the commit, which avoids an idle open transaction
+        await conn.commit()
+        try:
+            yield
+        finally:
+            await conn.execute(
+                text("SELECT pg_advisory_unlock(:namespace, :call_id)"),
+                {"namespace": ANALYSIS_LOCK_NAMESPACE, "call_id": call_id},
+            )
+            await conn.commit()
+
+
+async def _single_flight(
+    key: FlightKey,
+    db: AsyncSession,
+    reuse: Callable[[], Awaitable[Optional[UnstructuredAnalysis]]],
+    run: Callable[[], Awaitable[UnstructuredAnalysis]],
+    accept: Callable[[UnstructuredAnalysis], bool] = lambda analysis: True,
+) -> UnstructuredAnalysis:
+    """
+    Run `run()` for `key` unless an identical run is already in flight.
+
+    `reuse()` is checked once the advisory lock is held and returns a result
+    another worker produced while we waited, or None. A joined or reused
+    result is only returned if `accept(result)`; otherwise we run our own.
+    """
+    call_id = key[0]
+    while (pending := _in_flight.get(key)) is not None:
+        logger.info(f"🔗 Joining in-flight {key[1]} of call_id={call_id}")
+        analysis_id = await asyncio.shield(pending)
+        analysis = await db.get(UnstructuredAnalysis, analysis_id, populate_existing=True)
+        if analysis is not None and accept(analysis):
+            return analysis
+        logger.info(f"🔁 Joined {key[1]} of call_id={call_id} is not acceptable, running again")
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        async with analysis_lock(call_id):
+            analysis = await reuse()
+            if analysis is not None and accept(analysis):
+                logger.info(f"🔗 Reusing analysis {analysis.id} produced by another worker for call_id={call_id}")
+            else:
+                analysis = await run()
+        future.set_result(analysis.id)
+        return analysis
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # waiters re-raise it; don't warn when there are none
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        del _in_flight[key]
+
+
+async def _latest_analysis_id(call_id: int, db: AsyncSession) -> int:
+    result = await db.execute(
+        select(func.max(UnstructuredAnalysis.id)).where(UnstructuredAnalysis.call_id == call_id)
+    )
+    return result.scalar() or 0
+
+
+async def analyze_call_coalesced(
+    call_id: int, transcript: str, db: AsyncSession, mode: Optional[str] = None, use_cache: bool = True,
+    force_llm: bool = False,
+) -> UnstructuredAnalysis:
+    """
+    analyze_transcription_gemini() with single-flight coalescing per call_id.
+    Concurrent callers get the same saved analysis (a `force_llm` caller
+    never settles for a local-only one).
+    """
+    # Anything newer than this was produced by a concurrent request
+    baseline_id = await _latest_analysis_id(call_id, db)
+
+    async def reuse():
+        result = await db.execute(
+            select(UnstructuredAnalysis)
+            .where(UnstructuredAnalysis.call_id == call_id)
+            .where(UnstructuredAnalysis.id > baseline_id)
+            .order_by(UnstructuredAnalysis.id.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    return await _single_flight(
+        (call_id, "analysis", force_llm), db, reuse,
+        lambda: analyze_transcription_gemini(call_id, transcript, db, mode, use_cache, force_llm),
+        accept=lambda analysis: not (force_llm and analysis.model_name == LOCAL_ONLY_MODEL_NAME),
+    )
+
+
+async def retry_failed_sections_coalesced(
+    analysis: UnstructuredAnalysis, transcript: str, db: AsyncSession
+) -> UnstructuredAnalysis:
+    """retry_failed_sections() with single-flight coalescing per call_id."""
+
+    async def reuse():
+        await db.refresh(analysis)
+        return analysis
+
+    return await _single_flight(
+        (analysis.call_id, "retry", False), db, reuse, lambda: retry_failed_sections(analysis, transcript, db),
+        accept=lambda result: not failed_sections(result),
+    )
+
+
+async def upgrade_local_only_coalesced(
+    analysis: UnstructuredAnalysis, transcript: str, db: AsyncSession
+) -> UnstructuredAnalysis:
+    """upgrade_local_only() with single-flight coalescing per call_id."""
+
+    async def reuse():
+        await db.refresh(analysis)
+        return analysis
+
+    return await _single_flight(
+        (analysis.call_id, "upgrade", False), db, reuse, lambda: upgrade_local_only(analysis, transcript, db),
+        accept=lambda result: not skipped_sections(result),
+    )
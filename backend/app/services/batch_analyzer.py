@@ -0,0 +1,303 @@
+# app/services/batch_analyzer.py
+"""
+Multi-transcript batch analysis for bulk backfills.
+
+Short transcripts are packed into a single schema-constrained request, each
+under a "### CALL <id>" header, and the reply is split back into one
+UnstructuredAnalysis row per call. Batches are sized by estimated tokens
+(input plus the expected output per item), so many short calls share one
+request while long ones still go alone.
+
+Each row is saved under the call's analysis advisory lock (see
+analysis_coalescer), and a call that got an analysis elsewhere in the
+meantime - e.g. from the API - is skipped, so a call never ends up with two.
+
+Anything the batch cannot deliver - a failed request or an item missing from
+the reply - falls back to the regular per-call analysis. Sections that still
+fail are filled offline, as in analyze_transcription_gemini(), and no LLM
+call is made while the LLM is unavailable (see app/services/offline_analyzer.py).
+"""
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.unstructured_analysis import UnstructuredAnalysis
+from app.services.analysis_coalescer import analysis_lock
+from app.services.metrics_pool import metrics_pool
+from app.services.transcript_chunker import estimate_tokens
+from app.services.llm_backend import get_llm_backend
+from app.services.analysis_cache import (
+    analysis_cache_key, get_cached_sections, store_cached_sections
+)
+from app.services.near_duplicate import Fingerprint, compute_fingerprint, index_transcript
+from app.services.call_triage import TRIAGE_ENABLED, triage_call
+from app.services.offline_analyzer import OFFLINE_FALLBACK_ENABLED, llm_available, mark_llm_unavailable
+from app.services.transcription_schema import BatchAnalysisSchema, split_sections
+from app.services.transcription_analyzer_langchain import (
+    ANALYSIS_MODE, EXPECTED_OUTPUT_TOKENS, PartialAnalysisError, build_analysis, build_local_only_analysis,
+    fill_offline_sections, find_reusable_analysis, generate_json, is_complete, prompt_version_for, recorded_prompt_versions,
+    run_llm_analysis, section_prompt_versions, sections_from_analysis, track_llm_calls, with_retries
+)
+from app.services.llm_metrics import summarize_llm_calls
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Token budget of one batch request: transcripts plus EXPECTED_OUTPUT_TOKENS per item
+BATCH_MAX_TOKENS = int(os.getenv("ANALYSIS_BATCH_TOKENS", "16000"))
+BATCH_MAX_ITEMS = int(os.getenv("ANALYSIS_BATCH_MAX_ITEMS", "10"))
+# Transcripts above this are analyzed on their own
+BATCH_ITEM_MAX_TOKENS = int(os.getenv("ANALYSIS_BATCH_ITEM_MAX_TOKENS", "2000"))
+# Batch requests in flight at once (the LLM scheduler still applies)
+BATCH_CONCURRENCY = int(os.getenv("ANALYSIS_BATCH_CONCURRENCY", "4"))
+
+BATCH_ITEM_HEADER = "### CALL {item_id}"
+
+# (call_id, transcript)
+BatchItem = Tuple[int, str]
+
+
+def pack_batches(
+    items: List[BatchItem],
+    max_tokens: int = BATCH_MAX_TOKENS,
+    max_items: int = BATCH_MAX_ITEMS,
+    item_max_tokens: int = BATCH_ITEM_MAX_TOKENS,
+) -> List[List[BatchItem]]:
+    """
+    Greedily pack items into batches that fit `max_tokens` and `max_items`.
+    Items longer than `item_max_tokens` get a batch of their own.
+    """
+    batches, current, current_tokens = [], [], 0
+    for item in items:
+        tokens = estimate_tokens(item[1]) + EXPECTED_OUTPUT_TOKENS
+        if tokens - EXPECTED_OUTPUT_TOKENS > item_max_tokens:
+            batches.append([item])
+            continue
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def analyze_batch_prompt(items: List[BatchItem]) -> Dict[int, Dict[str, dict]]:
+    """
+    One request for several transcripts.
+    Returns call_id -> sections for every item present in the reply.
+    """
+    calls = "\n\n".join(
+        f"{BATCH_ITEM_HEADER.format(item_id=call_id)}\n{transcript}" for call_id, transcript in items
+    )
+    prompt = f"""
+    You are an AI analyzing loan sales call transcripts.
+    Below are {len(items)} separate calls, each starting with a "### CALL <id>" header.
+    Analyze every call independently: sentiment and intent, semantic content and discourse,
+    emotional and psychological aspects, and conversation structure.
+
+    Rules:
+    - Return exactly one entry in "items" per call, with "item_id" set to the call's <id>.
+    - Never mix information between calls.
+    - Fill every field of the response schema; use null if unsure.
+    - Scores are 0-10, conversion_probability is 0-100, cooperation_index and confidence are 0.0-1.0.
+    - Emotion scores are 0.0-1.0.
+    - Be concise, accurate and objective.
+
+    CALLS:
+    {calls}
+    """
+
+    data = await generate_json(
+        prompt, "batch", BatchAnalysisSchema, constrained=True,
+        expected_output_tokens=EXPECTED_OUTPUT_TOKENS * len(items),
+    )
+    wanted = {str(call_id): call_id for call_id, _ in items}
+    results = {}
+    for item in data.get("items") or []:
+        call_id = wanted.get(item.get("item_id"))
+        if call_id is not None and call_id not in results:
+            results[call_id] = split_sections(item)
+    return results
+
+
+async def _analyze_single(transcript: str) -> Tuple[Optional[Dict[str, dict]], List[dict]]:
+    """
+    Per-call fallback. Returns (completed sections or None if every section
+    failed, LLM call records).
+    """
+    with track_llm_calls() as calls:
+        try:
+            return await run_llm_analysis(transcript, ANALYSIS_MODE), calls
+        except PartialAnalysisError as e:
+            return e.sections, calls
+        except Exception as e:
+            logger.error(f"❌ Per-call fallback failed: {str(e)}")
+            mark_llm_unavailable(e)
+            return None, calls
+
+
+async def run_batch(items: List[BatchItem]) -> Dict[int, Tuple[Dict[str, dict], str, dict]]:
+    """
+    LLM part for one batch. Returns call_id -> (sections, analysis mode used,
+    llm_call_stats); calls whose analysis failed entirely are left out.
+    """
+    results: Dict[int, Tuple[Dict[str, dict], str, dict]] = {}
+    if len(items) > 1:
+        with track_llm_calls() as calls:
+            try:
+                batch = await with_retries(lambda: analyze_batch_prompt(items), "batch")
+            except Exception as e:
+                batch = {}
+                logger.warning(f"⚠️ Batch of {len(items)} calls failed, falling back to per-call analysis: {str(e)}")
+                mark_llm_unavailable(e)
+        # The request's cost is shared by every call it answered
+        stats = summarize_llm_calls(calls, shared_by=max(1, len(batch)))
+        results = {call_id: (sections, "batch", stats) for call_id, sections in batch.items()}
+
+    missing = [(call_id, transcript) for call_id, transcript in items if call_id not in results]
+    if missing and not llm_available():
+        return results
+    if missing and len(items) > 1:
+        logger.info(f"↩️ {len(missing)} of {len(items)} calls missing from batch reply, analyzing individually")
+    fallback = await asyncio.gather(*(_analyze_single(transcript) for _, transcript in missing))
+    for (call_id, _), (sections, calls) in zip(missing, fallback):
+        if sections:
+            results[call_id] = (sections, ANALYSIS_MODE, summarize_llm_calls(calls))
+    return results
+
+
+async def _finish_analysis(
+    analysis: UnstructuredAnalysis, transcript: str, metrics: dict, triage_score: Optional[float]
+):
+    """Fill failed sections offline and record the triage score, as analyze_transcription_gemini() does."""
+    if OFFLINE_FALLBACK_ENABLED:
+        await fill_offline_sections(analysis, transcript, metrics)
+    analysis.triage_score = triage_score
+
+
+async def _save_unless_analyzed(
+    db: AsyncSession, analysis: UnstructuredAnalysis, transcript: str, fingerprints: Dict[int, Optional[Fingerprint]]
+) -> bool:
+    """
+    Save the row and add it to the near-duplicate index if complete, holding
+    the call's advisory lock. Returns False (and saves nothing) if the call
+    already has an analysis, e.g. one the API saved since the batch started.
+    """
+    call_id = analysis.call_id
+    async with analysis_lock(call_id):
+        existing = await db.execute(
+            select(UnstructuredAnalysis.id).where(UnstructuredAnalysis.call_id == call_id).limit(1)
+        )
+        if existing.scalar() is not None:
+            logger.info(f"🔗 call_id={call_id} was analyzed elsewhere meanwhile - discarding its batch result")
+            await db.commit()
+            return False
+        db.add(analysis)
+        await db.flush()
+        if is_complete(analysis):
+            if call_id not in fingerprints:
+                fingerprints[call_id] = await compute_fingerprint(transcript)
+            await index_transcript(db, call_id, fingerprints[call_id], analysis.derived_from_id or analysis.id)
+        await db.commit()
+    return True
+
+
+async def analyze_transcriptions_batch(
+    items: List[BatchItem], db: AsyncSession, concurrency: int = BATCH_CONCURRENCY, force_llm: bool = False
+) -> Dict[int, UnstructuredAnalysis]:
+    """
+    Analyze many calls with batch prompting and save one row per call.
+
+    Cache hits and near-duplicates of analyzed calls are saved without an LLM
+    call, as are local-only analyses of calls below the triage threshold
+    (unless `force_llm`); the rest are packed into batches and up to
+    `concurrency` batches run at once. Returns call_id -> saved row for every
+    call that produced at least one section or a local-only analysis (with
+    the offline fallback enabled, every call). Meant for calls without an
+    analysis: a call that has one by the time its row is saved is left out.
+    """
+    model_name = get_llm_backend().model_name
+    batch_version = prompt_version_for("batch")
+    saved: Dict[int, UnstructuredAnalysis] = {}
+    # Computed once per call, for the near-duplicate lookup and the index write
+    fingerprints: Dict[int, Optional[Fingerprint]] = {}
+    # Local metrics and triage scores, computed once per call and reused for its row
+    metrics: Dict[int, dict] = {}
+    triage_scores: Dict[int, float] = {}
+
+    # 💾 Cache hits, near-duplicates and low triage scores need no LLM call
+    pending: List[BatchItem] = []
+    # Rows are only added to the session under their call's lock (see _save_unless_analyzed)
+    ready: List[Tuple[UnstructuredAnalysis, str]] = []
+    for call_id, transcript in items:
+        metrics[call_id] = await metrics_pool.calculate(transcript, call_id)
+        if TRIAGE_ENABLED and not force_llm:
+            use_llm, triage_scores[call_id] = await triage_call(db, call_id, metrics[call_id])
+            if not use_llm:
+                ready.append((build_local_only_analysis(call_id, metrics[call_id], triage_scores[call_id]), transcript))
+                continue
+        sections = await get_cached_sections(db, analysis_cache_key(transcript, batch_version, model_name))
+        derived = None
+        if sections is None:
+            fingerprints[call_id] = await compute_fingerprint(transcript)
+            derived = await find_reusable_analysis(db, fingerprints[call_id], call_id)
+        if derived is not None:
+            sections = sections_from_analysis(derived[0])
+        if sections is None:
+            pending.append((call_id, transcript))
+            continue
+        analysis = build_analysis(
+            call_id, sections, metrics[call_id], f"{model_name}-batch", section_prompt_versions("batch", sections)
+        )
+        if derived is not None:
+            analysis.model_name = derived[0].model_name
+            analysis.prompt_versions = recorded_prompt_versions(derived[0])
+            analysis.derived_from_id = derived[0].id
+            analysis.derived_similarity = round(derived[1], 3)
+        await _finish_analysis(analysis, transcript, metrics[call_id], triage_scores.get(call_id))
+        ready.append((analysis, transcript))
+    for analysis, transcript in ready:
+        if await _save_unless_analyzed(db, analysis, transcript, fingerprints):
+            saved[analysis.call_id] = analysis
+    if saved:
+        logger.info(f"💾 {len(saved)} calls served from the analysis cache, near-duplicates or triage")
+
+    batches = pack_batches(pending)
+    logger.info(f"📦 Packed {len(pending)} calls into {len(batches)} requests")
+
+    for start in range(0, len(batches), concurrency):
+        window = batches[start:start + concurrency]
+        if llm_available():
+            outcomes = await asyncio.gather(*(run_batch(batch) for batch in window))
+        else:
+            logger.info(f"📴 LLM unavailable - analyzing {sum(map(len, window))} calls offline")
+            outcomes = [{} for _ in window]
+
+        # Rows are written sequentially: the session is not shared between tasks
+        for batch, results in zip(window, outcomes):
+            for call_id, transcript in batch:
+                if call_id in results:
+                    sections, mode, llm_call_stats = results[call_id]
+                    if mode == "batch":
+                        key = analysis_cache_key(transcript, batch_version, model_name)
+                        await store_cached_sections(db, key, sections, model_name, batch_version)
+                    suffix = {"batch": "batch", "multi": "hybrid"}.get(mode, mode)
+                    analysis = build_analysis(
+                        call_id, sections, metrics[call_id], f"{model_name}-{suffix}",
+                        section_prompt_versions(mode, sections),
+                    )
+                    analysis.llm_call_stats = llm_call_stats
+                elif OFFLINE_FALLBACK_ENABLED:
+                    # Every section failed: saved as an offline analysis
+                    analysis = build_analysis(call_id, {}, metrics[call_id], f"{model_name}-batch", {})
+                else:
+                    continue
+                await _finish_analysis(analysis, transcript, metrics[call_id], triage_scores.get(call_id))
+                if await _save_unless_analyzed(db, analysis, transcript, fingerprints):
+                    saved[call_id] = analysis
+        logger.info(f"✅ Saved batch window {start // concurrency + 1}/{-(-len(batches) // concurrency)}")
+
+    return saved
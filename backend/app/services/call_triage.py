@@ -0,0 +1,83 @@
+# app/services/call_triage.py
+"""
+Triage tier in front of the LLM analysis.
+
+Scores a call 0-100 from signals that cost nothing: the locally calculated
+transcript metrics and the lead's structured fields. Calls scoring below
+TRIAGE_THRESHOLD get a "local-only" analysis (no LLM sections) that can be
+upgraded on demand; the rest get the full LLM analysis.
+
+Disabled by default; set ANALYSIS_TRIAGE_ENABLED=true to turn it on.
+"""
+import os
+from typing import Dict, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.call_log import CallLog
+from app.models.lead import Lead
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRIAGE_ENABLED = os.getenv("ANALYSIS_TRIAGE_ENABLED", "false").lower() == "true"
+# Calls scoring below this (0-100) are not sent to the LLM
+TRIAGE_THRESHOLD = float(os.getenv("ANALYSIS_TRIAGE_THRESHOLD", "40"))
+
+# Maximum points per factor (they add up to 100)
+TRIAGE_WEIGHTS = {
+    "credit": 25,
+    "interest": 25,
+    "status": 10,
+    "engagement": 15,
+    "buying_signals": 15,
+    "depth": 10,
+}
+# Customer share of the words at which engagement scores full points
+ENGAGED_CUSTOMER_SHARE = 0.35
+
+
+def triage_score(metrics: dict, lead: Optional[Lead]) -> Tuple[float, Dict[str, float]]:
+    """
+    Score a call from its local metrics and lead fields.
+    Unknown lead fields score half points, so missing data alone never
+    pushes a call below the threshold.
+
+    Returns:
+        (score 0-100, points per factor)
+    """
+    credit_score = lead.credit_score if lead else None
+    interest_level = lead.interest_level if lead else None
+    status = (lead.status or "").lower() if lead else ""
+
+    talk_ratio = metrics.get("talk_ratio") or {}
+    entities = metrics.get("entity_mentions") or {}
+    phases = [p for p in metrics.get("conversation_phases") or [] if p != "General Discussion"]
+    customer_share = min(1.0, talk_ratio.get("customer", 0.0) / ENGAGED_CUSTOMER_SHARE)
+    politeness = (metrics.get("politeness_level") or 0.0) / 10
+
+    fractions = {
+        "credit": 0.5 if credit_score is None else min(1.0, max(0.0, credit_score / 850)),
+        "interest": 0.5 if interest_level is None else min(1.0, max(0.0, interest_level / 10)),
+        "status": 1.0 if status in ("qualified", "active") else 0.0,
+        # Two thirds customer participation, one third politeness
+        "engagement": (2 * customer_share + politeness) / 3,
+        "buying_signals": (
+            bool(entities.get("product")) + bool(entities.get("amount")) + ("Solution Presentation" in phases)
+        ) / 3,
+        "depth": min(1.0, len(phases) / 4),
+    }
+    factors = {name: round(TRIAGE_WEIGHTS[name] * fraction, 1) for name, fraction in fractions.items()}
+    return round(sum(factors.values()), 1), factors
+
+
+async def triage_call(db: AsyncSession, call_id: int, metrics: dict) -> Tuple[bool, float]:
+    """
+    Decide whether a call gets the full LLM analysis.
+
+    Returns:
+        (True if the score reaches TRIAGE_THRESHOLD, score)
+    """
+    call = await db.get(CallLog, call_id)
+    lead = await db.get(Lead, call.lead_id) if call is not None and call.lead_id else None
+    score, factors = triage_score(metrics, lead)
+    logger.info(f"🩺 Triage call_id={call_id}: {score} (threshold {TRIAGE_THRESHOLD}) {factors}")
+    return score >= TRIAGE_THRESHOLD, score
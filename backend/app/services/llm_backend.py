@@ -0,0 +1,211 @@
+# app/services/llm_backend.py
+"""
+Pluggable LLM backends for transcript analysis.
+
+- GeminiBackend: Google Gemini through the async client (default).
+- FakeLLMBackend: deterministic, offline backend that returns schema-valid JSON
+  with configurable latency and failure rate, for load testing without network.
+
+Select with LLM_BACKEND=gemini|fake.
+"""
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import typing
+from typing import Any, Dict, Optional, Type
+from pydantic import BaseModel
+from dotenv import load_dotenv
+import logging
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+class LLMResponse:
+    """Raw text returned by a backend plus token usage."""
+
+    def __init__(self, text: str, input_tokens: int, output_tokens: int):
+        self.text = text
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class LLMBackendError(Exception):
+    """Provider-style error carrying an HTTP status `code`, like google.api_core errors."""
+
+    def __init__(self, message: str, code: int):
+        super().__init__(message)
+        self.code = code
+
+
+class LLMBackend(abc.ABC):
+    """Interface every analyzer backend implements."""
+
+    model_name: str = "unknown"
+
+    @abc.abstractmethod
+    async def generate(self, prompt: str, schema: Type[BaseModel], constrained: bool = False) -> LLMResponse:
+        """
+        Run one prompt.
+
+        Args:
+            prompt: Full prompt text
+            schema: Pydantic model describing the expected JSON reply
+            constrained: Enforce `schema` as the provider's response schema
+        """
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini via google.generativeai; configured on first use, not at import."""
+
+    def __init__(self, model_name: str = "gemini-2.5-flash"):
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        self._genai = genai
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        self._response_schemas: Dict[type, dict] = {}
+
+    def _generation_config(self, schema: Type[BaseModel]):
+        from app.services.transcription_schema import to_gemini_schema
+
+        if schema not in self._response_schemas:
+            self._response_schemas[schema] = to_gemini_schema(schema)
+        return self._genai.GenerationConfig(
+            response_mime_type="application/json",
+            response_schema=self._response_schemas[schema],
+        )
+
+    async def generate(self, prompt: str, schema: Type[BaseModel], constrained: bool = False) -> LLMResponse:
+        generation_config = self._generation_config(schema) if constrained else None
+        response = await self.model.generate_content_async(prompt, generation_config=generation_config)
+
+        usage = response.usage_metadata
+        return LLMResponse(
+            text=response.text,
+            input_tokens=usage.prompt_token_count,
+            # Thinking tokens are billed as output
+            output_tokens=usage.candidates_token_count + getattr(usage, "thoughts_token_count", 0),
+        )
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Offline stand-in for Gemini.
+
+    Replies are derived from a hash of the prompt, so the same prompt always
+    yields the same JSON. Latency is log-normal around FAKE_LLM_LATENCY_MS
+    (spread FAKE_LLM_LATENCY_SIGMA) and FAKE_LLM_FAILURE_RATE of calls raise a
+    429 or 503 LLMBackendError. Batch prompts get one item per "### CALL <id>"
+    header.
+    """
+
+    ITEM_HEADER = re.compile(r"^\s*### CALL (\S+)\s*$", re.MULTILINE)
+
+    WORDS = [
+        "loan", "rate", "approval", "payment", "term", "income", "credit",
+        "follow up", "documents", "budget", "refinance", "eligibility",
+    ]
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.35,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.model_name = "fake-llm"
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMBackend":
+        seed = os.getenv("FAKE_LLM_SEED")
+        return cls(
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "800")),
+            latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.35")),
+            failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+            seed=int(seed) if seed is not None else None,
+        )
+
+    async def generate(self, prompt: str, schema: Type[BaseModel], constrained: bool = False) -> LLMResponse:
+        if self.latency_ms > 0:
+            await asyncio.sleep(self._rng.lognormvariate(0.0, self.latency_sigma) * self.latency_ms / 1000)
+
+        if self._rng.random() < self.failure_rate:
+            code = self._rng.choice([429, 503])
+            raise LLMBackendError(f"Fake LLM failure (HTTP {code})", code)
+
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        text = json.dumps(self._fake_model(schema, random.Random(digest), constrained, prompt))
+        return LLMResponse(text=text, input_tokens=len(prompt) // 4 + 1, output_tokens=len(text) // 4 + 1)
+
+    def _fake_model(
+        self, schema: Type[BaseModel], rng: random.Random, constrained: bool, prompt: str = ""
+    ) -> Dict[str, Any]:
+        data = {}
+        for name, field in schema.model_fields.items():
+            extra = field.json_schema_extra or {}
+            data[name] = self._fake_value(field.annotation, extra, rng)
+        item_ids = self.ITEM_HEADER.findall(prompt)
+        if item_ids and "items" in schema.model_fields:
+            list_type = next(a for a in typing.get_args(schema.model_fields["items"].annotation) if a is not type(None))
+            item_model = typing.get_args(list_type)[0]
+            data["items"] = [
+                {**self._fake_value(item_model, {}, rng), "item_id": item_id} for item_id in item_ids
+            ]
+        # Free-form prompts ask for emotion_profile as {"emotion": score}; only the schema uses a list
+        if not constrained and isinstance(data.get("emotion_profile"), list):
+            data["emotion_profile"] = {item["emotion"]: item["score"] for item in data["emotion_profile"]}
+        return data
+
+    def _fake_value(self, annotation: Any, extra: dict, rng: random.Random) -> Any:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        origin = typing.get_origin(annotation)
+
+        if origin is typing.Union:
+            return self._fake_value(args[0], extra, rng)
+        if origin is list:
+            return [self._fake_value(args[0], {}, rng) for _ in range(rng.randint(1, 3))]
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return {
+                name: self._fake_value(field.annotation, field.json_schema_extra or {}, rng)
+                for name, field in annotation.model_fields.items()
+            }
+        if "enum" in extra:
+            return rng.choice(extra["enum"])
+        if annotation in (int, float):
+            value = rng.uniform(extra.get("minimum", 0), extra.get("maximum", 10))
+            return int(value) if annotation is int else round(value, 2)
+        return " ".join(rng.choice(self.WORDS) for _ in range(rng.randint(2, 6))).capitalize()
+
+
+_backend: Optional[LLMBackend] = None
+
+
+def get_llm_backend() -> LLMBackend:
+    """The process-wide backend, created from LLM_BACKEND on first use."""
+    global _backend
+    if _backend is None:
+        name = os.getenv("LLM_BACKEND", "gemini").lower()
+        if name == "fake":
+            _backend = FakeLLMBackend.from_env()
+        elif name == "gemini":
+            _backend = GeminiBackend(os.getenv("GEMINI_MODEL", "gemini-2.5-flash"))
+        else:
+            raise ValueError(f"Unknown LLM_BACKEND: {name}")
+        logger.info(f"🔌 Using LLM backend: {_backend.model_name}")
+    return _backend
+
+
+def set_llm_backend(backend: LLMBackend):
+    """Swap the process-wide backend (scripts, load tests)."""
+    global _backend
+    _backend = backend
@@ -0,0 +1,154 @@
+# app/services/llm_json.py
+"""
+Extract, repair and validate JSON replies from the LLM.
+
+1. Pull the JSON object out of the reply (code fences, leading prose).
+2. Parse it with orjson.
+3. If that fails, repair it locally: trailing commas, missing commas between
+   lines, and output truncated mid-object (open strings and brackets are closed).
+4. Validate against a TypeAdapter built once per schema, which also coerces
+   loosely-typed values (see transcription_schema.LLMOutput).
+
+A malformed reply is fixed here instead of costing another LLM round trip.
+"""
+import re
+from typing import Any, Dict, Optional, Type
+import orjson
+from pydantic import BaseModel, TypeAdapter, ValidationError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ```json ... ``` (closing fence optional: the reply may be truncated)
+_FENCE = re.compile(r"```[a-zA-Z]*[ \t]*\n?(.*?)(?:```|\Z)", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+# A value at the end of one line followed by a key on the next, without a comma
+_MISSING_COMMA = re.compile(r'(["\d}\]]|true|false|null)(\s*\n\s*")')
+
+# Incomplete tails of truncated output, removed before brackets are closed
+_DANGLING_TAILS = [
+    re.compile(r",\s*$"),                                  # separator with nothing after it
+    re.compile(r'"(?:[^"\\]|\\.)*"\s*:\s*$'),              # key without a value
+    re.compile(r"(?<=[:\[,])\s*(?:t|tr|tru|f|fa|fal|fals|n|nu|nul)$"),  # cut-off literal
+    re.compile(r"(?<=\d)\.$"),                             # cut-off decimal
+]
+_OBJECT_KEY_TAIL = re.compile(r'(?<=[{,])\s*"(?:[^"\\]|\\.)*"\s*$')
+
+_adapters: Dict[type, TypeAdapter] = {}
+
+
+class LLMJSONError(ValueError):
+    """The reply could not be turned into valid JSON for its schema, even after repair."""
+
+
+def get_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for `schema`, built on first use and reused for every reply."""
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(schema)
+    return adapter
+
+
+def _scan(text: str, start: int = 0):
+    """
+    Walk `text` tracking strings and brackets.
+    Returns (index where the value opened at `start` closes or -1, open closers, inside a string).
+    """
+    closers = []
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]" and closers:
+            closers.pop()
+            if not closers:
+                return i, closers, False
+    return -1, closers, in_string
+
+
+def extract_json_text(text: str) -> str:
+    """The JSON part of a reply: fence contents, from the first { or [ to where it closes."""
+    text = text.strip()
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    start = min(starts)
+    end, _, _ = _scan(text, start)
+    return text[start:end + 1] if end != -1 else text[start:]
+
+
+def _close_truncated(text: str) -> str:
+    """Close an unterminated string and any open objects/arrays, dropping incomplete tails."""
+    end, closers, in_string = _scan(text)
+    if end != -1 or (not closers and not in_string):
+        return text
+
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    changed = True
+    while changed:
+        changed = False
+        if closers and closers[-1] == "}" and _OBJECT_KEY_TAIL.search(text):
+            text = _OBJECT_KEY_TAIL.sub("", text).rstrip()
+            changed = True
+        for pattern in _DANGLING_TAILS:
+            trimmed = pattern.sub("", text).rstrip()
+            if trimmed != text:
+                text, changed = trimmed, True
+    return text + "".join(reversed(closers))
+
+
+def repair_json_text(text: str) -> str:
+    """Fix the formatting mistakes LLMs commonly make."""
+    text = _close_truncated(text)
+    text = _MISSING_COMMA.sub(r"\1,\2", text)
+    return _TRAILING_COMMA.sub(r"\1", text)
+
+
+def loads_llm_json(text: str) -> Any:
+    """Parse an LLM reply into Python objects, repairing it locally if needed."""
+    candidate = extract_json_text(text)
+    try:
+        return orjson.loads(candidate)
+    except orjson.JSONDecodeError:
+        pass
+
+    repaired = repair_json_text(candidate)
+    try:
+        data = orjson.loads(repaired)
+    except orjson.JSONDecodeError as e:
+        logger.error(f"❌ Invalid JSON from model: {text[:300]}")
+        raise LLMJSONError(f"Invalid JSON from model output ({e}): {text[:300]}")
+    logger.info("🩹 Repaired malformed JSON from model")
+    return data
+
+
+def parse_llm_json(text: str, schema: Optional[Type[BaseModel]] = None) -> Any:
+    """
+    Parse and, when `schema` is given, validate an LLM reply.
+    Returns the validated data dumped back to plain JSON types.
+    """
+    data = loads_llm_json(text)
+    if schema is None:
+        return data
+
+    adapter = get_adapter(schema)
+    try:
+        return adapter.dump_python(adapter.validate_python(data))
+    except ValidationError as e:
+        raise LLMJSONError(f"Model output does not match {schema.__name__}: {e}")
@@ -0,0 +1,206 @@
+# app/services/llm_metrics.py
+"""
+In-process metrics of LLM calls.
+
+Every call made by the analyzer (including failed attempts) is recorded per
+(prompt, model): outcome counts, retries, and histograms of latency and input
+and output tokens. Histograms use fixed buckets so recording is O(1) and
+memory stays constant; percentiles are read from the bucket bounds.
+
+Counters are per worker process and reset on restart. The per-analysis call
+records are also stored on `UnstructuredAnalysis.llm_call_stats`, which is the
+durable source for regression tracking.
+"""
+import math
+import os
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Call outcomes
+OUTCOME_OK = "ok"
+OUTCOME_THROTTLED = "throttled"
+OUTCOME_ERROR = "error"
+OUTCOME_INVALID_JSON = "invalid_json"
+
+# Upper bounds of the histogram buckets (the last one catches everything)
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, math.inf)
+TOKEN_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, math.inf)
+
+# List prices in USD per 1M tokens (defaults: gemini-2.5-flash)
+INPUT_PRICE_PER_M = float(os.getenv("LLM_INPUT_PRICE_PER_M", "0.30"))
+OUTPUT_PRICE_PER_M = float(os.getenv("LLM_OUTPUT_PRICE_PER_M", "2.50"))
+
+
+def estimate_cost(input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost of a call at the configured list prices."""
+    return (input_tokens * INPUT_PRICE_PER_M + output_tokens * OUTPUT_PRICE_PER_M) / 1_000_000
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum and max."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (capped at the max seen)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max), 3)
+        return round(self.max, 3)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "mean": round(self.sum / self.count, 3) if self.count else None,
+            "max": round(self.max, 3),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            # Cumulative counts, Prometheus style
+            "buckets": {
+                ("+Inf" if math.isinf(bound) else str(bound)): cumulative
+                for bound, cumulative in zip(self.buckets, _cumulative(self.counts))
+            },
+        }
+
+
+def _cumulative(counts: List[int]) -> List[int]:
+    total, result = 0, []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+class PromptMetrics:
+    """Everything recorded for one (prompt, model) pair."""
+
+    def __init__(self):
+        self.outcomes: Dict[str, int] = defaultdict(int)
+        self.retries = 0
+        self.cost_usd = 0.0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.input_tokens = Histogram(TOKEN_BUCKETS)
+        self.output_tokens = Histogram(TOKEN_BUCKETS)
+
+    def record(self, call: dict):
+        self.outcomes[call["outcome"]] += 1
+        if call["attempt"] > 0:
+            self.retries += 1
+        self.latency.observe(call["latency"])
+        # Failed attempts carry no usage; only count what the provider reported
+        if call["outcome"] in (OUTCOME_OK, OUTCOME_INVALID_JSON):
+            self.input_tokens.observe(call["input_tokens"])
+            self.output_tokens.observe(call["output_tokens"])
+            self.cost_usd += estimate_cost(call["input_tokens"], call["output_tokens"])
+
+    def snapshot(self) -> dict:
+        calls = sum(self.outcomes.values())
+        return {
+            "calls": calls,
+            "outcomes": dict(self.outcomes),
+            "error_rate": round(1 - self.outcomes[OUTCOME_OK] / calls, 4) if calls else 0.0,
+            "retries": self.retries,
+            "cost_usd": round(self.cost_usd, 6),
+            "latency_seconds": self.latency.snapshot(),
+            "input_tokens": self.input_tokens.snapshot(),
+            "output_tokens": self.output_tokens.snapshot(),
+        }
+
+
+class LLMMetrics:
+    """Registry of PromptMetrics keyed by (prompt, model)."""
+
+    def __init__(self):
+        self._prompts: Dict[Tuple[str, str], PromptMetrics] = defaultdict(PromptMetrics)
+
+    def record(self, call: dict):
+        """Record one call record as produced by generate_json()."""
+        self._prompts[(call["prompt"], call["model"])].record(call)
+
+    def reset(self):
+        self._prompts.clear()
+
+    def snapshot(self) -> dict:
+        """Metrics per prompt, slowest (by p95 latency) first."""
+        prompts = [
+            {"prompt": prompt, "model": model, **metrics.snapshot()}
+            for (prompt, model), metrics in self._prompts.items()
+        ]
+        prompts.sort(key=lambda p: p["latency_seconds"]["p95"] or 0, reverse=True)
+        return {
+            "prices_per_million_tokens": {"input": INPUT_PRICE_PER_M, "output": OUTPUT_PRICE_PER_M},
+            "prompts": prompts,
+        }
+
+
+def _wall_time(calls: List[dict]) -> float:
+    """
+    Seconds during which at least one of the calls was running: the union of
+    their [started_at, started_at + latency] intervals. Concurrent section
+    calls count once, and the gap between an analysis and a later retry not
+    at all. Records without `started_at` (saved before it existed) add their
+    latency as if sequential.
+    """
+    total, current_start, current_end = 0.0, None, None
+    for start, end in sorted((c["started_at"], c["started_at"] + c["latency"]) for c in calls if "started_at" in c):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total + sum(c["latency"] for c in calls if "started_at" not in c)
+
+
+def summarize_llm_calls(calls: List[dict], shared_by: int = 1) -> dict:
+    """
+    Compact summary of the call records behind one analysis, for
+    `UnstructuredAnalysis.llm_call_stats`. A batch request serving `shared_by`
+    calls is stored on each row with its totals split evenly.
+
+    Each call keeps its own `shared_by`, so the calls of an earlier summary
+    can be summarized again together with new ones (a retry) without losing
+    their batch attribution. `latency` is wall-clock time (see _wall_time).
+    """
+    calls = [
+        {
+            **{key: (round(value, 3) if key in ("latency", "started_at") else value) for key, value in call.items()},
+            "shared_by": call.get("shared_by", shared_by),
+        }
+        for call in calls
+    ]
+    input_tokens = sum(c["input_tokens"] / c["shared_by"] for c in calls)
+    output_tokens = sum(c["output_tokens"] / c["shared_by"] for c in calls)
+    return {
+        "calls": calls,
+        "shared_by": shared_by,
+        "input_tokens": int(input_tokens),
+        "output_tokens": int(output_tokens),
+        "latency": round(_wall_time(calls), 3),
+        "cost_usd": round(estimate_cost(input_tokens, output_tokens), 6),
+    }
+
+
+# Shared by every analyzer call in this process
+llm_metrics = LLMMetrics()
@@ -0,0 +1,202 @@
+# app/services/llm_scheduler.py
+"""
+Process-wide scheduler that every LLM call goes through.
+
+- Requests-per-minute and tokens-per-minute token buckets keep us under the
+  provider quota.
+- A hard cap on requests in flight.
+- AIMD adaptive concurrency: the in-flight limit grows by ~1 per round of
+  successful calls and halves on 429/5xx responses, followed by a short cooldown.
+
+Limits apply per process; with several uvicorn workers, divide the provider
+quota between them.
+"""
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes that mean "slow down" (quota) or "provider trouble"
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def error_status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by a provider exception (google.api_core errors expose `.code`)."""
+    code = getattr(exc, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """True for rate-limit and server-side errors that should reduce concurrency."""
+    return error_status_code(exc) in THROTTLE_STATUS_CODES
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` tokens per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        """Debit `amount` tokens; may go negative when reconciling actual usage."""
+        self._refill()
+        self.tokens -= amount
+
+
+class LLMPermit:
+    """Handed out for each scheduled call; reports actual token usage back to the scheduler."""
+
+    def __init__(self, scheduler: "LLMScheduler", reserved_tokens: int):
+        self.scheduler = scheduler
+        self.reserved_tokens = reserved_tokens
+
+    def record_tokens(self, actual_tokens: int):
+        """Correct the TPM bucket by the difference between estimated and actual tokens."""
+        self.scheduler._tpm.take(actual_tokens - self.reserved_tokens)
+        self.reserved_tokens = actual_tokens
+
+
+class LLMScheduler:
+    """Rate limiter + adaptive concurrency limiter shared by all LLM calls in the process."""
+
+    def __init__(
+        self,
+        rpm: int,
+        tpm: int,
+        max_in_flight: int,
+        initial_in_flight: int = 4,
+        min_in_flight: int = 1,
+        cooldown_seconds: float = 2.0,
+    ):
+        self._rpm = TokenBucket(rpm)
+        self._tpm = TokenBucket(tpm)
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+        self.cooldown_seconds = cooldown_seconds
+
+        self._limit = float(min(max(initial_in_flight, min_in_flight), max_in_flight))
+        self._in_flight = 0
+        self._cooldown_until = 0.0
+        self._waiters: Set[asyncio.Future] = set()
+        self._counters = {"completed": 0, "throttled": 0, "failed": 0}
+
+    @classmethod
+    def from_env(cls) -> "LLMScheduler":
+        return cls(
+            rpm=int(os.getenv("LLM_RPM_LIMIT", "1000")),
+            tpm=int(os.getenv("LLM_TPM_LIMIT", "1000000")),
+            max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "16")),
+            initial_in_flight=int(os.getenv("LLM_INITIAL_IN_FLIGHT", "4")),
+            min_in_flight=int(os.getenv("LLM_MIN_IN_FLIGHT", "1")),
+            cooldown_seconds=float(os.getenv("LLM_THROTTLE_COOLDOWN_SECONDS", "2")),
+        )
+
+    # ---------------------------------------------------------
+    # Dispatch
+    # ---------------------------------------------------------
+    def _dispatch_delay(self, tokens: int) -> float:
+        """Seconds this call has to wait (inf = until another call finishes)."""
+        if self._in_flight >= int(self._limit):
+            return math.inf
+        return max(
+            self._rpm.delay(1),
+            self._tpm.delay(tokens),
+            self._cooldown_until - time.monotonic(),
+            0.0,
+        )
+
+    async def _acquire(self, tokens: int):
+        while True:
+            delay = self._dispatch_delay(tokens)
+            if delay <= 0:
+                self._rpm.take(1)
+                self._tpm.take(tokens)
+                self._in_flight += 1
+                return
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.add(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout=None if math.isinf(delay) else delay)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiters.discard(waiter)
+
+    def _release(self, exc: Optional[BaseException]):
+        self._in_flight -= 1
+        now = time.monotonic()
+
+        if exc is None:
+            # Additive increase: about +1 per full window of successful calls
+            self._counters["completed"] += 1
+            self._limit = min(self.max_in_flight, self._limit + 1 / self._limit)
+        elif is_throttle_error(exc):
+            self._counters["throttled"] += 1
+            # Multiplicative decrease, at most once per cooldown window
+            if now >= self._cooldown_until:
+                self._limit = max(self.min_in_flight, self._limit / 2)
+                self._cooldown_until = now + self.cooldown_seconds
+                logger.warning(
+                    f"🐢 LLM throttled (HTTP {error_status_code(exc)}), "
+                    f"in-flight limit reduced to {int(self._limit)}"
+                )
+        elif not isinstance(exc, asyncio.CancelledError):
+            self._counters["failed"] += 1
+
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """
+        Wait for quota and a concurrency slot, then run the body.
+        The outcome of the body (success / throttled / failed) drives the adaptive limit.
+        """
+        await self._acquire(estimated_tokens)
+        permit = LLMPermit(self, estimated_tokens)
+        try:
+            yield permit
+        except BaseException as e:
+            self._release(e)
+            raise
+        else:
+            self._release(None)
+
+    def stats(self) -> dict:
+        """Current limiter state, for diagnostics."""
+        return {
+            "in_flight": self._in_flight,
+            "in_flight_limit": int(self._limit),
+            "max_in_flight": self.max_in_flight,
+            "waiting": len(self._waiters),
+            "rpm_available": int(self._rpm.tokens),
+            "tpm_available": int(self._tpm.tokens),
+            **self._counters,
+        }
+
+
+# Shared by every analyzer call in this process
+llm_scheduler = LLMScheduler.from_env()
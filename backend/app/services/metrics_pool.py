@@ -0,0 +1,102 @@
+# app/services/metrics_pool.py
+"""
+Worker processes for the local transcript metrics.
+
+TranscriptMetricsCalculator is pure-Python regex work; run on the event loop,
+a long transcript blocks every other request on the uvicorn worker until it
+finishes. The pool runs it in separate processes instead, so the loop only
+awaits the result.
+
+- Started and shut down with the app lifespan (see app.main).
+- METRICS_POOL_SIZE worker processes per uvicorn worker.
+- At most METRICS_POOL_MAX_QUEUE calculations wait for a free worker; beyond
+  that calculate() raises MetricsPoolFull instead of queueing without bound.
+
+Scripts that never start the pool get the old behaviour: calculate() runs the
+calculator inline.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.services.transcript_metrics_calculator import calculate_transcript_metrics, create_metrics_pool
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsPoolFull(Exception):
+    """Too many metric calculations are already waiting for a worker."""
+
+
+class MetricsPool:
+    """Process pool with a bounded queue, shared by all analyses in the process."""
+
+    def __init__(self, size: int, max_queue: int):
+        self.size = size
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._counters = {"completed": 0, "rejected": 0, "inline": 0}
+
+    @classmethod
+    def from_env(cls) -> "MetricsPool":
+        return cls(
+            size=int(os.getenv("METRICS_POOL_SIZE", "2")),
+            max_queue=int(os.getenv("METRICS_POOL_MAX_QUEUE", "64")),
+        )
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        if self._executor is None:
+            # spawn, not fork: the app process already runs the event loop and its threads
+            self._executor = create_metrics_pool(self.size, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"🧮 Metrics pool started ({self.size} workers, queue limit {self.max_queue})")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("🧮 Metrics pool stopped")
+
+    async def calculate(self, transcript: str, call_id: Optional[int] = None) -> Dict:
+        """Metrics of `transcript`, calculated in a worker process (see calculate_transcript_metrics)."""
+        return await self.run(calculate_transcript_metrics, transcript, call_id)
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run `fn(*args)` in a worker process; `fn` must be a picklable module-level function."""
+        if self._executor is None:
+            self._counters["inline"] += 1
+            return fn(*args)
+        if self._in_flight >= self.size + self.max_queue:
+            self._counters["rejected"] += 1
+            raise MetricsPoolFull(
+                f"{self._in_flight - self.size} metric calculations already queued (limit {self.max_queue})"
+            )
+
+        self._in_flight += 1
+        try:
+            result = await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            self._in_flight -= 1
+        self._counters["completed"] += 1
+        return result
+
+    def stats(self) -> dict:
+        """Current pool state, for diagnostics."""
+        return {
+            "started": self.started,
+            "workers": self.size,
+            "running": min(self._in_flight, self.size),
+            "queued": max(0, self._in_flight - self.size),
+            "max_queue": self.max_queue,
+            **self._counters,
+        }
+
+
+# Shared by every analyzer call in this process
+metrics_pool = MetricsPool.from_env()
@@ -0,0 +1,182 @@
+# app/services/near_duplicate.py
+"""
+MinHash/LSH index of analyzed transcripts for near-duplicate reuse.
+
+Templated calls (voicemail drops, scripted reminders) differ only in names,
+numbers and filler words. Each analyzed transcript is reduced to a MinHash
+signature over word shingles and split into LSH bands; the band hashes are
+stored in Postgres under a GIN index. A new transcript whose estimated
+Jaccard similarity to an indexed one reaches NEAR_DUPLICATE_THRESHOLD can
+reuse that analysis instead of calling the LLM.
+
+Nothing is held in process memory: a lookup is one indexed query returning
+the rows that share the most bands, so the index scales with the table.
+
+The signature is pure-Python hashing (~0.3 s for 10k words): callers compute
+it once with compute_fingerprint(), which runs in the metrics pool, and pass
+the result to both find_near_duplicate() and index_transcript().
+"""
+import os
+import re
+from array import array
+from typing import List, Optional, Tuple
+import xxhash
+from sqlalchemy import case, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.transcript_signature import TranscriptSignature
+from app.services.analysis_cache import normalize_transcript
+from app.services.metrics_pool import metrics_pool
+import logging
+
+logger = logging.getLogger(__name__)
+
+NEAR_DUPLICATE_ENABLED = os.getenv("NEAR_DUPLICATE_ENABLED", "true").lower() == "true"
+# Minimum estimated Jaccard similarity of word shingles for reuse
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+# Transcripts shorter than this are too small to compare reliably
+NEAR_DUPLICATE_MIN_WORDS = int(os.getenv("NEAR_DUPLICATE_MIN_WORDS", "8"))
+# Candidates fetched per lookup (rows sharing the most bands first)
+NEAR_DUPLICATE_MAX_CANDIDATES = 50
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+# 16 bands x 8 rows: pairs at 0.8 similarity share a band ~95% of the time, at 0.9 > 99.9%;
+# pairs at 0.5 only ~6% of the time (and are then rejected by the signature comparison)
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 64) - 1
+
+# Fixed permutation parameters: signatures must be comparable across processes and restarts
+_PERMUTATIONS = [
+    (xxhash.xxh64_intdigest(b"a", seed=i) % (_MERSENNE_PRIME - 1) + 1,
+     xxhash.xxh64_intdigest(b"b", seed=i) % _MERSENNE_PRIME)
+    for i in range(NUM_PERM)
+]
+
+# (MinHash signature, word count) of a transcript long enough to compare
+Fingerprint = Tuple[List[int], int]
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_DIGITS = re.compile(r"\d+")
+
+
+def transcript_words(transcript: str) -> List[str]:
+    """Lowercased words with punctuation removed and numbers collapsed to a placeholder."""
+    text = normalize_transcript(transcript).lower()
+    text = _DIGITS.sub("0", _NON_WORD.sub(" ", text))
+    return text.split()
+
+
+def minhash_signature(words: List[str]) -> List[int]:
+    """MinHash over word shingles, using universal hashing modulo a Mersenne prime."""
+    size = min(SHINGLE_SIZE, len(words))
+    hashes = {
+        xxhash.xxh64_intdigest(" ".join(words[i:i + size]))
+        for i in range(len(words) - size + 1)
+    }
+    return [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) if hashes else _MAX_HASH
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_hashes(signature: List[int]) -> List[int]:
+    """One signed 64-bit hash per band (the band index is the seed, so bands never collide)."""
+    bands = []
+    for band in range(NUM_BANDS):
+        rows = array("Q", signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]).tobytes()
+        value = xxhash.xxh64_intdigest(rows, seed=band)
+        bands.append(value - (1 << 64) if value >= 1 << 63 else value)
+    return bands
+
+
+def estimated_similarity(left: List[int], right: List[int]) -> float:
+    """Fraction of equal MinHash positions, an unbiased estimate of Jaccard similarity."""
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERM
+
+
+def _pack(signature: List[int]) -> bytes:
+    return array("Q", signature).tobytes()
+
+
+def _unpack(data: bytes) -> List[int]:
+    values = array("Q")
+    values.frombytes(data)
+    return values.tolist()
+
+
+def transcript_fingerprint(transcript: str) -> Optional[Fingerprint]:
+    """Signature and word count, or None if the index is disabled or the transcript is too short."""
+    if not NEAR_DUPLICATE_ENABLED:
+        return None
+    words = transcript_words(transcript)
+    if len(words) < NEAR_DUPLICATE_MIN_WORDS:
+        return None
+    return minhash_signature(words), len(words)
+
+
+async def compute_fingerprint(transcript: str) -> Optional[Fingerprint]:
+    """transcript_fingerprint() in the metrics pool, off the event loop."""
+    if not NEAR_DUPLICATE_ENABLED:
+        return None
+    return await metrics_pool.run(transcript_fingerprint, transcript)
+
+
+async def find_near_duplicate(
+    db: AsyncSession, fingerprint: Optional[Fingerprint], exclude_call_id: Optional[int] = None
+) -> Optional[Tuple[int, float]]:
+    """
+    Find an analyzed transcript at least NEAR_DUPLICATE_THRESHOLD similar.
+    Returns (analysis_id to reuse, estimated similarity), or None.
+    """
+    if fingerprint is None:
+        return None
+
+    signature = fingerprint[0]
+    bands = band_hashes(signature)
+    # Bands are positional, so matching bands can be counted per row; the rows sharing
+    # the most bands are the most similar, and a common band cannot crowd them out
+    matching_bands = sum(
+        case((TranscriptSignature.band_hashes[band + 1] == value, 1), else_=0)
+        for band, value in enumerate(bands)
+    )
+    query = (
+        select(TranscriptSignature.analysis_id, TranscriptSignature.signature)
+        .where(TranscriptSignature.band_hashes.overlap(bands))
+        .order_by(matching_bands.desc())
+        .limit(NEAR_DUPLICATE_MAX_CANDIDATES)
+    )
+    if exclude_call_id is not None:
+        query = query.where(TranscriptSignature.call_id != exclude_call_id)
+    result = await db.execute(query)
+
+    best = None
+    for analysis_id, packed in result.all():
+        similarity = estimated_similarity(signature, _unpack(packed))
+        if similarity >= NEAR_DUPLICATE_THRESHOLD and (best is None or similarity > best[1]):
+            best = (analysis_id, similarity)
+    return best
+
+
+async def index_transcript(
+    db: AsyncSession, call_id: int, fingerprint: Optional[Fingerprint], analysis_id: int
+):
+    """
+    Add (or replace) the call's signature; committed with the caller's transaction.
+    `analysis_id` is the analysis future near-duplicates should reuse.
+    """
+    if fingerprint is None:
+        return
+
+    signature, word_count = fingerprint
+    values = {
+        "analysis_id": analysis_id,
+        "signature": _pack(signature),
+        "band_hashes": band_hashes(signature),
+        "word_count": word_count,
+    }
+    stmt = insert(TranscriptSignature).values(call_id=call_id, **values)
+    await db.execute(stmt.on_conflict_do_update(index_elements=[TranscriptSignature.call_id], set_=values))
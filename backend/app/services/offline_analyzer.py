@@ -0,0 +1,423 @@
+# app/services/offline_analyzer.py
+"""
+Offline fallback for the LLM analysis.
+
+When Gemini errors or the quota is exhausted, analyze_transcription_gemini()
+fills the LLM sections from local heuristics instead of failing, so every
+call still gets a full UnstructuredAnalysis row and lead scoring keeps
+working:
+
+- Sentiment, intent, emotions, objections etc. come from lexicons over the
+  speaker turns, on top of the local transcript metrics.
+- Sections filled this way are marked "offline" in `section_status` and a
+  row without any LLM section is saved as model_name "offline-heuristic".
+  Offline sections still count as needing an LLM run (see failed_sections),
+  so the next analyze or retry upgrades them.
+- After a quota or availability error (429, 5xx) the LLM is skipped for
+  OFFLINE_COOLDOWN_SECONDS, so an outage costs one failed call instead of
+  retries with backoff on every analysis. Per process, like llm_scheduler.
+
+Enabled by default; set ANALYSIS_OFFLINE_FALLBACK=false to surface LLM errors instead.
+"""
+import os
+import re
+import time
+from typing import Dict, List, Optional
+from app.services.call_triage import ENGAGED_CUSTOMER_SHARE
+from app.services.llm_scheduler import error_status_code, is_throttle_error
+from app.services.transcript_metrics_calculator import PhraseMatcher, TranscriptMetricsCalculator, Turn
+from app.services.transcription_schema import SECTION_SCHEMAS
+import logging
+
+logger = logging.getLogger(__name__)
+
+OFFLINE_FALLBACK_ENABLED = os.getenv("ANALYSIS_OFFLINE_FALLBACK", "true").lower() == "true"
+# How long the LLM is skipped after a quota or availability error
+OFFLINE_COOLDOWN_SECONDS = float(os.getenv("ANALYSIS_OFFLINE_COOLDOWN_SECONDS", "60"))
+# Stored as `confidence` of offline sections: heuristics, not a model's judgement
+OFFLINE_CONFIDENCE = 0.3
+
+# time.monotonic() until which the LLM is considered unavailable
+_llm_unavailable_until = 0.0
+
+
+def llm_available() -> bool:
+    """False while the LLM is skipped after a quota or availability error; always True with the fallback disabled."""
+    return time.monotonic() >= _llm_unavailable_until
+
+
+def mark_llm_unavailable(error: BaseException):
+    """
+    Skip the LLM for OFFLINE_COOLDOWN_SECONDS after `error`. Only quota and
+    availability errors (429, 5xx; see is_throttle_error) count: a rejected
+    prompt (400, 403, ...) or an unparseable reply concerns one transcript,
+    not the service.
+    """
+    global _llm_unavailable_until
+    if not OFFLINE_FALLBACK_ENABLED or not is_throttle_error(error):
+        return
+    _llm_unavailable_until = time.monotonic() + OFFLINE_COOLDOWN_SECONDS
+    logger.warning(
+        f"📴 LLM unavailable (HTTP {error_status_code(error)}), "
+        f"analyzing offline for the next {OFFLINE_COOLDOWN_SECONDS:.0f}s"
+    )
+
+
+class OfflineAnalyzer:
+    """Heuristic stand-in for the four LLM prompts, from one pass over the speaker turns."""
+
+    # Customer intent markers; an intent needs at least one hit, otherwise "inquiry"
+    INTENT_MARKERS = {
+        'complaint': ['complaint', 'complain', 'unacceptable', 'ridiculous', 'not happy', 'refund',
+                      'overcharged', 'wrong charge', 'charged twice'],
+        'application': ['apply', 'application', 'sign up', 'submit', 'go ahead', 'get started',
+                        'proceed', 'fill out'],
+        'followup': ['follow up', 'following up', 'called earlier', 'called last', 'last time',
+                     'checking on', 'status of', 'update on', 'call back'],
+    }
+    COMMITMENT_PHRASES = [
+        'i want', 'i\'d like', 'i would like', 'let\'s do', 'ready to', 'sign me up', 'go ahead',
+        'definitely', 'i\'ll take', 'sounds good', 'let\'s proceed', 'count me in'
+    ]
+    HESITATION_PHRASES = [
+        'not sure', 'maybe', 'think about it', 'let me think', 'not interested', 'no thanks',
+        'just looking', 'just browsing', 'too expensive', 'too high', 'can\'t afford', 'hesitant',
+        'not right now', 'shop around'
+    ]
+    PAIN_MARKERS = [
+        'problem', 'issue', 'worried', 'concern', 'concerned', 'struggle', 'struggling', 'difficult',
+        'expensive', 'too high', 'can\'t afford', 'debt', 'behind on', 'stress', 'stressed'
+    ]
+    OBJECTION_MARKERS = [
+        'but', 'however', 'not sure', 'hesitant', 'too expensive', 'too high', 'can\'t afford',
+        'not interested', 'no thanks', 'rather not', 'don\'t want', 'worried about'
+    ]
+    EMOTION_MARKERS = {
+        'frustration': ['frustrated', 'frustrating', 'annoyed', 'angry', 'upset', 'ridiculous',
+                        'unacceptable', 'fed up'],
+        'anxiety': ['worried', 'nervous', 'afraid', 'anxious', 'stress', 'stressed', 'scared'],
+        'curiosity': ['wondering', 'curious', 'how does', 'what if', 'tell me more', 'interested',
+                      'can you explain'],
+        'satisfaction': ['great', 'perfect', 'thank you', 'thanks', 'appreciate', 'happy', 'glad',
+                         'sounds good'],
+        'confusion': ['confused', 'confusing', 'don\'t understand', 'what do you mean', 'not clear',
+                      'unclear'],
+        'excitement': ['excited', 'awesome', 'amazing', 'can\'t wait', 'fantastic'],
+    }
+    EMOTION_SATURATION = 3  # marker hits at which an emotion scores 1.0
+    EMPATHY_PHRASES = [
+        'i understand', 'i see', 'that makes sense', 'i\'m sorry', 'sorry to hear', 'i appreciate',
+        'no problem', 'happy to help', 'of course', 'absolutely', 'no worries', 'take your time'
+    ]
+    ESCALATION_PHRASES = ['supervisor', 'manager', 'escalate', 'escalated', 'formal complaint']
+    URGENCY_PHRASES = [
+        'today only', 'limited time', 'act now', 'expires', 'right away', 'before the end',
+        'don\'t miss', 'last chance', 'this week only'
+    ]
+    BENEFIT_PHRASES = [
+        'save', 'savings', 'lower', 'benefit', 'advantage', 'reduce', 'best rate', 'no fees',
+        'flexible', 'pre-approved'
+    ]
+    SPEECH_ACT_MARKERS = {
+        'greeting': ['hello', 'hi', 'good morning', 'good afternoon', 'good evening'],
+        'request': ['can you', 'could you', 'i need', 'i want', 'i\'d like', 'please'],
+        'offer': ['we can offer', 'i can offer', 'we offer', 'we have', 'i can give', 'we could'],
+        'confirmation': ['yes', 'sure', 'okay', 'that\'s right', 'correct', 'exactly'],
+        'rejection': ['no thanks', 'not interested', 'don\'t want', 'rather not'],
+        'thanks': ['thank you', 'thanks', 'appreciate'],
+    }
+    THEME_MARKERS = {
+        'Loan eligibility': ['qualify', 'eligible', 'eligibility', 'credit score', 'approval', 'approved'],
+        'Interest rates': ['rate', 'rates', 'interest', 'apr'],
+        'Repayment terms': ['term', 'terms', 'monthly payment', 'repay', 'repayment', 'installment', 'emi'],
+        'Documentation': ['document', 'documents', 'paperwork', 'proof', 'statement', 'pay stub'],
+        'Fees and costs': ['fee', 'fees', 'cost', 'charge', 'expensive'],
+        'Customer complaint': ['complaint', 'refund', 'overcharged', 'unacceptable'],
+    }
+
+    # Finds the sentences of a turn that contain an objection (whole-word match, like MATCHER)
+    OBJECTION_PATTERN = re.compile(
+        r'\b(?:' + '|'.join(re.escape(m) for m in sorted(OBJECTION_MARKERS, key=len, reverse=True)) + r')\b'
+    )
+
+    # Every lexicon is counted per turn in a single pass
+    MATCHER = PhraseMatcher(
+        [phrase for markers in INTENT_MARKERS.values() for phrase in markers]
+        + COMMITMENT_PHRASES + HESITATION_PHRASES + PAIN_MARKERS + OBJECTION_MARKERS
+        + [phrase for markers in EMOTION_MARKERS.values() for phrase in markers]
+        + EMPATHY_PHRASES + ESCALATION_PHRASES + URGENCY_PHRASES + BENEFIT_PHRASES
+        + [phrase for markers in SPEECH_ACT_MARKERS.values() for phrase in markers]
+        + [phrase for markers in THEME_MARKERS.values() for phrase in markers]
+    )
+    SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+    # Keywords include the speaker labels, which are not topics
+    SPEAKER_LABELS = {'agent', 'customer', 'officer', 'client', 'caller'}
+
+    # Wording of the extractive summary and follow-up per intent
+    INTENT_SUMMARY = {
+        'inquiry': 'Inquiry about',
+        'application': 'Application for',
+        'complaint': 'Complaint about',
+        'followup': 'Follow-up on',
+    }
+    STRENGTH_POINTS = {'strong': 20, 'moderate': 5, 'weak': -15}
+    STAGE_POINTS = {'awareness': 0, 'consideration': 5, 'decision': 10, 'action': 20}
+
+    def __init__(self, transcript: str, metrics: Dict):
+        """
+        Read the transcript's turns once. `metrics` are its local metrics
+        (calculate_transcript_metrics), reused for keywords, entities, phases,
+        talk ratio, politeness and formality.
+        """
+        self.metrics = metrics
+        # Everyone who is not the agent is the customer, so unlabeled text still counts
+        self._counts = {speaker: dict.fromkeys(self.MATCHER.phrases, 0) for speaker in ('agent', 'customer')}
+        self._words = {'agent': 0, 'customer': 0}
+        self._positive = 0
+        self._negative = 0
+        self._speech_acts: Dict[str, None] = {}
+        self._relations: List[str] = []
+        self._highlights: List[str] = []
+        self._pain_points: List[str] = []
+        self._objections: List[str] = []
+        self._previous: Optional[Turn] = None
+
+        for index, turn in enumerate(TranscriptMetricsCalculator.iter_turns(transcript), 1):
+            self._add_turn(index, turn)
+
+    def _add_turn(self, index: int, turn: Turn):
+        speaker = 'agent' if turn.speaker == 'agent' else 'customer'
+        text = turn.text
+        text_lower = text.lower()
+        found = self.MATCHER.count(text_lower)
+        totals = self._counts[speaker]
+        for phrase, count in found.items():
+            if count:
+                totals[phrase] += count
+        self._words[speaker] += turn.word_count
+
+        for act, markers in self.SPEECH_ACT_MARKERS.items():
+            if any(found[marker] for marker in markers):
+                self._speech_acts.setdefault(act)
+        if '?' in text:
+            self._speech_acts.setdefault('question')
+
+        previous = self._previous
+        if previous is not None and len(self._relations) < 5 and previous.speaker != turn.speaker:
+            if previous.raw.rstrip().endswith('?'):
+                self._relations.append(f"Turn {index} answers Turn {index - 1}")
+            elif speaker == 'customer' and any(found[marker] for marker in self.OBJECTION_MARKERS):
+                self._relations.append(f"Turn {index} objects to Turn {index - 1}")
+        self._previous = turn
+
+        if speaker == 'customer':
+            self._add_customer_turn(index, text, text_lower, found)
+
+    def _add_customer_turn(self, index: int, text: str, text_lower: str, found: Dict[str, int]):
+        """Sentiment, pain points, objections and highlights come from the customer's side."""
+        calculator = TranscriptMetricsCalculator
+        tokens = calculator.TOKEN_PATTERN.findall(text_lower)
+        for j, token in enumerate(tokens):
+            value = calculator.SENTIMENT_LEXICON.get(token)
+            if value is None:
+                continue
+            if not calculator.NEGATIONS.isdisjoint(tokens[max(0, j - calculator.NEGATION_WINDOW):j]):
+                value = -value
+            if value > 0:
+                self._positive += 1
+            else:
+                self._negative += 1
+
+        has_pain = any(found[marker] for marker in self.PAIN_MARKERS)
+        has_objection = any(found[marker] for marker in self.OBJECTION_MARKERS)
+        if has_pain or has_objection:
+            for sentence in self.SENTENCE_SPLIT.split(text):
+                sentence_lower = sentence.lower()
+                if has_pain and len(self._pain_points) < 2 and any(m in sentence_lower for m in self.PAIN_MARKERS):
+                    self._pain_points.append(sentence[:200])
+                if has_objection and len(self._objections) < 2 and self.OBJECTION_PATTERN.search(sentence_lower):
+                    self._objections.append(sentence[:200])
+
+        if len(self._highlights) < 5:
+            amount = calculator.AMOUNT_PATTERN.search(text)
+            if any(found[phrase] for phrase in self.ESCALATION_PHRASES):
+                self._highlights.append(f"Turn {index}: customer asked to escalate")
+            elif any(found[phrase] for phrase in self.COMMITMENT_PHRASES):
+                self._highlights.append(f"Turn {index}: customer commitment")
+            elif has_objection:
+                self._highlights.append(f"Turn {index}: customer objection")
+            elif amount:
+                self._highlights.append(f"Turn {index}: amount mentioned ({amount.group(0)})")
+
+    def _total(self, speaker: str, phrases: List[str]) -> int:
+        counts = self._counts[speaker]
+        return sum(counts[phrase] for phrase in phrases)
+
+    def _both(self, phrases: List[str]) -> int:
+        return self._total('agent', phrases) + self._total('customer', phrases)
+
+    def sections(self) -> Dict[str, dict]:
+        """All four LLM sections, validated against their schemas like an LLM reply."""
+        metrics = self.metrics
+        phases = metrics.get('conversation_phases') or []
+        entities = metrics.get('entity_mentions') or {}
+        products = list(entities.get('product') or [])
+        amounts = list(entities.get('amount') or [])
+        keywords = [
+            item['keyword'] for item in metrics.get('keywords') or []
+            if len(item['keyword']) > 3 and item['keyword'] not in self.SPEAKER_LABELS
+            and item['keyword'] not in TranscriptMetricsCalculator.SENTIMENT_LEXICON
+        ]
+        customer_share = (metrics.get('talk_ratio') or {}).get('customer', 0.0)
+
+        # Customer polarity in [-1, 1]
+        polar = self._positive + self._negative
+        polarity = (self._positive - self._negative) / polar if polar else 0.0
+        sentiment = 'positive' if polarity > 0.2 else 'negative' if polarity < -0.2 else 'neutral'
+
+        intent_hits = {intent: self._total('customer', markers) for intent, markers in self.INTENT_MARKERS.items()}
+        intent_type = max(intent_hits, key=intent_hits.get) if any(intent_hits.values()) else 'inquiry'
+        commitment = self._total('customer', self.COMMITMENT_PHRASES)
+        hesitation = self._total('customer', self.HESITATION_PHRASES)
+        objection_hits = self._total('customer', self.OBJECTION_MARKERS)
+        if commitment >= 2 or (commitment and not hesitation):
+            intent_strength = 'strong'
+        elif hesitation > commitment or self._words['customer'] < 20:
+            intent_strength = 'weak'
+        else:
+            intent_strength = 'moderate'
+
+        if intent_type == 'application' and commitment:
+            decision_stage = 'action'
+        elif commitment or intent_type == 'application':
+            decision_stage = 'decision'
+        elif 'Solution Presentation' in phases or 'Needs Assessment' in phases:
+            decision_stage = 'consideration'
+        else:
+            decision_stage = 'awareness'
+
+        conversion = (
+            30 + 15 * polarity + self.STRENGTH_POINTS[intent_strength] + self.STAGE_POINTS[decision_stage]
+            + 5 * bool(products) + 5 * bool(amounts) - 20 * (intent_type == 'complaint')
+        )
+        conversion = round(min(100.0, max(0.0, conversion)), 1)
+
+        politeness = metrics.get('politeness_level') or 0.0
+        formality = metrics.get('formality_level') or 0.0
+        frustration = self._total('customer', self.EMOTION_MARKERS['frustration'])
+        if frustration >= 2 and sentiment == 'negative':
+            tone = 'aggressive'
+        elif politeness >= 6 and sentiment != 'negative':
+            tone = 'friendly'
+        elif formality < 2.5 and politeness < 4:
+            tone = 'casual'
+        else:
+            tone = 'professional'
+
+        escalated = self._both(self.ESCALATION_PHRASES) > 0
+        if escalated:
+            outcome = 'Escalated'
+        elif 'Closing' in phases and sentiment != 'negative' and hesitation <= commitment:
+            outcome = 'Resolved'
+        else:
+            outcome = 'Unresolved'
+
+        themes = [theme for theme, markers in self.THEME_MARKERS.items() if self._both(markers)][:4]
+        topics = list(dict.fromkeys(products + themes + keywords))[:5]
+        subject = ' and '.join(products) if products else (', '.join(topic.lower() for topic in topics[:2]) or 'the account')
+        summary = [f"{self.INTENT_SUMMARY[intent_type]} {subject}."]
+        if amounts:
+            summary.append(f"Amounts discussed: {', '.join(amounts)}.")
+        summary.append(f"Customer sentiment was {sentiment}; outcome: {outcome.lower()}.")
+
+        if self._total('agent', self.URGENCY_PHRASES):
+            framing = 'urgency framing'
+        elif self._total('agent', self.BENEFIT_PHRASES):
+            framing = 'benefit emphasis'
+        elif self._total('customer', self.PAIN_MARKERS) >= 2:
+            framing = 'problem-focused'
+        else:
+            framing = 'neutral'
+
+        emotion_hits = {
+            emotion: self._total('customer', markers) for emotion, markers in self.EMOTION_MARKERS.items()
+        }
+        emotion_profile = {
+            emotion: round(min(1.0, hits / self.EMOTION_SATURATION), 2)
+            for emotion, hits in emotion_hits.items() if hits
+        }
+        dominant_emotion = max(emotion_profile, key=emotion_profile.get) if emotion_profile else 'neutral'
+        clarity = min(10.0, max(0.0, 8.0 - 1.5 * emotion_hits['confusion']))
+        trust = round(min(10.0, max(0.0, 5.0 + 3 * polarity - 0.5 * min(objection_hits, 4))), 1)
+        agent_words = self._words['agent']
+        if agent_words:
+            # Scale as politeness: 0 empathy phrases = 3.0, 3.5+ per 100 agent words = 10.0
+            empathy = round(min(10.0, 3.0 + self._total('agent', self.EMPATHY_PHRASES) / agent_words * 200), 1)
+        else:
+            empathy = 5.0
+
+        if intent_type == 'complaint':
+            next_actions = ("Escalate the complaint and call the customer back with a resolution" if escalated
+                            else "Resolve the customer's complaint and confirm the fix")
+        elif decision_stage == 'action':
+            next_actions = "Send the application documents and confirm the next steps"
+        elif self._objections:
+            next_actions = "Follow up to address the customer's concerns"
+        elif decision_stage == 'decision':
+            next_actions = "Send a quote and follow up for a decision"
+        else:
+            next_actions = "Share product details and schedule a follow-up call"
+        if conversion >= 60 or intent_type == 'complaint':
+            followup_priority = 'High'
+        elif conversion >= 35:
+            followup_priority = 'Medium'
+        else:
+            followup_priority = 'Low'
+        cooperation = (
+            0.3 + 0.2 * polarity + 0.4 * min(1.0, customer_share / ENGAGED_CUSTOMER_SHARE) - 0.05 * hesitation
+        )
+
+        sections = {
+            'sentiment_and_intent': {
+                'sentiment': sentiment,
+                'tone': tone,
+                'intent_type': intent_type,
+                'intent_strength': intent_strength,
+                'decision_stage': decision_stage,
+                'conversion_probability': conversion,
+                'summary_ai': ' '.join(summary),
+                'outcome_classification': outcome,
+            },
+            'semantic_and_discourse': {
+                'topics_discussed': topics or None,
+                'speech_acts': list(self._speech_acts) or None,
+                'discourse_relations': self._relations or None,
+                'framing_style': framing,
+                'themes': themes or None,
+                'highlights': self._highlights or None,
+            },
+            'emotional_metrics': {
+                'pain_points': '; '.join(self._pain_points) or None,
+                'objections': '; '.join(self._objections) or None,
+                'clarity_score': clarity,
+                'trust_score': trust,
+                'emotion_profile': emotion_profile or None,
+                'dominant_emotion': dominant_emotion,
+                'empathy_score': empathy,
+            },
+            'conversation_structure': {
+                'next_actions': next_actions,
+                'followup_priority': followup_priority,
+                'cooperation_index': round(min(1.0, max(0.0, cooperation)), 2),
+                'confidence': OFFLINE_CONFIDENCE,
+            },
+        }
+        return {name: SECTION_SCHEMAS[name].model_validate(data).model_dump() for name, data in sections.items()}
+
+
+def analyze_offline(transcript: str, metrics: Dict) -> Dict[str, dict]:
+    """
+    Every LLM section of a transcript from local heuristics, in the same shape
+    as run_llm_analysis() returns. `metrics` are the transcript's local metrics.
+    """
+    return OfflineAnalyzer(transcript, metrics).sections()
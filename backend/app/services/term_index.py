@@ -0,0 +1,275 @@
+# app/services/term_index.py
+"""
+Corpus document-frequency index of transcript terms, for TF-IDF keywords.
+
+For every keyword term (see TranscriptMetricsCalculator.terms) the
+index stores in how many calls it occurs, plus the number of calls indexed.
+It lives in one memory-mapped file, so every uvicorn worker and metrics pool
+process reads the same pages without loading or copying it:
+
+    header | df: uint32[capacity] | terms: 32-byte slots[capacity] | call-id bitmap
+
+Terms sit in an open-addressing hash table (xxh64, linear probing); a slot
+with df 0 is empty. A term longer than a slot is stored as its prefix plus
+its hash, so it is counted like any other term. Calls are counted once: the
+bitmap marks indexed call ids, so adding a call again (re-analysis,
+recompute) is a no-op.
+
+Writers take an exclusive flock on a side lock file. Readers take no lock;
+they re-map when the file is replaced, which happens when a writer grows the
+table. Values are native-endian: the file is local to one host.
+"""
+import fcntl
+import heapq
+import math
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import xxhash
+import logging
+
+logger = logging.getLogger(__name__)
+
+TERM_INDEX_ENABLED = os.getenv("TERM_INDEX_ENABLED", "true").lower() == "true"
+TERM_INDEX_PATH = Path(os.getenv("TERM_INDEX_PATH", Path(__file__).resolve().parents[2] / ".term_index.bin"))
+
+MAGIC = b"TDFI"
+VERSION = 1
+# magic, version, capacity (slots), terms, bitmap bytes, calls indexed
+HEADER = struct.Struct("=4sIIIIQ")
+HEADER_SIZE = 64
+TERM_BYTES = 32  # longer terms are stored as prefix + hash (see _term_key)
+INITIAL_CAPACITY = 1 << 15
+INITIAL_BITMAP_BYTES = 1 << 14  # call ids up to 131072; doubled as needed
+MAX_LOAD = 0.7
+# top_terms() leaves out terms found in more than this share of calls ("loan", "payment"),
+# once at least TOP_TERMS_MIN_CALLS are indexed
+TOP_TERMS_MAX_SHARE = float(os.getenv("TERM_INDEX_TOP_MAX_SHARE", "0.8"))
+TOP_TERMS_MIN_CALLS = 20
+
+
+def _term_key(term: str) -> bytes:
+    """Slot key of `term`: its UTF-8 bytes, or a prefix and hex xxh64 digest if they do not fit."""
+    key = term.encode()
+    if len(key) <= TERM_BYTES:
+        return key
+    digest = xxhash.xxh64_hexdigest(key).encode()
+    return key[:TERM_BYTES - len(digest) - 1] + b"~" + digest
+
+
+def _layout(capacity: int, bitmap_bytes: int) -> Tuple[int, int, int]:
+    """Offsets of the terms and bitmap regions, and the file size."""
+    terms_offset = HEADER_SIZE + 4 * capacity
+    bitmap_offset = terms_offset + TERM_BYTES * capacity
+    return terms_offset, bitmap_offset, bitmap_offset + bitmap_bytes
+
+
+class TermIndex:
+    """Memory-mapped document-frequency table; see the module docstring for the layout."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._mm: Optional[mmap.mmap] = None
+        self._inode = None
+        # (inode, calls indexed, limit) -> top_terms() result, so an unchanged index is not rescanned
+        self._top_terms_cache: Tuple[Optional[tuple], List[Tuple[str, int]]] = (None, [])
+
+    # ---------------------------------------------------------
+    # Mapping
+    # ---------------------------------------------------------
+    def _map(self) -> bool:
+        """(Re)map the file if it was created or replaced since the last call. False if it does not exist."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if self._mm is not None and stat.st_ino == self._inode:
+            return True
+        self.close()
+        with open(self.path, "r+b") as f:
+            self._mm = mmap.mmap(f.fileno(), 0)
+        self._inode = stat.st_ino
+        magic, version, self.capacity, _, self.bitmap_bytes, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a term index (version {VERSION})")
+        self.terms_offset, self.bitmap_offset, _ = _layout(self.capacity, self.bitmap_bytes)
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    @staticmethod
+    def _create(path: Path, capacity: int, bitmap_bytes: int):
+        """Write an empty index file (atomically replacing any existing one)."""
+        size = _layout(capacity, bitmap_bytes)[2]
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.truncate(size)
+            f.write(HEADER.pack(MAGIC, VERSION, capacity, 0, bitmap_bytes, 0))
+        os.replace(tmp, path)
+
+    # ---------------------------------------------------------
+    # Reading
+    # ---------------------------------------------------------
+    def _header(self) -> tuple:
+        return HEADER.unpack_from(self._mm, 0)
+
+    def _slot(self, key: bytes) -> int:
+        """Slot holding `key`, or the empty slot where it would go."""
+        mask = self.capacity - 1
+        slot = xxhash.xxh64_intdigest(key) & mask
+        padded = key.ljust(TERM_BYTES, b"\0")
+        mm, terms_offset = self._mm, self.terms_offset
+        while True:
+            offset = terms_offset + slot * TERM_BYTES
+            stored = mm[offset:offset + TERM_BYTES]
+            if stored == padded or stored[0] == 0:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _df(self, slot: int) -> int:
+        return struct.unpack_from("=I", self._mm, HEADER_SIZE + 4 * slot)[0]
+
+    @property
+    def num_docs(self) -> int:
+        """Calls indexed so far (0 if there is no index yet)."""
+        return self._header()[5] if self._map() else 0
+
+    def document_frequencies(self, terms: Iterable[str]) -> Dict[str, int]:
+        """Number of indexed calls containing each term (0 if unseen)."""
+        if not self._map():
+            return {term: 0 for term in terms}
+        result = {}
+        for term in terms:
+            result[term] = self._df(self._slot(_term_key(term)))
+        return result
+
+    def idf(self, terms: Iterable[str]) -> Dict[str, float]:
+        """Smoothed inverse document frequency: ln((1 + N) / (1 + df)) + 1."""
+        dfs = self.document_frequencies(terms)
+        num_docs = self.num_docs
+        return {term: math.log((1 + num_docs) / (1 + df)) + 1 for term, df in dfs.items()}
+
+    def top_terms(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Terms occurring in the most calls, as (term, df), most frequent first.
+        Terms in nearly every call are left out (see TOP_TERMS_MAX_SHARE). The
+        table scan is cached until another call is indexed.
+        """
+        if not self._map():
+            return []
+        num_docs = self.num_docs
+        cache_key = (self._inode, num_docs, limit)
+        if self._top_terms_cache[0] == cache_key:
+            return self._top_terms_cache[1]
+
+        max_df = int(num_docs * TOP_TERMS_MAX_SHARE) if num_docs >= TOP_TERMS_MIN_CALLS else num_docs
+        with memoryview(self._mm) as view:
+            dfs = view[HEADER_SIZE:HEADER_SIZE + 4 * self.capacity].cast("I")
+            try:
+                top = heapq.nlargest(
+                    limit, (slot for slot in range(self.capacity) if 0 < dfs[slot] <= max_df), key=dfs.__getitem__
+                )
+                counts = [dfs[slot] for slot in top]
+            finally:
+                dfs.release()
+        result = [
+            (self._mm[self.terms_offset + slot * TERM_BYTES:self.terms_offset + (slot + 1) * TERM_BYTES]
+             .rstrip(b"\0").decode(errors="replace"), count)
+            for slot, count in zip(top, counts)
+        ]
+        self._top_terms_cache = (cache_key, result)
+        return result
+
+    # ---------------------------------------------------------
+    # Writing
+    # ---------------------------------------------------------
+    def add_document(self, call_id: int, terms: Iterable[str]) -> bool:
+        """
+        Count the distinct `terms` of one call. Returns False (and changes
+        nothing) if the call was already indexed.
+        """
+        keys = {_term_key(term) for term in terms}
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not self._map():
+                self._create(self.path, INITIAL_CAPACITY, INITIAL_BITMAP_BYTES)
+                self._map()
+            _, _, capacity, num_terms, bitmap_bytes, num_docs = self._header()
+            if call_id >= bitmap_bytes * 8 or num_terms + len(keys) > capacity * MAX_LOAD:
+                self._grow(max(capacity, 1 << math.ceil(math.log2((num_terms + len(keys)) / MAX_LOAD + 1))),
+                           max(bitmap_bytes, 1 << math.ceil(math.log2(call_id // 8 + 1))))
+                _, _, capacity, num_terms, bitmap_bytes, num_docs = self._header()
+
+            byte, bit = self.bitmap_offset + call_id // 8, 1 << (call_id % 8)
+            if self._mm[byte] & bit:
+                return False
+            for key in keys:
+                slot = self._slot(key)
+                df_offset = HEADER_SIZE + 4 * slot
+                df = struct.unpack_from("=I", self._mm, df_offset)[0]
+                if df == 0:
+                    # The term is written before its df, so readers never see a half-written slot as used
+                    term_offset = self.terms_offset + slot * TERM_BYTES
+                    self._mm[term_offset:term_offset + TERM_BYTES] = key.ljust(TERM_BYTES, b"\0")
+                    num_terms += 1
+                struct.pack_into("=I", self._mm, df_offset, df + 1)
+            self._mm[byte] |= bit
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, capacity, num_terms, bitmap_bytes, num_docs + 1)
+            return True
+
+    def _grow(self, capacity: int, bitmap_bytes: int):
+        """Rehash into a larger file and swap it in (caller holds the lock)."""
+        old_mm, old_capacity, old_terms_offset = self._mm, self.capacity, self.terms_offset
+        old_bitmap = old_mm[self.bitmap_offset:self.bitmap_offset + self.bitmap_bytes]
+        _, _, _, num_terms, _, num_docs = self._header()
+
+        tmp = self.path.with_name(self.path.name + ".grow")
+        self._create(tmp, capacity, bitmap_bytes)
+        grown = TermIndex(tmp)
+        grown._map()
+        for slot in range(old_capacity):
+            df = struct.unpack_from("=I", old_mm, HEADER_SIZE + 4 * slot)[0]
+            if df:
+                key = old_mm[old_terms_offset + slot * TERM_BYTES:old_terms_offset + (slot + 1) * TERM_BYTES].rstrip(b"\0")
+                new_slot = grown._slot(key)
+                term_offset = grown.terms_offset + new_slot * TERM_BYTES
+                grown._mm[term_offset:term_offset + TERM_BYTES] = key.ljust(TERM_BYTES, b"\0")
+                struct.pack_into("=I", grown._mm, HEADER_SIZE + 4 * new_slot, df)
+        grown._mm[grown.bitmap_offset:grown.bitmap_offset + len(old_bitmap)] = old_bitmap
+        HEADER.pack_into(grown._mm, 0, MAGIC, VERSION, capacity, num_terms, bitmap_bytes, num_docs)
+        grown._mm.flush()
+        grown.close()
+
+        os.replace(tmp, self.path)
+        self._map()
+        logger.info(f"📚 Term index grown to {capacity} term slots, {bitmap_bytes * 8} call ids")
+
+    def reset(self):
+        """Discard the index, e.g. before a rebuild."""
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.close()
+            self.path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        if not self._map():
+            return {"path": str(self.path), "calls": 0, "terms": 0}
+        _, _, capacity, num_terms, bitmap_bytes, num_docs = self._header()
+        return {
+            "path": str(self.path),
+            "calls": num_docs,
+            "terms": num_terms,
+            "term_slots": capacity,
+            "size_bytes": _layout(capacity, bitmap_bytes)[2],
+        }
+
+
+# Opened lazily in every process that uses it; None when disabled
+term_index = TermIndex(TERM_INDEX_PATH) if TERM_INDEX_ENABLED else None
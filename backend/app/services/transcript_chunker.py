@@ -0,0 +1,177 @@
+# app/services/transcript_chunker.py
+"""
+Split long transcripts into speaker-turn aligned chunks and merge the
+per-chunk LLM outputs back into one result.
+
+Chunks are analyzed in parallel, so LLM cost grows linearly with call length
+while wall-clock time stays roughly that of a single chunk.
+"""
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+from app.services.transcript_metrics_calculator import TranscriptMetricsCalculator
+from app.services.transcription_schema import SECTION_SCHEMAS
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Transcripts estimated above this many tokens are split into chunks of at most this size
+CHUNK_MAX_TOKENS = int(os.getenv("TRANSCRIPT_CHUNK_TOKENS", "6000"))
+
+# Rough chars-per-token ratio for English text with Gemini tokenizers
+CHARS_PER_TOKEN = 4
+
+SPEAKER_LABELS = {"agent": "Agent", "customer": "Customer"}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (no API call)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _split_oversized_turn(line: str, max_tokens: int) -> List[str]:
+    """Split a single turn that does not fit in a chunk on sentence, then word boundaries."""
+    if estimate_tokens(line) <= max_tokens:
+        return [line]
+
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(line):
+        for word in (sentence.split(" ") if estimate_tokens(sentence) > max_tokens else [sentence]):
+            candidate = f"{current} {word}" if current else word
+            if current and estimate_tokens(candidate) > max_tokens:
+                pieces.append(current)
+                candidate = word
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_transcript(transcript: str, max_tokens: int = CHUNK_MAX_TOKENS) -> List[str]:
+    """
+    Split a transcript into chunks of at most `max_tokens` estimated tokens.
+
+    Boundaries fall between the speaker turns parsed by TranscriptMetricsCalculator,
+    so no turn is cut unless it is longer than a whole chunk on its own.
+    Returns [transcript] unchanged when it already fits.
+    """
+    if estimate_tokens(transcript) <= max_tokens:
+        return [transcript]
+
+    chunks, current, current_tokens = [], [], 0
+    for turn in TranscriptMetricsCalculator.iter_turns(transcript):
+        label = SPEAKER_LABELS.get(turn.speaker)
+        line = f"{label}: {turn.text}" if label else turn.text
+        for piece in _split_oversized_turn(line, max_tokens):
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+
+    logger.info(f"✂️ Split transcript (~{estimate_tokens(transcript)} tokens) into {len(chunks)} chunks")
+    return chunks
+
+
+# ---------------------------------------------------------
+# Merging per-chunk results
+# ---------------------------------------------------------
+# Fields whose value at the end of the call is what matters
+_LAST_VALUE_FIELDS = {"decision_stage", "outcome_classification", "next_actions"}
+# Free-text fields concatenated across chunks
+_JOINED_FIELDS = {"pain_points", "objections"}
+# Lists that reference turns inside a chunk and are prefixed with the chunk number
+_TURN_REFERENCE_FIELDS = {"discourse_relations", "highlights"}
+_PRIORITY_ORDER = {"low": 0, "medium": 1, "high": 2}
+
+
+def _mean(values: List[float], weights: List[float]) -> Optional[float]:
+    pairs = [(v, w) for v, w in zip(values, weights) if isinstance(v, (int, float))]
+    if not pairs:
+        return None
+    return round(sum(v * w for v, w in pairs) / sum(w for _, w in pairs), 2)
+
+
+def _vote(values: List[Optional[str]], weights: List[float]) -> Optional[str]:
+    """Weighted majority; ties go to the value seen first."""
+    totals: Dict[str, float] = {}
+    for value, weight in zip(values, weights):
+        if isinstance(value, str) and value:
+            totals[value] = totals.get(value, 0.0) + weight
+    if not totals:
+        return None
+    return max(totals, key=lambda value: totals[value])  # max() keeps the first maximum
+
+
+def _union(lists: List[Optional[list]], prefix_chunks: bool) -> Optional[list]:
+    """Order-preserving, case-insensitive union."""
+    merged, seen = [], set()
+    for index, items in enumerate(lists, 1):
+        for item in items or []:
+            text = f"Part {index}: {item}" if prefix_chunks else item
+            key = str(text).strip().lower()
+            if key not in seen:
+                seen.add(key)
+                merged.append(text)
+    return merged if any(items is not None for items in lists) else None
+
+
+def _merge_emotions(profiles: List[Optional[dict]], weights: List[float]) -> Optional[dict]:
+    """Weighted average intensity per emotion; an emotion absent from a chunk counts as 0."""
+    present = [(p, w) for p, w in zip(profiles, weights) if isinstance(p, dict)]
+    if not present:
+        return None
+    total_weight = sum(w for _, w in present)
+    sums: Dict[str, float] = defaultdict(float)
+    for profile, weight in present:
+        for emotion, score in profile.items():
+            if isinstance(score, (int, float)):
+                sums[emotion] += score * weight
+    return {emotion: round(total / total_weight, 2) for emotion, total in sums.items()}
+
+
+def merge_chunk_sections(chunk_results: List[Dict[str, dict]], weights: List[float]) -> Dict[str, dict]:
+    """
+    Deterministically merge per-chunk section outputs.
+
+    Numeric scores are averaged weighted by chunk size, categorical fields take a
+    weighted vote (end-of-call fields take the last chunk), lists are unioned in
+    order and emotion profiles are averaged. `summary_ai` is the concatenation of
+    chunk summaries; callers replace it with a summary of summaries.
+    """
+    merged: Dict[str, dict] = {}
+    for section, schema in SECTION_SCHEMAS.items():
+        fields = {}
+        for field in schema.model_fields:
+            values = [(result.get(section) or {}).get(field) for result in chunk_results]
+
+            if field == "emotion_profile":
+                fields[field] = _merge_emotions(values, weights)
+            elif field == "summary_ai":
+                fields[field] = " ".join(v for v in values if v) or None
+            elif field == "followup_priority":
+                ranked = [v for v in values if isinstance(v, str) and v.lower() in _PRIORITY_ORDER]
+                fields[field] = max(ranked, key=lambda v: _PRIORITY_ORDER[v.lower()]) if ranked else None
+            elif field in _LAST_VALUE_FIELDS:
+                fields[field] = next((v for v in reversed(values) if v), None)
+            elif field in _JOINED_FIELDS:
+                distinct = list(dict.fromkeys(v.strip() for v in values if isinstance(v, str) and v.strip()))
+                fields[field] = " ".join(distinct) or None
+            elif any(isinstance(v, list) for v in values):
+                fields[field] = _union(values, prefix_chunks=field in _TURN_REFERENCE_FIELDS)
+            elif any(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                fields[field] = _mean(values, weights)
+            else:
+                fields[field] = _vote(values, weights)
+
+        if fields.get("emotion_profile"):
+            profile = fields["emotion_profile"]
+            fields["dominant_emotion"] = max(profile, key=lambda emotion: profile[emotion])
+        merged[section] = fields
+    return merged
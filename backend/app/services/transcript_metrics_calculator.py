@@ -3,13 +3,133 @@
 Calculate transcript metrics without LLM calls.
 These metrics can be computed using traditional NLP and pattern matching.
 """
+import math
+import os
 import re
-from collections import Counter
-from typing import Dict, List, Tuple
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from app.services.term_index import TermIndex, term_index as corpus_term_index
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Transcripts sent to a worker process per task by calculate_transcript_metrics_batch
+METRICS_BATCH_CHUNK_SIZE = int(os.getenv("METRICS_BATCH_CHUNK_SIZE", "64"))
+
+# Speaking rate used to estimate when a timestamped turn without an end time ends
+SPEECH_WORDS_PER_SECOND = float(os.getenv("SPEECH_WORDS_PER_SECOND", "2.5"))
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _parse_timestamp(value: str) -> float:
+    """Seconds of "mm:ss" or "hh:mm:ss", with optional fractional seconds."""
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    """Lines of `text`, like text.split('\n') but one at a time instead of all at once."""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+class PhraseMatcher:
+    """
+    Count many phrases in one pass over a text.
+    
+    Results are identical to running
+    len(re.findall(r'\b' + re.escape(phrase) + r'\b', text)) once per phrase:
+    a single compiled regex probes every word boundary with a lookahead over
+    all phrases, longest first. A shorter phrase that also matches at the same
+    position (a word-boundary prefix of the longer one) is credited from a
+    table built up front, and a phrase found again inside its own previous
+    match is not counted twice, as findall would not.
+    """
+    
+    def __init__(self, phrases: List[str]):
+        self.phrases = list(dict.fromkeys(phrases))
+        alternation = '|'.join(re.escape(p) for p in sorted(self.phrases, key=len, reverse=True))
+        self._pattern = re.compile(r'\b(?=(' + alternation + r')\b)')
+        self._also_matched = {
+            phrase: tuple(
+                other for other in self.phrases
+                if other != phrase and phrase.startswith(other)
+                and _is_word_char(phrase[len(other) - 1]) != _is_word_char(phrase[len(other)])
+            )
+            for phrase in self.phrases
+        }
+    
+    def count(self, text: str, counts: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """
+        Occurrences of every phrase in `text` (phrases that never occur map to 0).
+        Pass `counts` to add to running totals instead of starting from zero.
+        """
+        if counts is None:
+            counts = dict.fromkeys(self.phrases, 0)
+        ends: Dict[str, int] = {}
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            longest = match.group(1)
+            for phrase in (longest, *self._also_matched[longest]):
+                if start >= ends.get(phrase, 0):
+                    counts[phrase] += 1
+                    ends[phrase] = start + len(phrase)
+        return counts
+
+
+class Turn:
+    """
+    One speaker turn, stored compactly.
+    
+    `raw` holds the turn's stripped source lines joined by newlines (speaker
+    label included) and is the only copy of its text: `text` is derived from
+    it on demand. __slots__ leaves no per-instance dict, so a turn costs one
+    string plus a few fields instead of a dict with several string copies.
+    
+    `start` and `end` are in seconds from the start of the call, when the
+    transcript is timestamped (None otherwise, and `end` also when only the
+    start time is given).
+    """
+    __slots__ = ('speaker', 'raw', 'text_start', 'word_count', 'raw_word_count', 'start', 'end')
+    
+    def __init__(self, speaker: str, raw: str, text_start: int, word_count: int, raw_word_count: int,
+                 start: Optional[float] = None, end: Optional[float] = None):
+        self.speaker = speaker
+        self.raw = raw
+        self.text_start = text_start
+        self.word_count = word_count  # speaker label excluded
+        self.raw_word_count = raw_word_count  # speaker label included
+        self.start = start
+        self.end = end
+    
+    @property
+    def estimated_end(self) -> Optional[float]:
+        """`end`, or if only the start is known, the start plus the turn's words at SPEECH_WORDS_PER_SECOND."""
+        if self.end is not None or self.start is None:
+            return self.end
+        return self.start + self.word_count / SPEECH_WORDS_PER_SECOND
+    
+    @property
+    def text(self) -> str:
+        """Turn text without the speaker label, continuation lines joined by spaces."""
+        return self.raw[self.text_start:].replace('\n', ' ')
+    
+    def __repr__(self) -> str:
+        return f"Turn(speaker={self.speaker!r}, text={self.text!r})"
+
 
 class TranscriptMetricsCalculator:
     """Calculate various metrics from transcripts without using LLM."""
@@ -50,69 +170,278 @@ class TranscriptMetricsCalculator:
         'closing': ['thank you', 'thanks', 'goodbye', 'bye', 'have a nice', 'take care']
     }
     
-    def __init__(self, transcript: str):
-        """Initialize with a transcript."""
-        self.transcript = transcript.lower()
-        self.original_transcript = transcript
-        self.lines = self._parse_transcript()
-        
-    def _parse_transcript(self) -> List[Dict]:
+    # Sentiment lexicon for keyword context (call-centre / lending vocabulary)
+    POSITIVE_WORDS = [
+        'good', 'great', 'excellent', 'happy', 'glad', 'perfect', 'interested', 'love', 'helpful',
+        'thank', 'thanks', 'appreciate', 'wonderful', 'easy', 'affordable', 'approved', 'fine', 'nice',
+        'best', 'better', 'benefit', 'save', 'savings', 'excited', 'pleased', 'fantastic', 'awesome',
+        'convenient', 'fair', 'reasonable', 'competitive', 'flexible', 'quick', 'trust', 'confident'
+    ]
+    NEGATIVE_WORDS = [
+        'bad', 'worried', 'worry', 'concern', 'concerned', 'problem', 'issue', 'expensive', 'difficult',
+        'hard', 'confused', 'confusing', 'unfortunately', 'denied', 'declined', 'rejected', 'late',
+        'penalty', 'frustrated', 'angry', 'upset', 'disappointed', 'unhappy', 'terrible', 'awful',
+        'poor', 'risk', 'risky', 'struggle', 'struggling', 'afraid', 'hesitant', 'cancel', 'complaint',
+        'wrong', 'scam', 'unfair', 'unclear', 'delay', 'delayed', 'stress', 'stressed'
+    ]
+    # Flip the polarity of a sentiment word within the next few tokens ("t" is from "n't")
+    NEGATIONS = {'not', 'no', 'never', 't', 'without', 'hardly'}
+    SENTIMENT_WINDOW = 4  # tokens on each side of a sentiment word that take its polarity
+    NEGATION_WINDOW = 3  # tokens before a sentiment word searched for a negation
+    SENTIMENT_THRESHOLD = 0.1  # mean polarity per occurrence beyond which a keyword is not Neutral
+    
+    # Every word-bounded lexicon is counted in a single pass (see PhraseMatcher)
+    LEXICON_MATCHER = PhraseMatcher(HEDGE_WORDS + POLITE_PHRASES + FORMAL_WORDS)
+    SENTIMENT_LEXICON = {**dict.fromkeys(POSITIVE_WORDS, 1), **dict.fromkeys(NEGATIVE_WORDS, -1)}
+    # Phase markers are plain substring checks, one alternation per phase
+    PHASE_PATTERNS = {
+        phase: re.compile('|'.join(re.escape(marker) for marker in markers))
+        for phase, markers in PHASE_MARKERS.items()
+    }
+    
+    SPEAKER_PATTERN = re.compile(r'^(Agent|Customer|Officer|Client|Caller):\s*(.+)', re.IGNORECASE)
+    # Optional leading "[00:01:23]" or "[01:23.5 - 01:27]" (start, or start - end)
+    TIMESTAMP_PATTERN = re.compile(
+        r'^\[(\d{1,2}(?::\d{2}){1,2}(?:\.\d+)?)(?:\s*-\s*(\d{1,2}(?::\d{2}){1,2}(?:\.\d+)?))?\]\s*'
+    )
+    
+    # Text-wide patterns, run once per turn over its raw lines.
+    # Keywords are the tokens of 3+ letters: exactly the matches of \b[a-z]{3,}\b
+    TOKEN_PATTERN = re.compile(r'\b[a-z]+\b')
+    SOLUTION_PATTERN = re.compile(r'\b(rate|interest|term|payment|approval|qualify)\b')
+    AMOUNT_PATTERN = re.compile(r'\$[\d,]+(?:\.\d{2})?|\b\d+\s*(?:dollars|rupees|euros)\b', re.IGNORECASE)
+    DATE_PATTERN = re.compile(
+        r'\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b|\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2}(?:,\s+\d{4})?\b',
+        re.IGNORECASE
+    )
+    LOAN_TYPE_PATTERN = re.compile(r'\b(personal loan|home loan|auto loan|mortgage|car loan|student loan|business loan)\b')
+    
+    def __init__(self, transcript: Union[str, Iterable[str]], term_index: Optional[TermIndex] = None):
         """
-        Parse transcript into structured format.
+        Initialize with a transcript: its full text, or any iterable of its
+        lines (e.g. an open file). With a corpus `term_index`, keywords are
+        ranked by TF-IDF instead of raw frequency.
+        
+        The transcript is read in a single streaming pass (see iter_turns).
+        Text-wide counts (keywords, lexicons, entities, questions) are updated
+        from each turn's raw lines and turn-level ones (talk words and times,
+        interruptions, latency, phases) as each turn completes. Only the counters and
+        the first and last three turns are kept, so memory is bounded by the
+        largest turn rather than the whole call. `word_count` is the
+        whitespace-token count of the whole transcript, speaker labels included.
+        """
+        self.term_index = term_index
+        self.word_count = 0
+        self.turn_count = 0
+        self._keyword_counts = Counter()
+        self._keyword_polarity = Counter()
+        self._lexicon_counts = dict.fromkeys(self.LEXICON_MATCHER.phrases, 0)
+        self._entities = {'product': set(), 'date': set(), 'amount': set()}
+        self._question_count = 0
+        self._has_solution_terms = False
+        self._has_objection = False
+        self._speaker_words = {'agent': 0, 'customer': 0}
+        self._interruptions = 0
+        self._previous_turn: Optional[Turn] = None
+        self._latency_total = 0.0
+        self._latency_count = 0
+        self._talk_time = {'agent': 0.0, 'customer': 0.0}
+        self._timed_turns = 0
+        self._first_turns: List[str] = []
+        self._last_turns = deque(maxlen=3)
+        
+        for turn in self.iter_turns(transcript):
+            self._add_turn(turn)
+    
+    @classmethod
+    def iter_turns(cls, transcript: Union[str, Iterable[str]]) -> Iterator[Turn]:
+        """
+        Parse a transcript (text or iterable of lines) into speaker turns,
+        yielding each one as soon as the next labeled line (or the end) shows
+        it is complete.
         Assumes format like: "Agent: text" or "Customer: text"
+        
+        Unlabeled lines are continuations of the current turn; they are
+        collected in a list and joined once, never concatenated repeatedly.
+        
+        Lines may start with a timestamp, "[00:01:23] Agent: text" or a range
+        "[00:01:23 - 00:01:30] Agent: text" (hh:mm:ss or mm:ss); a
+        timestamp alone on a line applies to the next turn. Timestamps set
+        the turn's start and end and are otherwise dropped, so the text and
+        counts are those of the same transcript without them.
         """
-        lines = []
-        for line in self.original_transcript.split('\n'):
+        lines = _iter_lines(transcript) if isinstance(transcript, str) else transcript
+        speaker, raw_lines, text_start, word_count, raw_word_count = None, [], 0, 0, 0
+        start = end = None
+        pending_time = None
+        for line in lines:
             line = line.strip()
             if not line:
                 continue
-                
+            line_time = None
+            if line[0] == '[':
+                time_match = cls.TIMESTAMP_PATTERN.match(line)
+                if time_match:
+                    line_time = (
+                        _parse_timestamp(time_match.group(1)),
+                        _parse_timestamp(time_match.group(2)) if time_match.group(2) else None,
+                    )
+                    line = line[time_match.end():]
+                    if not line:
+                        pending_time = line_time
+                        continue
+            line_time = line_time or pending_time
+            pending_time = None
+            # Every line is split exactly once; the raw count includes speaker labels
+            line_words = len(line.split())
+            
             # Try to detect speaker
-            speaker_match = re.match(r'^(Agent|Customer|Officer|Client|Caller):\s*(.+)', line, re.IGNORECASE)
-            if speaker_match:
-                speaker = speaker_match.group(1).lower()
-                text = speaker_match.group(2).strip()
-                lines.append({
-                    'speaker': 'agent' if speaker in ['agent', 'officer'] else 'customer',
-                    'text': text,
-                    'text_lower': text.lower()
-                })
+            speaker_match = cls.SPEAKER_PATTERN.match(line)
+            if speaker_match or speaker is None:
+                if speaker is not None:
+                    yield Turn(speaker, '\n'.join(raw_lines), text_start, word_count, raw_word_count, start, end)
+                raw_lines, word_count, raw_word_count = [line], line_words, line_words
+                start, end = line_time or (None, None)
+                if speaker_match:
+                    label = speaker_match.group(1).lower()
+                    speaker = 'agent' if label in ['agent', 'officer'] else 'customer'
+                    # The line is stripped, so the text ends the line and starts at group 2
+                    text_start = speaker_match.start(2)
+                    # The label is a token of its own unless the text follows the colon directly
+                    if speaker_match.start(2) > speaker_match.end(1) + 1:
+                        word_count -= 1
+                else:
+                    speaker, text_start = 'unknown', 0
             else:
                 # No speaker label, treat as continuation
-                if lines:
-                    lines[-1]['text'] += ' ' + line
-                    lines[-1]['text_lower'] += ' ' + line.lower()
-                else:
-                    lines.append({
-                        'speaker': 'unknown',
-                        'text': line,
-                        'text_lower': line.lower()
-                    })
+                raw_lines.append(line)
+                word_count += line_words
+                raw_word_count += line_words
+                # A timed continuation line extends the turn to at least its own times
+                if line_time is not None and start is not None:
+                    end = max(t for t in (end, *line_time) if t is not None)
+        if speaker is not None:
+            yield Turn(speaker, '\n'.join(raw_lines), text_start, word_count, raw_word_count, start, end)
+    
+    def _add_turn(self, turn: Turn):
+        """Fold one parsed turn into the running counts."""
+        # Text-wide counts: no pattern spans a line break, so one block per turn suffices
+        raw = turn.raw
+        raw_lower = raw.lower()
+        self.word_count += turn.raw_word_count
+        # The speaker label ("Agent:") is not a keyword and takes no sentiment: it would top
+        # every call's list and the corpus index, and pick up the polarity of the words after it
+        tokens = self.TOKEN_PATTERN.findall(raw_lower, turn.text_start)
+        self._keyword_counts.update(w for w in tokens if len(w) >= 3 and w not in self.STOP_WORDS)
+        self._add_keyword_sentiment(tokens)
+        self.LEXICON_MATCHER.count(raw_lower, self._lexicon_counts)
+        self._entities['amount'].update(self.AMOUNT_PATTERN.findall(raw))
+        self._entities['date'].update(self.DATE_PATTERN.findall(raw))
+        self._entities['product'].update(self.LOAN_TYPE_PATTERN.findall(raw_lower))
+        self._question_count += raw.count('?')
+        if not self._has_solution_terms:
+            self._has_solution_terms = self.SOLUTION_PATTERN.search(raw_lower) is not None
+        
+        # Turn-level counts
+        speaker, word_count = turn.speaker, turn.word_count
+        text_lower = raw_lower[turn.text_start:].replace('\n', ' ')
+        if speaker in self._speaker_words:
+            self._speaker_words[speaker] += word_count
+        self._add_turn_timing(turn)
+        if not self._has_objection:
+            self._has_objection = self.PHASE_PATTERNS['objection'].search(text_lower) is not None
+        if len(self._first_turns) < 3:
+            self._first_turns.append(text_lower)
+        self._last_turns.append(text_lower)
+        self.turn_count += 1
+    
+    def _add_turn_timing(self, turn: Turn):
+        """
+        Interruptions, response latency and talk time at this turn.
         
-        return lines
+        At a speaker switch between two timestamped turns, the gap between the
+        previous turn's (estimated) end and this turn's start is the response
+        latency, and a negative gap (overlapping speech) is an interruption.
+        Without timestamps, a short turn (< 5 words) followed by a speaker
+        switch is counted as an interruption instead.
+        """
+        previous = self._previous_turn
+        if previous is not None and previous.speaker != turn.speaker:
+            previous_end = previous.estimated_end
+            if previous_end is not None and turn.start is not None:
+                gap = turn.start - previous_end
+                if gap < 0:
+                    self._interruptions += 1
+                # Speech that overlaps is an immediate response
+                self._latency_total += max(gap, 0.0)
+                self._latency_count += 1
+            elif 0 < previous.word_count < 5:
+                self._interruptions += 1
+        if turn.start is not None:
+            self._timed_turns += 1
+            if turn.speaker in self._talk_time:
+                self._talk_time[turn.speaker] += max(turn.estimated_end - turn.start, 0.0)
+        self._previous_turn = turn
     
-    def calculate_keywords(self, top_n: int = 10) -> List[Dict]:
+    def _add_keyword_sentiment(self, tokens: List[str]):
         """
-        Extract top keywords with frequency (no sentiment context).
-        Returns list of {keyword, frequency}
+        Credit each sentiment word's polarity (+1/-1, flipped after a negation)
+        to every keyword within SENTIMENT_WINDOW tokens of it in the same turn,
+        itself included. `tokens` are the turn's text without its speaker label.
+        
+        numpy is not a dependency, so this is a plain loop rather than a
+        vectorized pass; it stays cheap because the window work is proportional
+        to the sentiment words found, not to the turn length, beyond the one
+        lookup per token.
         """
-        # Tokenize
-        words = re.findall(r'\b[a-z]{3,}\b', self.transcript)
-        
-        # Filter stop words
-        filtered_words = [w for w in words if w not in self.STOP_WORDS]
-        
-        # Count frequencies
-        word_counts = Counter(filtered_words)
+        lexicon, polarity = self.SENTIMENT_LEXICON, self._keyword_polarity
+        for j in [j for j, token in enumerate(tokens) if token in lexicon]:
+            value = lexicon[tokens[j]]
+            if not self.NEGATIONS.isdisjoint(tokens[max(0, j - self.NEGATION_WINDOW):j]):
+                value = -value
+            for token in tokens[max(0, j - self.SENTIMENT_WINDOW):j + self.SENTIMENT_WINDOW + 1]:
+                if len(token) >= 3 and token not in self.STOP_WORDS:
+                    polarity[token] += value
+    
+    def keyword_sentiment(self, keyword: str) -> str:
+        """Positive / Negative / Neutral, from the mean polarity around the keyword's occurrences."""
+        count = self._keyword_counts[keyword]
+        mean = self._keyword_polarity[keyword] / count if count else 0.0
+        if mean > self.SENTIMENT_THRESHOLD:
+            return 'Positive'
+        if mean < -self.SENTIMENT_THRESHOLD:
+            return 'Negative'
+        return 'Neutral'
+    
+    def terms(self) -> List[str]:
+        """Distinct keyword terms of the transcript (stop words and speaker labels excluded), in order of first use."""
+        return list(self._keyword_counts)
+    
+    def calculate_keywords(self, top_n: int = 10) -> List[Dict]:
+        """
+        Extract top keywords with frequency and sentiment context.
+        Returns list of {keyword, frequency, sentiment_context}
         
-        # Get top N
-        top_keywords = word_counts.most_common(top_n)
+        Terms are ranked by TF-IDF, (1 + ln frequency) x inverse document
+        frequency, when a term index with indexed calls is available, so words
+        common to every call ("loan", "rate") give way to what is specific to
+        this one; otherwise by frequency alone.
+        """
+        counts = self._keyword_counts
+        if self.term_index is not None and self.term_index.num_docs:
+            idf = self.term_index.idf(counts)
+            # Stable sort: ties keep first-use order, as most_common does
+            top_keywords = sorted(
+                counts.items(), key=lambda item: (1 + math.log(item[1])) * idf[item[0]], reverse=True
+            )[:top_n]
+        else:
+            top_keywords = counts.most_common(top_n)
         
         return [
             {
                 'keyword': word,
                 'frequency': count,
-                'sentiment_context': None  # Would need LLM or sentiment lexicon
+                'sentiment_context': self.keyword_sentiment(word)
             }
             for word, count in top_keywords
         ]
@@ -122,11 +451,11 @@ class TranscriptMetricsCalculator:
         Count hedge words and uncertainty markers.
         Returns dict of {word: frequency}
         """
+        counts = self._lexicon_counts
         markers = {}
         for hedge in self.HEDGE_WORDS:
-            count = len(re.findall(r'\b' + re.escape(hedge) + r'\b', self.transcript))
-            if count > 0:
-                markers[hedge] = count
+            if counts[hedge] > 0:
+                markers[hedge] = counts[hedge]
         
         return markers
     
@@ -135,15 +464,8 @@ class TranscriptMetricsCalculator:
         Calculate talk ratio between agent and customer.
         Returns {agent: 0.0-1.0, customer: 0.0-1.0}
         """
-        agent_words = 0
-        customer_words = 0
-        
-        for line in self.lines:
-            word_count = len(line['text'].split())
-            if line['speaker'] == 'agent':
-                agent_words += word_count
-            elif line['speaker'] == 'customer':
-                customer_words += word_count
+        agent_words = self._speaker_words['agent']
+        customer_words = self._speaker_words['customer']
         
         total_words = agent_words + customer_words
         
@@ -168,34 +490,40 @@ class TranscriptMetricsCalculator:
     
     def count_interruptions(self) -> int:
         """
-        Count potential interruptions (consecutive same-speaker turns are rare).
-        Simple heuristic: count speaker switches within short text.
+        Count interruptions, tallied as turns are parsed: overlapping speech at
+        a speaker switch between timestamped turns, otherwise (heuristic) a
+        speaker switch after a short turn (< 5 words).
         """
-        interruptions = 0
-        
-        for i in range(len(self.lines) - 1):
-            current_speaker = self.lines[i]['speaker']
-            next_speaker = self.lines[i + 1]['speaker']
-            
-            # If speaker switches and current line is very short (< 5 words)
-            # it might be an interruption
-            if current_speaker != next_speaker:
-                word_count = len(self.lines[i]['text'].split())
-                if word_count < 5 and word_count > 0:
-                    interruptions += 1
-        
-        return interruptions
+        return self._interruptions
+    
+    def calculate_response_latency(self) -> Optional[float]:
+        """
+        Average seconds between one speaker finishing and the other starting,
+        over the speaker switches between timestamped turns (overlaps count
+        as 0). None if the transcript has no timestamps.
+        """
+        if not self._latency_count:
+            return None
+        return round(self._latency_total / self._latency_count, 2)
+    
+    def calculate_talk_time(self) -> Optional[Dict[str, float]]:
+        """
+        Seconds spoken by each speaker over the timestamped turns.
+        Returns {agent: seconds, customer: seconds}, or None without timestamps.
+        """
+        if not self._timed_turns:
+            return None
+        return {speaker: round(seconds, 1) for speaker, seconds in self._talk_time.items()}
     
     def calculate_politeness_level(self) -> float:
         """
         Calculate politeness score 0-10 based on polite phrases.
         """
-        polite_count = 0
-        for phrase in self.POLITE_PHRASES:
-            polite_count += len(re.findall(r'\b' + re.escape(phrase) + r'\b', self.transcript))
+        counts = self._lexicon_counts
+        polite_count = sum(counts[phrase] for phrase in self.POLITE_PHRASES)
         
         # Normalize by transcript length (per 100 words)
-        word_count = len(self.transcript.split())
+        word_count = self.word_count
         if word_count == 0:
             return 5.0
         
@@ -209,12 +537,11 @@ class TranscriptMetricsCalculator:
         """
         Calculate formality score 0-10 based on formal words.
         """
-        formal_count = 0
-        for word in self.FORMAL_WORDS:
-            formal_count += len(re.findall(r'\b' + re.escape(word) + r'\b', self.transcript))
+        counts = self._lexicon_counts
+        formal_count = sum(counts[word] for word in self.FORMAL_WORDS)
         
         # Normalize by transcript length (per 100 words)
-        word_count = len(self.transcript.split())
+        word_count = self.word_count
         if word_count == 0:
             return 5.0
         
@@ -227,30 +554,13 @@ class TranscriptMetricsCalculator:
     def extract_entity_mentions(self) -> Dict:
         """
         Extract basic entities using regex patterns.
-        Returns dict with product, date, amount mentions.
+        Returns dict with product, date, amount mentions (at most 5 each).
         """
-        entities = {
-            'product': [],
-            'date': [],
-            'amount': []
+        return {
+            'product': list(self._entities['product'])[:5],
+            'date': list(self._entities['date'])[:5],
+            'amount': list(self._entities['amount'])[:5],
         }
-        
-        # Extract monetary amounts
-        amounts = re.findall(r'\$[\d,]+(?:\.\d{2})?|\b\d+\s*(?:dollars|rupees|euros)\b', 
-                            self.original_transcript, re.IGNORECASE)
-        entities['amount'] = list(set(amounts))[:5]  # Limit to 5
-        
-        # Extract dates (simple patterns)
-        dates = re.findall(r'\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b|\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2}(?:,\s+\d{4})?\b',
-                          self.original_transcript, re.IGNORECASE)
-        entities['date'] = list(set(dates))[:5]
-        
-        # Extract loan types (basic keywords)
-        loan_types = re.findall(r'\b(personal loan|home loan|auto loan|mortgage|car loan|student loan|business loan)\b',
-                               self.transcript)
-        entities['product'] = list(set(loan_types))[:5]
-        
-        return entities
     
     def detect_conversation_phases(self) -> List[str]:
         """
@@ -259,36 +569,29 @@ class TranscriptMetricsCalculator:
         """
         phases = []
         
-        # Check first few lines for greeting
-        if len(self.lines) > 0:
-            first_lines = ' '.join([line['text_lower'] for line in self.lines[:3]])
-            if any(marker in first_lines for marker in self.PHASE_MARKERS['greeting']):
-                phases.append('Greeting')
+        # Check first few turns for greeting
+        if self._first_turns and self.PHASE_PATTERNS['greeting'].search(' '.join(self._first_turns)):
+            phases.append('Greeting')
         
         # Check for question patterns (needs assessment)
-        question_count = len(re.findall(r'\?', self.original_transcript))
-        if question_count >= 2:
+        if self._question_count >= 2:
             phases.append('Needs Assessment')
         
         # Check for objection markers
-        for line in self.lines:
-            if any(marker in line['text_lower'] for marker in self.PHASE_MARKERS['objection']):
-                if 'Objection Handling' not in phases:
-                    phases.append('Objection Handling')
-                break
+        if self._has_objection:
+            phases.append('Objection Handling')
         
         # Check for solution presentation (loan-related terms)
-        if re.search(r'\b(rate|interest|term|payment|approval|qualify)\b', self.transcript):
+        if self._has_solution_terms:
             phases.append('Solution Presentation')
         
-        # Check last few lines for closing
-        if len(self.lines) > 0:
-            last_lines = ' '.join([line['text_lower'] for line in self.lines[-3:]])
-            if any(marker in last_lines for marker in self.PHASE_MARKERS['closing']):
-                phases.append('Closing')
+        # Check last few turns for closing
+        if self._last_turns and self.PHASE_PATTERNS['closing'].search(' '.join(self._last_turns)):
+            phases.append('Closing')
         
         return phases if phases else ['General Discussion']
     
+    
     def calculate_all_metrics(self) -> Dict:
         """
         Calculate all non-LLM metrics in one call.
@@ -296,31 +599,143 @@ class TranscriptMetricsCalculator:
         """
         logger.info("📊 Calculating non-LLM metrics from transcript")
         
-        metrics = {
+        metrics = self._collect_metrics()
+        
+        logger.info("✅ Non-LLM metrics calculated successfully")
+        return metrics
+    
+    def _collect_metrics(self) -> Dict:
+        return {
             'keywords': self.calculate_keywords(top_n=10),
             'deception_markers': self.calculate_deception_markers(),
             'talk_ratio': self.calculate_talk_ratio(),
             'dominance_score': self.calculate_dominance_score(),
             'interruptions': self.count_interruptions(),
+            'response_latency': self.calculate_response_latency(),
+            'talk_time': self.calculate_talk_time(),
             'politeness_level': self.calculate_politeness_level(),
             'formality_level': self.calculate_formality_level(),
             'entity_mentions': self.extract_entity_mentions(),
             'conversation_phases': self.detect_conversation_phases(),
         }
-        
-        logger.info("✅ Non-LLM metrics calculated successfully")
-        return metrics
 
 
-def calculate_transcript_metrics(transcript: str) -> Dict:
+class IncrementalTranscriptMetrics(TranscriptMetricsCalculator):
+    """
+    Metrics of a call that is still in progress, for live coaching.
+    
+    Turns are appended one at a time as they are transcribed; each append
+    costs O(turn length), since every metric is a running count (see
+    TranscriptMetricsCalculator). snapshot() can be taken at any point and
+    equals the batch metrics of the transcript so far, i.e. of
+    "\n".join(f"{speaker}: {text}") over the appended turns, computed with
+    the same `term_index`.
+    """
+    
+    def __init__(self, term_index: Optional[TermIndex] = None):
+        super().__init__('', term_index)
+    
+    def append_turn(self, speaker: str, text: str, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        Add the next turn, e.g. append_turn("Customer", "What rate can I get?").
+        `speaker` is a transcript label (Agent, Customer, Officer, Client,
+        Caller); further lines of `text` are continuations of the turn.
+        `start` and `end`, in seconds from the start of the call, enable the
+        timing metrics (see iter_turns).
+        """
+        turns = list(self.iter_turns(f"{speaker}: {text}"))
+        # An unlabeled first line would continue the previous turn, which is already counted
+        if not turns or turns[0].speaker == 'unknown':
+            raise ValueError(f"Not a labeled turn: {speaker!r}: {text[:40]!r}")
+        if start is not None:
+            turns[0].start, turns[0].end = start, end
+        for turn in turns:
+            self._add_turn(turn)
+    
+    def snapshot(self) -> Dict:
+        """All metrics of the call so far (same keys as calculate_all_metrics)."""
+        return self._collect_metrics()
+
+
+def calculate_transcript_metrics(transcript: Union[str, Iterable[str]], call_id: Optional[int] = None) -> Dict:
     """
     Convenience function to calculate all metrics from a transcript.
+    Keywords are scored against the corpus term index (unless disabled);
+    passing `call_id` also adds the call's terms to it (once per call).
     
     Args:
-        transcript: The call transcript text
+        transcript: The call transcript text, or an iterable of its lines
+        call_id: The call the transcript belongs to
         
     Returns:
         Dict containing all calculated metrics
     """
-    calculator = TranscriptMetricsCalculator(transcript)
+    calculator = TranscriptMetricsCalculator(transcript, corpus_term_index)
+    if corpus_term_index is not None and call_id is not None:
+        corpus_term_index.add_document(call_id, calculator.terms())
     return calculator.calculate_all_metrics()
+
+
+def _quiet_worker():
+    """Pool initializer: per-transcript progress logs would flood a batch run."""
+    logger.setLevel(logging.WARNING)
+
+
+def create_metrics_pool(workers: Optional[int] = None, mp_context=None) -> ProcessPoolExecutor:
+    """Process pool for metric calculations, to share across batches."""
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1, mp_context=mp_context, initializer=_quiet_worker
+    )
+
+
+def _calculate_chunk(items: List[Tuple[Optional[int], str]]) -> List[Dict]:
+    return [calculate_transcript_metrics(transcript, call_id) for call_id, transcript in items]
+
+
+def calculate_transcript_metrics_batch(
+    transcripts: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = METRICS_BATCH_CHUNK_SIZE,
+    executor: Optional[Executor] = None,
+    call_ids: Optional[Iterable[int]] = None,
+) -> Iterator[Dict]:
+    """
+    Calculate metrics for many transcripts across a process pool.
+    
+    Transcripts are read lazily and sent to the workers in chunks of
+    `chunk_size`; at most two chunks per worker are in flight, so memory stays
+    bounded however long the input is. Results are yielded in input order.
+    
+    Args:
+        transcripts: Any iterable of transcript texts (a generator is fine)
+        workers: Worker processes (default: one per CPU); with `executor`, its own
+            worker count is used instead
+        chunk_size: Transcripts per task sent to a worker
+        executor: Pool to reuse across calls; a private one is created otherwise
+        call_ids: Call id of each transcript, to add them to the term index
+        
+    Returns:
+        Iterator over the metrics dicts, one per transcript
+    """
+    if executor is not None:
+        # Feed the pool actually used, not the CPU count: `workers` does not size a shared executor
+        workers = getattr(executor, "_max_workers", None) or workers
+    workers = workers or os.cpu_count() or 1
+    pool = executor or create_metrics_pool(workers)
+    max_pending = 2 * workers
+    items = zip(call_ids, transcripts) if call_ids is not None else ((None, t) for t in transcripts)
+    pending = deque()
+    try:
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                break
+            pending.append(pool.submit(_calculate_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        if executor is None:
+            # Also reached when the caller stops iterating early
+            pool.shutdown(cancel_futures=True)
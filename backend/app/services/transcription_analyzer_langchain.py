@@ -1,39 +1,198 @@
 # app/services/transcription_analyzer_gemini.py
 import os
-import json
+import time
+import random
 import asyncio
-import google.generativeai as genai
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.unstructured_analysis import UnstructuredAnalysis
-from app.services.transcript_metrics_calculator import calculate_transcript_metrics
+from app.services.metrics_pool import metrics_pool
+from app.services.llm_backend import get_llm_backend
+from app.services.llm_json import loads_llm_json, parse_llm_json
+from app.services.llm_scheduler import error_status_code, is_throttle_error, llm_scheduler
+from app.services.llm_metrics import (
+    OUTCOME_ERROR, OUTCOME_INVALID_JSON, OUTCOME_OK, OUTCOME_THROTTLED, llm_metrics, summarize_llm_calls
+)
+from app.services.transcript_chunker import chunk_transcript, estimate_tokens, merge_chunk_sections
+from app.services.analysis_cache import (
+    analysis_cache_key, get_cached_sections, store_cached_sections
+)
+from app.services.near_duplicate import Fingerprint, compute_fingerprint, find_near_duplicate, index_transcript
+from app.services.call_triage import TRIAGE_ENABLED, TRIAGE_THRESHOLD, triage_call
+from app.services.offline_analyzer import (
+    OFFLINE_FALLBACK_ENABLED, analyze_offline, llm_available, mark_llm_unavailable
+)
+from app.services.transcription_schema import (
+    SECTION_SCHEMAS, SummarySchema, TranscriptionAnalysisSchema, split_sections
+)
 from dotenv import load_dotenv
 import logging
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# The LLM backend (Gemini or the offline fake) is chosen by LLM_BACKEND on first use,
+# see app/services/llm_backend.py
 
-# Model
-model = genai.GenerativeModel("gemini-2.5-flash")
+# Analysis modes: "multi" = four focused prompts, "consolidated" = one schema-constrained prompt
+ANALYSIS_MODES = ("multi", "consolidated")
+ANALYSIS_MODE = os.getenv("GEMINI_ANALYSIS_MODE", "multi")
+
+# Prompt template versions - bump when a prompt changes so cached results are not reused.
+# Each stored section records the version it was produced with; reanalyze_sections.py
+# re-runs only the sections whose prompt was bumped.
+PROMPT_VERSIONS = {
+    "sentiment_and_intent": "1",
+    "semantic_and_discourse": "1",
+    "emotional_metrics": "1",
+    "conversation_structure": "2",
+    "consolidated": "2",
+    "batch": "2",
+}
+
+
+def prompt_version_for(mode: str) -> str:
+    """Version string covering every prompt the given mode sends."""
+    if mode in ("consolidated", "batch"):
+        return f"{mode}:{PROMPT_VERSIONS[mode]}"
+    sections = ("sentiment_and_intent", "semantic_and_discourse", "emotional_metrics", "conversation_structure")
+    return "multi:" + ".".join(PROMPT_VERSIONS[section] for section in sections)
+
+
+def section_prompt_versions(mode: str, sections: Iterable[str]) -> Dict[str, str]:
+    """
+    "<prompt>:<version>" of the prompt that produces each section in the given
+    mode, as stored in UnstructuredAnalysis.prompt_versions.
+    """
+    if mode in ("consolidated", "batch"):
+        return {name: f"{mode}:{PROMPT_VERSIONS[mode]}" for name in sections}
+    return {name: f"{name}:{PROMPT_VERSIONS[name]}" for name in sections}
+
+# Output tokens reserved against the TPM budget before the real count is known
+EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "1000"))
+
+# Retries of a single failed prompt within one analysis, with exponential backoff
+SECTION_MAX_RETRIES = int(os.getenv("LLM_SECTION_MAX_RETRIES", "2"))
+SECTION_RETRY_BASE_SECONDS = float(os.getenv("LLM_SECTION_RETRY_BASE_SECONDS", "1"))
+SECTION_RETRY_MAX_SECONDS = float(os.getenv("LLM_SECTION_RETRY_MAX_SECONDS", "8"))
+# Provider errors that a retry cannot fix
+_PERMANENT_STATUS_CODES = {400, 401, 403, 404}
+
+# Values of UnstructuredAnalysis.section_status
+SECTION_COMPLETED = "completed"
+SECTION_FAILED = "failed"
+# Not sent to the LLM because the call scored below the triage threshold
+SECTION_SKIPPED = "skipped"
+# Filled by the offline heuristics because the LLM failed; retried like a failed section
+SECTION_OFFLINE = "offline"
+
+# model_name of analyses without any LLM section (see app/services/call_triage.py)
+LOCAL_ONLY_MODEL_NAME = "local-only"
+# model_name of analyses whose every section was filled offline (see app/services/offline_analyzer.py)
+OFFLINE_MODEL_NAME = "offline-heuristic"
+
+
+class PartialAnalysisError(Exception):
+    """
+    Some analysis sections failed after retries.
+    `sections` holds the ones that completed, `errors` maps section name -> exception.
+    """
+
+    def __init__(self, sections: Dict[str, dict], errors: Dict[str, Exception]):
+        failed = ", ".join(f"{name} ({error})" for name, error in errors.items())
+        super().__init__(f"{len(errors)} analysis section(s) failed: {failed}")
+        self.sections = sections
+        self.errors = errors
 
 
 def parse_json_response(text: str) -> dict:
-    """Clean and parse JSON response from Gemini."""
-    text = text.strip()
-    
-    # 🧹 Clean Markdown formatting if model adds code fences
-    if text.startswith("```"):
-        text = text.strip("`")
-        text = text.replace("json", "").strip()
-    
-    # 🧩 Parse safely
+    """Parse a JSON reply from the LLM, repairing common formatting problems locally."""
+    return loads_llm_json(text)
+
+
+# Per-task list of LLM call records, see track_llm_calls()
+_llm_calls: ContextVar[Optional[List[dict]]] = ContextVar("llm_calls", default=None)
+# Retry attempt of the prompt currently running, set by with_retries()
+_attempt: ContextVar[int] = ContextVar("llm_attempt", default=0)
+
+
+@contextmanager
+def track_llm_calls():
+    """
+    Collect a record for every LLM call made inside the block
+    (including calls made by tasks spawned from it).
+
+    Yields a list of {prompt, model, input_tokens, output_tokens, latency,
+    attempt, outcome}; failed attempts are included.
+    """
+    calls: List[dict] = []
+    token = _llm_calls.set(calls)
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        logger.error(f"❌ Invalid JSON from model: {text[:300]}")
-        raise ValueError(f"Invalid JSON from model output: {text[:300]}")
+        yield calls
+    finally:
+        _llm_calls.reset(token)
+
+
+def _record_llm_call(record: dict):
+    """Feed one call record to the process-wide metrics and the current tracker."""
+    llm_metrics.record(record)
+    calls = _llm_calls.get()
+    if calls is not None:
+        calls.append(record)
+
+
+async def generate_json(
+    prompt: str, name: str, schema: type, constrained: bool = False, expected_output_tokens: Optional[int] = None
+) -> dict:
+    """
+    Send a prompt to the LLM backend, then parse the JSON reply and validate
+    it against `schema` (see app/services/llm_json.py).
+
+    The backend's async client never blocks the event loop.
+    Every call is admitted by the process-wide llm_scheduler (RPM/TPM quota
+    and adaptive in-flight limit) and recorded in llm_metrics, whatever its outcome.
+    `schema` describes the expected reply; with `constrained=True` the backend
+    is forced to emit JSON matching it. `expected_output_tokens` overrides the
+    TPM reservation for replies much larger than usual (batches).
+    """
+    backend = get_llm_backend()
+    record = {
+        "prompt": name,
+        "model": backend.model_name,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "latency": 0.0,
+        # Wall-clock start, so the latency of concurrent calls is not double-counted (see summarize_llm_calls)
+        "started_at": time.time(),
+        "attempt": _attempt.get(),
+        "outcome": OUTCOME_OK,
+    }
+    reserved_tokens = estimate_tokens(prompt) + (expected_output_tokens or EXPECTED_OUTPUT_TOKENS)
+    started = time.perf_counter()
+    try:
+        async with llm_scheduler.slot(reserved_tokens) as permit:
+            started = time.perf_counter()
+            record["started_at"] = time.time()
+            response = await backend.generate(prompt, schema, constrained=constrained)
+            record["latency"] = time.perf_counter() - started
+            record["input_tokens"] = response.input_tokens
+            record["output_tokens"] = response.output_tokens
+            permit.record_tokens(response.input_tokens + response.output_tokens)
+    except Exception as e:
+        record["latency"] = time.perf_counter() - started
+        record["outcome"] = OUTCOME_THROTTLED if is_throttle_error(e) else OUTCOME_ERROR
+        _record_llm_call(record)
+        raise
+
+    try:
+        return parse_llm_json(response.text, schema)
+    except Exception:
+        record["outcome"] = OUTCOME_INVALID_JSON
+        raise
+    finally:
+        _record_llm_call(record)
 
 
 async def analyze_sentiment_and_intent(transcript: str) -> dict:
@@ -65,8 +224,7 @@ async def analyze_sentiment_and_intent(transcript: str) -> dict:
     {transcript}
     """
     
-    response = model.generate_content(prompt)
-    return parse_json_response(response.text)
+    return await generate_json(prompt, "sentiment_and_intent", SECTION_SCHEMAS["sentiment_and_intent"])
 
 
 async def analyze_semantic_and_discourse(transcript: str) -> dict:
@@ -97,8 +255,7 @@ async def analyze_semantic_and_discourse(transcript: str) -> dict:
     {transcript}
     """
     
-    response = model.generate_content(prompt)
-    return parse_json_response(response.text)
+    return await generate_json(prompt, "semantic_and_discourse", SECTION_SCHEMAS["semantic_and_discourse"])
 
 
 async def analyze_emotional_metrics(transcript: str) -> dict:
@@ -131,14 +288,14 @@ async def analyze_emotional_metrics(transcript: str) -> dict:
     {transcript}
     """
     
-    response = model.generate_content(prompt)
-    return parse_json_response(response.text)
+    return await generate_json(prompt, "emotional_metrics", SECTION_SCHEMAS["emotional_metrics"])
 
 
 async def analyze_conversation_structure(transcript: str) -> dict:
     """
     Call 4: Analyze conversation flow and structure (LLM-only aspects).
-    Note: talk_ratio, dominance_score, interruptions, conversation_phases are calculated separately without LLM.
+    Note: talk_ratio, dominance_score, interruptions, response_latency, talk_time and
+    conversation_phases are calculated separately without LLM.
     """
     prompt = f"""
     You are an AI analyzing loan sales call transcripts.
@@ -149,7 +306,6 @@ async def analyze_conversation_structure(transcript: str) -> dict:
       "next_actions": "Recommended next steps",
       "followup_priority": "Low/Medium/High",
       "cooperation_index": 0.0-1.0,
-      "response_latency": 0.0,
       "confidence": 0.0-1.0
     }}
     
@@ -162,53 +318,288 @@ async def analyze_conversation_structure(transcript: str) -> dict:
     {transcript}
     """
     
-    response = model.generate_content(prompt)
-    return parse_json_response(response.text)
+    return await generate_json(prompt, "conversation_structure", SECTION_SCHEMAS["conversation_structure"])
 
 
-async def analyze_transcription_gemini(call_id: int, transcript: str, db: AsyncSession):
+async def analyze_consolidated(transcript: str) -> dict:
     """
-    Analyze a call transcription using a hybrid approach:
-    - Non-LLM metrics calculated locally (keywords, talk ratio, etc.)
-    - LLM calls for complex analysis (sentiment, intent, emotions)
+    Single call: extract every LLM-owned field at once.
+    Output is constrained by a response schema generated from TranscriptionAnalysisSchema.
+    """
+    prompt = f"""
+    You are an AI analyzing loan sales call transcripts.
+    Analyze the sentiment and intent, semantic content and discourse,
+    emotional and psychological aspects, and conversation structure of the call.
     
-    This reduces LLM API calls and costs while maintaining accuracy.
+    Rules:
+    - Fill every field of the response schema; use null if unsure.
+    - Scores are 0-10, conversion_probability is 0-100, cooperation_index and confidence are 0.0-1.0.
+    - Emotion scores are 0.0-1.0.
+    - Identify key topics and themes and note significant moments in the conversation.
+    - Be concise, accurate and objective.
+    
+    TRANSCRIPT:
+    {transcript}
     """
-    logger.info(f"🚀 Starting hybrid analysis for call_id={call_id}")
     
-    # ⚡ Step 1: Calculate non-LLM metrics locally (fast, free)
-    logger.info("📊 Calculating non-LLM metrics...")
-    non_llm_metrics = calculate_transcript_metrics(transcript)
+    return await generate_json(prompt, "consolidated", TranscriptionAnalysisSchema, constrained=True)
+
+
+async def summarize_summaries(summaries: List[str]) -> str:
+    """
+    Combine per-chunk summaries of a long call into one 2-3 sentence summary.
+    """
+    parts = "\n".join(f"Part {i}: {summary}" for i, summary in enumerate(summaries, 1))
+    prompt = f"""
+    You are an AI analyzing loan sales call transcripts.
+    The call was too long to analyze at once; below are summaries of its consecutive parts.
     
-    # 🤖 Step 2: Execute LLM analysis calls in parallel (only what needs AI)
-    try:
-        results = await asyncio.gather(
-            analyze_sentiment_and_intent(transcript),
-            analyze_semantic_and_discourse(transcript),
-            analyze_emotional_metrics(transcript),
-            analyze_conversation_structure(transcript),
-            return_exceptions=True
-        )
-        
-        # Check for exceptions
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"❌ Analysis call {i+1} failed: {str(result)}")
-                raise result
-        
-        # Unpack results
-        sentiment_data, semantic_data, emotional_data, structure_data = results
-        
-        logger.info("✅ All 4 Gemini calls completed successfully")
-        
-    except Exception as e:
-        logger.error(f"❌ Multi-call analysis failed: {str(e)}")
-        raise
+    Return JSON with these fields:
+    {{
+      "summary_ai": "Brief 2-3 sentence summary of the whole call"
+    }}
+    
+    Rules:
+    - Return pure JSON — no markdown or ```json``` wrappers.
     
-    # 🔗 Step 3: Combine LLM results with non-LLM metrics
-    analysis = UnstructuredAnalysis(
+    PART SUMMARIES:
+    {parts}
+    """
+    
+    data = await generate_json(prompt, "summary_of_summaries", SummarySchema)
+    return data.get("summary_ai")
+
+
+# Section name -> prompt used by the four-prompt mode
+SECTION_ANALYZERS = {
+    "sentiment_and_intent": analyze_sentiment_and_intent,
+    "semantic_and_discourse": analyze_semantic_and_discourse,
+    "emotional_metrics": analyze_emotional_metrics,
+    "conversation_structure": analyze_conversation_structure,
+}
+
+
+async def with_retries(call, name: str):
+    """
+    Await `call()`, retrying failures up to SECTION_MAX_RETRIES times with
+    jittered exponential backoff (capped at SECTION_RETRY_MAX_SECONDS).
+    Client errors such as 400/403 are raised immediately.
+    Each attempt's LLM call records carry its attempt number.
+    """
+    for attempt in range(SECTION_MAX_RETRIES + 1):
+        token = _attempt.set(attempt)
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == SECTION_MAX_RETRIES or error_status_code(e) in _PERMANENT_STATUS_CODES:
+                raise
+            delay = min(SECTION_RETRY_MAX_SECONDS, SECTION_RETRY_BASE_SECONDS * 2 ** attempt)
+            delay *= random.uniform(0.5, 1.0)
+            logger.warning(f"🔁 {name} failed ({str(e)}), retry {attempt + 1}/{SECTION_MAX_RETRIES} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        finally:
+            _attempt.reset(token)
+
+
+async def run_llm_analysis(
+    transcript: str, mode: str = ANALYSIS_MODE, sections: Optional[Iterable[str]] = None
+) -> Dict[str, dict]:
+    """
+    Run the LLM part of the analysis in the given mode.
+    
+    Long transcripts are split on speaker turns, the chunks are analyzed in
+    parallel and their outputs merged (map-reduce).
+    
+    Args:
+        transcript: The call transcript text
+        mode: "multi" or "consolidated"
+        sections: Only run these sections (default: all). A subset always uses
+            the per-section prompts, even in consolidated mode.
+    
+    Returns:
+        Dict of section name -> extracted fields, identical in shape for both modes
+    
+    Raises:
+        PartialAnalysisError: some sections failed; the completed ones are attached
+        The underlying error when every requested section failed
+    """
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unknown analysis mode: {mode}")
+    wanted = list(sections or SECTION_SCHEMAS)
+    if len(wanted) < len(SECTION_SCHEMAS):
+        mode = "multi"
+    
+    chunks = chunk_transcript(transcript)
+    if len(chunks) == 1:
+        results, errors = await _analyze_sections(transcript, mode, wanted)
+    else:
+        results, errors = await _analyze_chunks(chunks, mode, wanted)
+    
+    if errors:
+        for name, error in errors.items():
+            logger.error(f"❌ Section {name} failed: {str(error)}")
+        if not results:
+            raise next(iter(errors.values()))
+        raise PartialAnalysisError(results, errors)
+    return results
+
+
+async def _analyze_chunks(
+    chunks: List[str], mode: str, wanted: List[str]
+) -> Tuple[Dict[str, dict], Dict[str, Exception]]:
+    """Map-reduce over chunks; a section only counts as completed if it completed in every chunk."""
+    # 🗺️ Map: analyze every chunk concurrently
+    logger.info(f"🗺️ Analyzing {len(chunks)} transcript chunks in parallel")
+    outcomes = await asyncio.gather(*(_analyze_sections(chunk, mode, wanted) for chunk in chunks))
+    chunk_results = [results for results, _ in outcomes]
+    
+    errors: Dict[str, Exception] = {}
+    for _, chunk_errors in outcomes:
+        for name, error in chunk_errors.items():
+            errors.setdefault(name, error)
+    
+    # 🧮 Reduce: deterministic merge, then a summary of the chunk summaries
+    merged = merge_chunk_sections(chunk_results, [estimate_tokens(chunk) for chunk in chunks])
+    results = {name: merged[name] for name in wanted if name not in errors}
+    
+    if "sentiment_and_intent" in results:
+        summaries = [r["sentiment_and_intent"].get("summary_ai") for r in chunk_results]
+        summaries = [summary for summary in summaries if summary]
+        if summaries:
+            try:
+                results["sentiment_and_intent"]["summary_ai"] = await summarize_summaries(summaries)
+            except Exception as e:
+                # Keep the concatenated chunk summaries from the merge
+                logger.warning(f"⚠️ Summary of summaries failed, keeping chunk summaries: {str(e)}")
+    return results, errors
+
+
+async def _analyze_sections(
+    transcript: str, mode: str, wanted: List[str]
+) -> Tuple[Dict[str, dict], Dict[str, Exception]]:
+    """
+    Analyze one transcript (or chunk) without further splitting.
+    Returns (completed sections, section name -> error for the ones that failed).
+    """
+    if mode == "consolidated":
+        try:
+            data = await with_retries(lambda: analyze_consolidated(transcript), "consolidated")
+            return split_sections(data), {}
+        except Exception as e:
+            return {}, {name: e for name in wanted}
+    
+    outcomes = await asyncio.gather(
+        *(with_retries(lambda name=name: SECTION_ANALYZERS[name](transcript), name) for name in wanted),
+        return_exceptions=True
+    )
+    
+    results, errors = {}, {}
+    for name, outcome in zip(wanted, outcomes):
+        if isinstance(outcome, Exception):
+            errors[name] = outcome
+        elif isinstance(outcome, BaseException):
+            raise outcome  # cancellation
+        else:
+            results[name] = outcome
+    return results, errors
+
+
+def failed_sections(analysis: UnstructuredAnalysis) -> List[str]:
+    """
+    Sections of a stored analysis that still need an LLM run, including the
+    ones filled offline (rows without a status are complete).
+    """
+    if analysis.section_status is None:
+        return []
+    return [
+        name for name in SECTION_SCHEMAS
+        if analysis.section_status.get(name) not in (SECTION_COMPLETED, SECTION_SKIPPED)
+    ]
+
+
+def offline_sections(analysis: UnstructuredAnalysis) -> List[str]:
+    """Sections filled by the offline heuristics until the LLM is available again."""
+    if analysis.section_status is None:
+        return []
+    return [name for name in SECTION_SCHEMAS if analysis.section_status.get(name) == SECTION_OFFLINE]
+
+
+def skipped_sections(analysis: UnstructuredAnalysis) -> List[str]:
+    """Sections left out by triage; run on demand with upgrade_local_only()."""
+    if analysis.section_status is None:
+        return []
+    return [name for name in SECTION_SCHEMAS if analysis.section_status.get(name) == SECTION_SKIPPED]
+
+
+def is_complete(analysis: UnstructuredAnalysis) -> bool:
+    """True if every LLM section of a stored analysis has completed."""
+    return not failed_sections(analysis) and not skipped_sections(analysis)
+
+
+def recorded_prompt_versions(analysis: UnstructuredAnalysis) -> Dict[str, str]:
+    """Prompt version each section of a stored analysis was produced with."""
+    if analysis.prompt_versions is not None:
+        return analysis.prompt_versions
+    # Rows saved before versions were recorded all came from the first version of every prompt
+    model_name = analysis.model_name or ""
+    mode = next((m for m in ("consolidated", "batch") if model_name.endswith(f"-{m}")), "multi")
+    return {name: f"{name if mode == 'multi' else mode}:1" for name in SECTION_SCHEMAS}
+
+
+def stale_sections(analysis: UnstructuredAnalysis) -> List[str]:
+    """Completed sections whose prompt has changed since they were produced."""
+    recorded = recorded_prompt_versions(analysis)
+    not_run = set(failed_sections(analysis)) | set(skipped_sections(analysis))
+    stale = []
+    for name in SECTION_SCHEMAS:
+        prompt, _, version = recorded.get(name, "").partition(":")
+        if name not in not_run and PROMPT_VERSIONS.get(prompt) != version:
+            stale.append(name)
+    return stale
+
+
+def sections_from_analysis(analysis: UnstructuredAnalysis) -> Dict[str, dict]:
+    """The LLM-owned fields of a stored analysis, grouped by section."""
+    return {
+        section: {field: getattr(analysis, field) for field in schema.model_fields}
+        for section, schema in SECTION_SCHEMAS.items()
+    }
+
+
+async def find_reusable_analysis(
+    db: AsyncSession, fingerprint: Optional[Fingerprint], call_id: Optional[int] = None
+) -> Optional[Tuple[UnstructuredAnalysis, float]]:
+    """Complete analysis of a near-identical transcript (see compute_fingerprint), with its similarity, or None."""
+    match = await find_near_duplicate(db, fingerprint, exclude_call_id=call_id)
+    if match is None:
+        return None
+    source = await db.get(UnstructuredAnalysis, match[0])
+    if source is None or not is_complete(source):
+        return None
+    return source, match[1]
+
+
+def build_analysis(
+    call_id: int, sections: Dict[str, dict], non_llm_metrics: dict, model_name: str,
+    prompt_versions: Optional[Dict[str, str]] = None,
+) -> UnstructuredAnalysis:
+    """
+    Combine LLM sections with locally calculated metrics into an (unsaved) row.
+    Sections missing from `sections` are marked as failed in `section_status`.
+    `prompt_versions` records the prompt behind each section (see section_prompt_versions()).
+    """
+    sentiment_data = sections.get("sentiment_and_intent", {})
+    semantic_data = sections.get("semantic_and_discourse", {})
+    emotional_data = sections.get("emotional_metrics", {})
+    structure_data = sections.get("conversation_structure", {})
+    
+    return UnstructuredAnalysis(
         call_id=call_id,
-        model_name="gemini-2.5-flash-hybrid",
+        model_name=model_name,
+        section_status={
+            name: SECTION_COMPLETED if name in sections else SECTION_FAILED for name in SECTION_SCHEMAS
+        },
+        prompt_versions=prompt_versions,
         
         # From sentiment_and_intent (LLM)
         sentiment=sentiment_data.get("sentiment"),
@@ -250,13 +641,238 @@ async def analyze_transcription_gemini(call_id: int, transcript: str, db: AsyncS
         dominance_score=non_llm_metrics.get("dominance_score"),  # ⚡ Non-LLM
         talk_ratio=non_llm_metrics.get("talk_ratio"),  # ⚡ Non-LLM
         interruptions=non_llm_metrics.get("interruptions"),  # ⚡ Non-LLM
-        response_latency=structure_data.get("response_latency"),  # 🤖 LLM
+        response_latency=non_llm_metrics.get("response_latency"),  # ⚡ Non-LLM
+        talk_time=non_llm_metrics.get("talk_time"),  # ⚡ Non-LLM
         confidence=structure_data.get("confidence"),  # 🤖 LLM
     )
 
+
+def build_local_only_analysis(call_id: int, non_llm_metrics: dict, triage_score: float) -> UnstructuredAnalysis:
+    """(Unsaved) row with the local metrics only; every LLM section is marked as skipped."""
+    analysis = build_analysis(call_id, {}, non_llm_metrics, LOCAL_ONLY_MODEL_NAME, {})
+    analysis.section_status = {name: SECTION_SKIPPED for name in SECTION_SCHEMAS}
+    analysis.triage_score = triage_score
+    return analysis
+
+
+async def fill_offline_sections(analysis: UnstructuredAnalysis, transcript: str, non_llm_metrics: dict):
+    """
+    Fill the failed sections of an (unsaved) analysis from the offline
+    heuristics and mark them offline. A row without any LLM section is
+    flagged with OFFLINE_MODEL_NAME.
+    """
+    missing = [name for name, status in analysis.section_status.items() if status == SECTION_FAILED]
+    if not missing:
+        return
+    # Pure-Python lexicon pass, kept off the event loop
+    sections = await asyncio.to_thread(analyze_offline, transcript, non_llm_metrics)
+    for name in missing:
+        for field, value in sections[name].items():
+            setattr(analysis, field, value)
+    analysis.section_status = {**analysis.section_status, **{name: SECTION_OFFLINE for name in missing}}
+    if len(missing) == len(SECTION_SCHEMAS):
+        analysis.model_name = OFFLINE_MODEL_NAME
+    logger.info(f"📴 Filled sections {missing} of call_id={analysis.call_id} offline")
+
+
+async def analyze_transcription_gemini(
+    call_id: int, transcript: str, db: AsyncSession, mode: Optional[str] = None, use_cache: bool = True,
+    force_llm: bool = False,
+):
+    """
+    Analyze a call transcription using a hybrid approach:
+    - Non-LLM metrics calculated locally (keywords, talk ratio, etc.)
+    - LLM calls for complex analysis (sentiment, intent, emotions)
+    
+    This reduces LLM API calls and costs while maintaining accuracy.
+    `mode` selects "multi" (four prompts) or "consolidated" (one prompt);
+    defaults to GEMINI_ANALYSIS_MODE. Identical transcripts are served from
+    the analysis cache and near-identical ones copy the LLM fields of an
+    existing analysis (marked by `derived_from_id`), unless `use_cache` is False.
+    
+    If some sections fail after retries the row is still saved, with the failed
+    ones marked in `section_status`; see retry_failed_sections(). With the
+    offline fallback enabled (the default) they are filled from local
+    heuristics instead, and a row without any LLM section is saved as
+    OFFLINE_MODEL_NAME; the LLM is skipped altogether while it is unavailable
+    (see app/services/offline_analyzer.py).
+    
+    With triage enabled, calls scoring below TRIAGE_THRESHOLD are saved as a
+    local-only analysis instead (see upgrade_local_only()); `force_llm` skips triage.
+    """
+    mode = mode or ANALYSIS_MODE
+    llm_calls: List[dict] = []
+    logger.info(f"🚀 Starting hybrid analysis for call_id={call_id} (mode={mode})")
+    
+    # ⚡ Step 1: Calculate non-LLM metrics locally (free; in a worker process, off the event loop)
+    logger.info("📊 Calculating non-LLM metrics...")
+    non_llm_metrics = await metrics_pool.calculate(transcript, call_id)
+    
+    # 🩺 Low-value calls keep the local metrics only
+    triage_score = None
+    if TRIAGE_ENABLED and not force_llm:
+        use_llm, triage_score = await triage_call(db, call_id, non_llm_metrics)
+        if not use_llm:
+            analysis = build_local_only_analysis(call_id, non_llm_metrics, triage_score)
+            db.add(analysis)
+            await db.commit()
+            await db.refresh(analysis)
+            logger.info(
+                f"🪫 Saved local-only analysis for call_id={call_id} "
+                f"(triage score {triage_score} < {TRIAGE_THRESHOLD})"
+            )
+            return analysis
+    
+    # 💾 Step 2: Reuse a cached LLM result for an identical transcript
+    prompt_version = prompt_version_for(mode)
+    model_name = get_llm_backend().model_name
+    cache_key = analysis_cache_key(transcript, prompt_version, model_name)
+    sections = await get_cached_sections(db, cache_key) if use_cache else None
+    
+    # 🧬 Reuse the analysis of a near-identical (templated) transcript
+    # The fingerprint is computed at most once: it serves the lookup and the index write
+    derived, fingerprint = None, None
+    if sections is None and use_cache:
+        fingerprint = await compute_fingerprint(transcript)
+        derived = await find_reusable_analysis(db, fingerprint, call_id)
+        if derived is not None:
+            sections = sections_from_analysis(derived[0])
+    
+    # 🤖 Step 3: Execute LLM analysis (only what needs AI)
+    if derived is not None:
+        logger.info(
+            f"🧬 Near-duplicate of analysis {derived[0].id} (similarity {derived[1]:.2f}) "
+            f"for call_id={call_id} - skipping Gemini"
+        )
+    elif sections is not None:
+        logger.info(f"💾 Analysis cache hit for call_id={call_id} - skipping Gemini")
+    elif not llm_available():
+        logger.info(f"📴 LLM unavailable - analyzing call_id={call_id} offline")
+        sections = {}
+    else:
+        with track_llm_calls() as llm_calls:
+            try:
+                sections = await run_llm_analysis(transcript, mode)
+                logger.info(f"✅ Gemini analysis completed successfully (mode={mode})")
+                await store_cached_sections(db, cache_key, sections, model_name, prompt_version)
+            except PartialAnalysisError as e:
+                # Keep the sections we already paid for; the rest can be retried later
+                logger.warning(f"⚠️ Saving partial analysis for call_id={call_id}: {str(e)}")
+                sections = e.sections
+            except Exception as e:
+                logger.error(f"❌ LLM analysis failed: {str(e)}")
+                if not OFFLINE_FALLBACK_ENABLED:
+                    raise
+                mark_llm_unavailable(e)
+                sections = {}
+    
+    # 🔗 Step 4: Combine LLM results with non-LLM metrics
+    suffix = "hybrid" if mode == "multi" else "consolidated"
+    analysis = build_analysis(
+        call_id, sections, non_llm_metrics, f"{model_name}-{suffix}", section_prompt_versions(mode, sections)
+    )
+    if derived is not None:
+        analysis.model_name = derived[0].model_name
+        analysis.prompt_versions = recorded_prompt_versions(derived[0])
+        analysis.derived_from_id = derived[0].id
+        analysis.derived_similarity = round(derived[1], 3)
+    if OFFLINE_FALLBACK_ENABLED:
+        await fill_offline_sections(analysis, transcript, non_llm_metrics)
+    if llm_calls:
+        analysis.llm_call_stats = summarize_llm_calls(llm_calls)
+    analysis.triage_score = triage_score
+
     db.add(analysis)
+    await db.flush()
+    if is_complete(analysis):
+        # Future near-duplicates reuse the original analysis, never a copy
+        if fingerprint is None:
+            fingerprint = await compute_fingerprint(transcript)
+        await index_transcript(db, call_id, fingerprint, analysis.derived_from_id or analysis.id)
     await db.commit()
     await db.refresh(analysis)
 
     logger.info(f"✅ Saved hybrid analysis for call_id={call_id} (LLM + non-LLM metrics)")
     return analysis
+
+
+def apply_sections(analysis: UnstructuredAnalysis, sections: Dict[str, dict], llm_calls: List[dict]):
+    """
+    Write freshly analyzed sections (always produced by the per-section
+    prompts) into a stored row, with their status, prompt versions and the
+    LLM calls they took. Sections not in `sections` keep their previous data.
+    """
+    for name, data in sections.items():
+        for field in SECTION_SCHEMAS[name].model_fields:
+            setattr(analysis, field, data.get(field))
+    analysis.section_status = {
+        **(analysis.section_status or {}),
+        **{name: SECTION_COMPLETED for name in sections},
+    }
+    analysis.prompt_versions = {
+        **recorded_prompt_versions(analysis),
+        **section_prompt_versions("multi", sections),
+    }
+    if sections and analysis.model_name in (LOCAL_ONLY_MODEL_NAME, OFFLINE_MODEL_NAME):
+        # An upgraded local-only or offline row becomes a regular analysis; skipped sections still missing are failed
+        analysis.model_name = f"{get_llm_backend().model_name}-hybrid"
+        analysis.section_status = {
+            name: SECTION_FAILED if status == SECTION_SKIPPED else status
+            for name, status in analysis.section_status.items()
+        }
+    if llm_calls:
+        # Added to the calls of the original analysis, which keep their batch attribution
+        previous = (analysis.llm_call_stats or {}).get("calls", [])
+        analysis.llm_call_stats = summarize_llm_calls(previous + llm_calls)
+
+
+async def reanalyze_sections(
+    analysis: UnstructuredAnalysis, transcript: str, db: AsyncSession, sections: List[str]
+) -> UnstructuredAnalysis:
+    """
+    Re-run the given sections of a stored analysis with the current prompts
+    and update the row in place.
+    
+    Sections that complete are saved even if others fail. Raises the
+    provider error only when none of the sections complete. While the LLM is
+    unavailable (see app/services/offline_analyzer.py) the row is left as it is.
+    """
+    if not sections:
+        return analysis
+    if not llm_available():
+        # Keep scoring at full speed during an outage; the sections are retried on a later run
+        logger.info(f"📴 LLM unavailable - leaving sections {sections} of call_id={analysis.call_id} for later")
+        return analysis
+    
+    logger.info(f"🔁 Re-running sections {sections} for call_id={analysis.call_id}")
+    with track_llm_calls() as llm_calls:
+        try:
+            results = await run_llm_analysis(transcript, "multi", sections)
+        except PartialAnalysisError as e:
+            logger.warning(f"⚠️ Sections still incomplete for call_id={analysis.call_id}: {str(e)}")
+            results = e.sections
+        except Exception as e:
+            mark_llm_unavailable(e)
+            raise
+    
+    apply_sections(analysis, results, llm_calls)
+    if is_complete(analysis):
+        await index_transcript(
+            db, analysis.call_id, await compute_fingerprint(transcript), analysis.derived_from_id or analysis.id
+        )
+    
+    await db.commit()
+    await db.refresh(analysis)
+    
+    logger.info(f"✅ Updated analysis {analysis.id} with sections {list(results)}")
+    return analysis
+
+
+async def retry_failed_sections(analysis: UnstructuredAnalysis, transcript: str, db: AsyncSession):
+    """Re-run only the sections of a stored analysis that failed or were filled offline; see reanalyze_sections()."""
+    return await reanalyze_sections(analysis, transcript, db, failed_sections(analysis))
+
+
+async def upgrade_local_only(analysis: UnstructuredAnalysis, transcript: str, db: AsyncSession):
+    """Run the LLM sections triage skipped, turning a local-only row into a regular analysis."""
+    return await reanalyze_sections(analysis, transcript, db, skipped_sections(analysis))
@@ -1,18 +1,259 @@
 # app/services/transcription_schema.py
-from typing import List
-from pydantic import BaseModel, Field
+import re
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field, field_serializer, field_validator, model_validator
 
 class Keyword(BaseModel):
     keyword: str = Field(..., description="Main keyword from the call")
     frequency: int = Field(..., description="Count of keyword occurrences")
     sentiment_context: str = Field(..., description="Positive / Negative / Neutral")
 
-class TranscriptionAnalysisSchema(BaseModel):
-    sentiment: str
-    tone: str
-    intent_strength: str
-    keywords: List[Keyword]
-    pain_points: str
-    next_actions: str
-    summary_ai: str
-    confidence: float
+
+def _choice(description: str, options: List[str]):
+    """Optional string field whose JSON schema lists the allowed values."""
+    return Field(None, description=description, json_schema_extra={"enum": options})
+
+
+def _score(description: str, low: float, high: float):
+    """Optional numeric field with its expected range recorded in the JSON schema."""
+    return Field(None, description=f"{description} {low}-{high}", json_schema_extra={"minimum": low, "maximum": high})
+
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def coerce_score(value: Any, low: float, high: float) -> Optional[float]:
+    """
+    Best-effort conversion of an LLM score onto the [low, high] scale.
+
+    Accepts numbers and strings like "85", "85%" or "7/10". A fraction given for
+    a 0-100 field is scaled up (0.85 -> 85). On a smaller scale, a value in
+    (1, 10] is read as a 0-10 score (7 -> 0.7 on 0-1) and a value in (10, 100]
+    as a percentage (85 -> 8.5 on 0-10). The result is clamped.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, str):
+        numbers = _NUMBER.findall(value)
+        if not numbers:
+            return None
+        if "/" in value and len(numbers) >= 2 and float(numbers[1]) > 0:
+            value = float(numbers[0]) / float(numbers[1]) * high
+        elif "%" in value:
+            value = float(numbers[0]) * high / 100
+        else:
+            value = float(numbers[0])
+    if not isinstance(value, (int, float)):
+        return None
+
+    value = float(value)
+    if high == 100 and 0 < value <= 1 and not value.is_integer():
+        value *= 100
+    elif high < value <= 10:
+        value = value * high / 10
+    elif max(high, 10) < value <= 100:
+        value = value * high / 100
+    return min(max(value, low), high)
+
+
+def _coerce_choice(value: Any, options: List[str]) -> Any:
+    """Map a categorical answer onto the canonical spelling of an allowed option."""
+    if not isinstance(value, str):
+        return value
+    wanted = value.strip().lower()
+    for option in options:
+        if option.lower() == wanted:
+            return option
+    return value.strip()
+
+
+class LLMOutput(BaseModel):
+    """
+    Base for models that validate LLM replies.
+
+    Loosely-typed answers are coerced before validation using the ranges and
+    options recorded by `_score` and `_choice`: numeric strings, fractions vs
+    percentages, wrong case, a bare string where a list is expected and so on.
+    A reply wrapped in a single object (`{"analysis": {...}}`) is unwrapped; a
+    reply with none of the model's fields is rejected instead of validating as
+    an all-empty section.
+    """
+
+    @model_validator(mode="before")
+    @classmethod
+    def _coerce_llm_values(cls, data: Any) -> Any:
+        if not isinstance(data, dict):
+            return data
+        if len(data) == 1 and not data.keys() & cls.model_fields.keys():
+            nested = next(iter(data.values()))
+            if isinstance(nested, dict):
+                data = nested
+        if not data.keys() & cls.model_fields.keys():
+            raise ValueError(f"Reply contains none of the {cls.__name__} fields")
+        data = dict(data)
+        for name, field in cls.model_fields.items():
+            if data.get(name) is None:
+                continue
+            value = data[name]
+            extra = field.json_schema_extra or {}
+            if "enum" in extra:
+                data[name] = _coerce_choice(value, extra["enum"])
+            elif "minimum" in extra:
+                data[name] = coerce_score(value, extra["minimum"], extra["maximum"])
+            elif field.annotation == Optional[List[str]]:
+                if isinstance(value, str):
+                    data[name] = [value]
+                elif isinstance(value, list):
+                    data[name] = [item if isinstance(item, str) else str(item) for item in value]
+            elif field.annotation == Optional[str] and isinstance(value, list):
+                data[name] = "; ".join(str(item) for item in value)
+        return data
+
+
+class EmotionScore(BaseModel):
+    emotion: str = Field(..., description="Emotion name, e.g. curiosity")
+    score: float = Field(..., description="Intensity 0.0-1.0", json_schema_extra={"minimum": 0.0, "maximum": 1.0})
+
+
+# ---------------------------------------------------------
+# LLM-owned fields of UnstructuredAnalysis, one model per prompt
+# ---------------------------------------------------------
+class SentimentIntentSchema(LLMOutput):
+    sentiment: Optional[str] = _choice("Overall sentiment", ["positive", "negative", "neutral"])
+    tone: Optional[str] = _choice("Tone of the call", ["professional", "casual", "aggressive", "friendly"])
+    intent_type: Optional[str] = _choice("Customer intent", ["inquiry", "application", "complaint", "followup"])
+    intent_strength: Optional[str] = _choice("Strength of intent", ["strong", "moderate", "weak"])
+    decision_stage: Optional[str] = _choice("Buyer journey stage", ["awareness", "consideration", "decision", "action"])
+    conversion_probability: Optional[float] = _score("Conversion probability", 0, 100)
+    summary_ai: Optional[str] = Field(None, description="Brief 2-3 sentence summary of the call")
+    outcome_classification: Optional[str] = _choice("Call outcome", ["Resolved", "Escalated", "Unresolved"])
+
+
+class SemanticDiscourseSchema(LLMOutput):
+    topics_discussed: Optional[List[str]] = Field(None, description="Key topics discussed")
+    speech_acts: Optional[List[str]] = Field(None, description="Speech acts, e.g. request, confirmation, offer, rejection")
+    discourse_relations: Optional[List[str]] = Field(None, description="e.g. Turn X elaborates on Turn Y")
+    framing_style: Optional[str] = _choice(
+        "Framing style", ["benefit emphasis", "urgency framing", "neutral", "problem-focused"]
+    )
+    themes: Optional[List[str]] = Field(None, description="Main themes of the call")
+    highlights: Optional[List[str]] = Field(None, description="e.g. Turn X: significant event")
+
+
+class EmotionalMetricsSchema(LLMOutput):
+    pain_points: Optional[str] = Field(None, description="Customer's main concerns or problems")
+    objections: Optional[str] = Field(None, description="Customer's objections or hesitations")
+    clarity_score: Optional[float] = _score("Clarity", 0, 10)
+    trust_score: Optional[float] = _score("Trust", 0, 10)
+    emotion_profile: Optional[List[EmotionScore]] = Field(None, description="Detected emotions with intensity")
+    dominant_emotion: Optional[str] = Field(None, description="Primary emotion detected")
+    empathy_score: Optional[float] = _score("Agent empathy", 0, 10)
+
+    @field_validator("emotion_profile", mode="before")
+    @classmethod
+    def _emotion_profile_from_dict(cls, value: Any) -> Any:
+        # Free-form prompts return {"emotion_name": score}; drop unusable scores
+        if isinstance(value, dict):
+            value = [{"emotion": emotion, "score": score} for emotion, score in value.items()]
+        if not isinstance(value, list):
+            return None
+        profile = []
+        for item in value:
+            if isinstance(item, dict) and isinstance(item.get("emotion"), str):
+                score = coerce_score(item.get("score"), 0.0, 1.0)
+                if score is not None:
+                    profile.append({"emotion": item["emotion"], "score": score})
+        return profile
+
+    @field_serializer("emotion_profile")
+    def _emotion_profile_as_dict(self, value: Optional[List[EmotionScore]]) -> Optional[Dict[str, float]]:
+        # Stored as {"emotion_name": score}; the list form only exists for the response schema
+        if value is None:
+            return None
+        return {item.emotion: item.score for item in value}
+
+
+class ConversationStructureSchema(LLMOutput):
+    next_actions: Optional[str] = Field(None, description="Recommended next steps")
+    followup_priority: Optional[str] = _choice("Follow-up priority", ["Low", "Medium", "High"])
+    cooperation_index: Optional[float] = _score("Customer cooperation", 0.0, 1.0)
+    confidence: Optional[float] = _score("Overall analysis certainty", 0.0, 1.0)
+
+
+class TranscriptionAnalysisSchema(
+    SentimentIntentSchema,
+    SemanticDiscourseSchema,
+    EmotionalMetricsSchema,
+    ConversationStructureSchema,
+):
+    """Every LLM-owned field, extracted in a single consolidated request."""
+
+
+class BatchItemSchema(TranscriptionAnalysisSchema):
+    item_id: Optional[str] = Field(None, description="ID of the call this entry describes, copied from its header")
+
+    @field_validator("item_id", mode="before")
+    @classmethod
+    def _item_id_as_str(cls, value: Any) -> Any:
+        return str(value).strip() if isinstance(value, (int, str)) else value
+
+
+class BatchAnalysisSchema(LLMOutput):
+    """Several transcripts analyzed in one request, one item per transcript."""
+    items: Optional[List[BatchItemSchema]] = Field(None, description="One entry per call, in input order")
+
+
+class SummarySchema(LLMOutput):
+    summary_ai: Optional[str] = Field(None, description="Brief 2-3 sentence summary of the whole call")
+
+
+# Section name -> schema, in the order the four-prompt mode runs them
+SECTION_SCHEMAS = {
+    "sentiment_and_intent": SentimentIntentSchema,
+    "semantic_and_discourse": SemanticDiscourseSchema,
+    "emotional_metrics": EmotionalMetricsSchema,
+    "conversation_structure": ConversationStructureSchema,
+}
+
+
+def split_sections(data: Dict[str, Any]) -> Dict[str, dict]:
+    """Split a validated consolidated result into the same per-section dicts the four prompts return."""
+    return {
+        section: {field: data[field] for field in schema.model_fields}
+        for section, schema in SECTION_SCHEMAS.items()
+    }
+
+
+# Keys of the Gemini Schema proto; anything else in a JSON schema is rejected
+_GEMINI_SCHEMA_KEYS = {"type", "format", "description", "nullable", "enum", "items", "properties", "required"}
+
+
+def to_gemini_schema(model: type) -> Dict[str, Any]:
+    """
+    Convert a pydantic model into a Gemini `response_schema`.
+
+    Inlines $refs, turns Optional[...] into `nullable`, marks every property
+    as required (values may still be null) and drops unsupported keywords.
+    """
+    root = model.model_json_schema()
+    defs = root.get("$defs", {})
+
+    def convert(node: Dict[str, Any]) -> Dict[str, Any]:
+        if "$ref" in node:
+            node = {**defs[node["$ref"].split("/")[-1]], **{k: v for k, v in node.items() if k != "$ref"}}
+        if "anyOf" in node:
+            branches = [b for b in node["anyOf"] if b.get("type") != "null"]
+            merged = {**convert(branches[0]), **{k: v for k, v in node.items() if k != "anyOf"}}
+            if len(branches) < len(node["anyOf"]):
+                merged["nullable"] = True
+            node = merged
+
+        schema = {k: v for k, v in node.items() if k in _GEMINI_SCHEMA_KEYS}
+        if "items" in schema:
+            schema["items"] = convert(schema["items"])
+        if "properties" in schema:
+            schema["properties"] = {name: convert(prop) for name, prop in schema["properties"].items()}
+            schema["required"] = list(schema["properties"])
+        return schema
+
+    return convert(root)
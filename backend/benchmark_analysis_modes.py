@@ -0,0 +1,162 @@
+"""
+Analysis Mode Benchmark Script
+
+Runs the same transcripts through both LLM analysis modes and reports
+latency, token usage and estimated cost per transcript:
+1. multi        - four focused Gemini prompts
+2. consolidated - one schema-constrained Gemini prompt
+
+Nothing is written to the database.
+
+Usage:
+    python benchmark_analysis_modes.py --limit 20
+    python benchmark_analysis_modes.py --files transcripts/*.txt
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy.future import select
+from app.core.database import AsyncSessionLocal
+from app.models.call_log import CallLog
+from app.services.llm_metrics import INPUT_PRICE_PER_M, OUTPUT_PRICE_PER_M
+from app.services.transcription_analyzer_langchain import (
+    ANALYSIS_MODES, run_llm_analysis, track_llm_calls
+)
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def load_transcripts(limit: int) -> list:
+    """Load up to `limit` transcripts from call_logs."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(CallLog.transcription)
+            .where(CallLog.transcription.isnot(None))
+            .order_by(CallLog.id)
+            .limit(limit)
+        )
+        return [row[0] for row in result.all()]
+
+
+async def run_mode(mode: str, transcripts: list) -> dict:
+    """
+    Analyze every transcript in the given mode, one at a time.
+
+    Returns:
+        dict: Per-transcript latencies, token counts and request counts
+    """
+    stats = {"latency": [], "input_tokens": [], "output_tokens": [], "requests": [], "failures": 0}
+
+    for idx, transcript in enumerate(transcripts, 1):
+        with track_llm_calls() as calls:
+            started = time.perf_counter()
+            try:
+                await run_llm_analysis(transcript, mode)
+            except Exception as e:
+                logger.error(f"  ❌ [{mode}] transcript {idx} failed: {str(e)}")
+                stats["failures"] += 1
+                continue
+            elapsed = time.perf_counter() - started
+
+        stats["latency"].append(elapsed)
+        stats["input_tokens"].append(sum(c["input_tokens"] for c in calls))
+        stats["output_tokens"].append(sum(c["output_tokens"] for c in calls))
+        stats["requests"].append(len(calls))
+        logger.info(f"  ✅ [{mode}] transcript {idx}/{len(transcripts)}: {elapsed:.2f}s")
+
+    return stats
+
+
+def summarize(mode: str, stats: dict, input_price: float, output_price: float) -> dict:
+    """Reduce raw per-transcript stats to averages and cost."""
+    if not stats["latency"]:
+        return {"mode": mode, "failures": stats["failures"]}
+
+    latencies = sorted(stats["latency"])
+    avg_in = statistics.mean(stats["input_tokens"])
+    avg_out = statistics.mean(stats["output_tokens"])
+    return {
+        "mode": mode,
+        "runs": len(latencies),
+        "failures": stats["failures"],
+        "requests": statistics.mean(stats["requests"]),
+        "p50_latency": statistics.median(latencies),
+        "p95_latency": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "input_tokens": avg_in,
+        "output_tokens": avg_out,
+        "cost": (avg_in * input_price + avg_out * output_price) / 1_000_000,
+    }
+
+
+def print_report(summaries: list):
+    """Print a side-by-side comparison of the modes."""
+    logger.info("\n" + "=" * 70)
+    logger.info("📊 ANALYSIS MODE BENCHMARK (averages per transcript)")
+    logger.info("=" * 70)
+    logger.info(f"  {'mode':<14}{'req':>6}{'p50 s':>9}{'p95 s':>9}{'in tok':>10}{'out tok':>10}{'cost $':>11}")
+    for s in summaries:
+        if "runs" not in s:
+            logger.info(f"  {s['mode']:<14} all {s['failures']} runs failed")
+            continue
+        logger.info(
+            f"  {s['mode']:<14}{s['requests']:>6.1f}{s['p50_latency']:>9.2f}{s['p95_latency']:>9.2f}"
+            f"{s['input_tokens']:>10.0f}{s['output_tokens']:>10.0f}{s['cost']:>11.6f}"
+        )
+
+    base, other = summaries[0], summaries[1]
+    if "runs" in base and "runs" in other:
+        logger.info("-" * 70)
+        logger.info(f"  {other['mode']} vs {base['mode']}:")
+        logger.info(f"  • p50 latency: {(other['p50_latency'] / base['p50_latency'] - 1) * 100:+.1f}%")
+        logger.info(f"  • input tokens: {(other['input_tokens'] / base['input_tokens'] - 1) * 100:+.1f}%")
+        logger.info(f"  • output tokens: {(other['output_tokens'] / base['output_tokens'] - 1) * 100:+.1f}%")
+        logger.info(f"  • cost: {(other['cost'] / base['cost'] - 1) * 100:+.1f}%")
+    logger.info("=" * 70)
+
+
+async def main(args):
+    if args.files:
+        transcripts = [Path(f).read_text() for f in args.files]
+    else:
+        transcripts = await load_transcripts(args.limit)
+
+    if not transcripts:
+        logger.warning("⚠️  No transcripts to benchmark")
+        return
+
+    logger.info(f"🚀 Benchmarking {len(transcripts)} transcript(s) in modes: {', '.join(ANALYSIS_MODES)}")
+
+    summaries = []
+    for mode in ANALYSIS_MODES:
+        stats = await run_mode(mode, transcripts)
+        summaries.append(summarize(mode, stats, args.input_price, args.output_price))
+
+    print_report(summaries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare multi vs consolidated LLM analysis")
+    parser.add_argument("--limit", type=int, default=10, help="Number of call_logs transcripts to use")
+    parser.add_argument("--files", nargs="*", help="Read transcripts from text files instead of the DB")
+    parser.add_argument("--input-price", type=float, default=INPUT_PRICE_PER_M, help="USD per 1M input tokens (default: LLM_INPUT_PRICE_PER_M)")
+    parser.add_argument("--output-price", type=float, default=OUTPUT_PRICE_PER_M, help="USD per 1M output tokens (default: LLM_OUTPUT_PRICE_PER_M)")
+
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        logger.info("\n\n⚠️  Benchmark interrupted by user")
+        sys.exit(0)
@@ -0,0 +1,321 @@
+"""
+Transcript Metrics Benchmark Script
+
+Times TranscriptMetricsCalculator against a frozen copy of its original
+implementation (one regex per lexicon phrase, one full rescan each) on
+synthetic transcripts of growing length, and checks that both produce
+identical metrics. Peak memory (tracemalloc) of a metric calculation is
+reported per transcript, and the memory held by the parsed turns of a whole
+batch (legacy dicts vs Turn objects).
+
+No network and no database are needed.
+
+Usage:
+    python benchmark_transcript_metrics.py
+    python benchmark_transcript_metrics.py --turns 100 1000 10000 --repeat 5
+    python benchmark_transcript_metrics.py --batch 1000 --batch-turns 200
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.transcript_metrics_calculator import TranscriptMetricsCalculator
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+AGENT_LINES = [
+    "Good morning, thanks for calling about the personal loan.",
+    "Our current rate is 7.5% for a 36 month term, however it depends on your credit.",
+    "Could you tell me a bit more about your monthly income?",
+    "I can send the approval documents by email today. Regarding the fees, there are none.",
+    "Would you mind confirming your address? Thank you.",
+    "Furthermore, you could qualify for a lower payment of $450 per month.",
+]
+CUSTOMER_LINES = [
+    "Hi, I wanted to ask about refinancing my car loan.",
+    "Maybe, but I'm not sure the payment fits my budget.",
+    "I think I could qualify, my credit is pretty good.",
+    "Honestly I'm kind of worried about the interest.",
+    "Thank you, please send it over.",
+    "Okay",
+]
+# Unlabeled continuation lines, as produced by some transcription exports
+CONTINUATION_LINES = [
+    "and I just wanted to check the terms again",
+    "sorry, could you repeat that",
+]
+
+
+class LegacyTranscriptMetricsCalculator:
+    """The original implementation, kept as the reference for results and timing."""
+
+    def __init__(self, transcript: str):
+        self.transcript = transcript.lower()
+        self.original_transcript = transcript
+        self.lines = self._parse_transcript()
+
+    def _parse_transcript(self):
+        lines = []
+        for line in self.original_transcript.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            speaker_match = re.match(r'^(Agent|Customer|Officer|Client|Caller):\s*(.+)', line, re.IGNORECASE)
+            if speaker_match:
+                speaker = speaker_match.group(1).lower()
+                text = speaker_match.group(2).strip()
+                lines.append({
+                    'speaker': 'agent' if speaker in ['agent', 'officer'] else 'customer',
+                    'text': text,
+                    'text_lower': text.lower()
+                })
+            elif lines:
+                lines[-1]['text'] += ' ' + line
+                lines[-1]['text_lower'] += ' ' + line.lower()
+            else:
+                lines.append({'speaker': 'unknown', 'text': line, 'text_lower': line.lower()})
+        return lines
+
+    def calculate_keywords(self, top_n=10):
+        # Speaker labels have since stopped counting as keywords; drop them so the outputs stay comparable
+        text = re.sub(
+            r'(?m)^([^\S\n]*(?:\[[^\]\n]*\][^\S\n]*)?)(?:agent|customer|officer|client|caller):(?=[^\S\n]*\S)',
+            r'\1', self.transcript,
+        )
+        words = re.findall(r'\b[a-z]{3,}\b', text)
+        filtered_words = [w for w in words if w not in TranscriptMetricsCalculator.STOP_WORDS]
+        return [
+            {'keyword': word, 'frequency': count, 'sentiment_context': None}
+            for word, count in Counter(filtered_words).most_common(top_n)
+        ]
+
+    def calculate_deception_markers(self):
+        markers = {}
+        for hedge in TranscriptMetricsCalculator.HEDGE_WORDS:
+            count = len(re.findall(r'\b' + re.escape(hedge) + r'\b', self.transcript))
+            if count > 0:
+                markers[hedge] = count
+        return markers
+
+    def calculate_talk_ratio(self):
+        agent_words = 0
+        customer_words = 0
+        for line in self.lines:
+            word_count = len(line['text'].split())
+            if line['speaker'] == 'agent':
+                agent_words += word_count
+            elif line['speaker'] == 'customer':
+                customer_words += word_count
+        total_words = agent_words + customer_words
+        if total_words == 0:
+            return {'agent': 0.5, 'customer': 0.5}
+        return {'agent': round(agent_words / total_words, 2), 'customer': round(customer_words / total_words, 2)}
+
+    def calculate_dominance_score(self):
+        talk_ratio = self.calculate_talk_ratio()
+        return {'agent': int(talk_ratio['agent'] * 100), 'customer': int(talk_ratio['customer'] * 100)}
+
+    def count_interruptions(self):
+        interruptions = 0
+        for i in range(len(self.lines) - 1):
+            if self.lines[i]['speaker'] != self.lines[i + 1]['speaker']:
+                word_count = len(self.lines[i]['text'].split())
+                if word_count < 5 and word_count > 0:
+                    interruptions += 1
+        return interruptions
+
+    def calculate_politeness_level(self):
+        polite_count = 0
+        for phrase in TranscriptMetricsCalculator.POLITE_PHRASES:
+            polite_count += len(re.findall(r'\b' + re.escape(phrase) + r'\b', self.transcript))
+        word_count = len(self.transcript.split())
+        if word_count == 0:
+            return 5.0
+        normalized = (polite_count / word_count) * 100
+        return round(min(3.0 + normalized * 2, 10.0), 1)
+
+    def calculate_formality_level(self):
+        formal_count = 0
+        for word in TranscriptMetricsCalculator.FORMAL_WORDS:
+            formal_count += len(re.findall(r'\b' + re.escape(word) + r'\b', self.transcript))
+        word_count = len(self.transcript.split())
+        if word_count == 0:
+            return 5.0
+        normalized = (formal_count / word_count) * 100
+        return round(min(2.0 + normalized * 3, 10.0), 1)
+
+    def extract_entity_mentions(self):
+        amounts = re.findall(r'\$[\d,]+(?:\.\d{2})?|\b\d+\s*(?:dollars|rupees|euros)\b',
+                             self.original_transcript, re.IGNORECASE)
+        dates = re.findall(r'\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b|\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2}(?:,\s+\d{4})?\b',
+                           self.original_transcript, re.IGNORECASE)
+        loan_types = re.findall(r'\b(personal loan|home loan|auto loan|mortgage|car loan|student loan|business loan)\b',
+                                self.transcript)
+        return {
+            'product': list(set(loan_types))[:5],
+            'date': list(set(dates))[:5],
+            'amount': list(set(amounts))[:5],
+        }
+
+    def detect_conversation_phases(self):
+        markers = TranscriptMetricsCalculator.PHASE_MARKERS
+        phases = []
+        if len(self.lines) > 0:
+            first_lines = ' '.join([line['text_lower'] for line in self.lines[:3]])
+            if any(marker in first_lines for marker in markers['greeting']):
+                phases.append('Greeting')
+        if len(re.findall(r'\?', self.original_transcript)) >= 2:
+            phases.append('Needs Assessment')
+        for line in self.lines:
+            if any(marker in line['text_lower'] for marker in markers['objection']):
+                if 'Objection Handling' not in phases:
+                    phases.append('Objection Handling')
+                break
+        if re.search(r'\b(rate|interest|term|payment|approval|qualify)\b', self.transcript):
+            phases.append('Solution Presentation')
+        if len(self.lines) > 0:
+            last_lines = ' '.join([line['text_lower'] for line in self.lines[-3:]])
+            if any(marker in last_lines for marker in markers['closing']):
+                phases.append('Closing')
+        return phases if phases else ['General Discussion']
+
+    def calculate_all_metrics(self):
+        return {
+            'keywords': self.calculate_keywords(top_n=10),
+            'deception_markers': self.calculate_deception_markers(),
+            'talk_ratio': self.calculate_talk_ratio(),
+            'dominance_score': self.calculate_dominance_score(),
+            'interruptions': self.count_interruptions(),
+            'politeness_level': self.calculate_politeness_level(),
+            'formality_level': self.calculate_formality_level(),
+            'entity_mentions': self.extract_entity_mentions(),
+            'conversation_phases': self.detect_conversation_phases(),
+        }
+
+
+def synthetic_transcript(turns: int, rng: random.Random) -> str:
+    """Alternating Agent/Customer transcript with occasional unlabeled continuation lines."""
+    lines = []
+    for i in range(turns):
+        if i % 2 == 0:
+            lines.append(f"Agent: {rng.choice(AGENT_LINES)}")
+        else:
+            lines.append(f"Customer: {rng.choice(CUSTOMER_LINES)}")
+        if rng.random() < 0.1:
+            lines.append(rng.choice(CONTINUATION_LINES))
+    return "\n".join(lines)
+
+
+def comparable(metrics: dict) -> dict:
+    """
+    Metrics with set-derived lists sorted, so both implementations compare equal.
+    Keyword sentiment is left out: the legacy implementation always returned None.
+    So are the timestamp metrics, which it did not calculate.
+    """
+    entities = {key: sorted(values) for key, values in metrics['entity_mentions'].items()}
+    keywords = [{**keyword, 'sentiment_context': None} for keyword in metrics['keywords']]
+    metrics = {key: value for key, value in metrics.items() if key not in ('response_latency', 'talk_time')}
+    return {**metrics, 'entity_mentions': entities, 'keywords': keywords}
+
+
+def best_time(calculator_class, transcript: str, repeat: int) -> float:
+    """Fastest of `repeat` full metric calculations, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        calculator_class(transcript).calculate_all_metrics()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def peak_memory(calculate) -> int:
+    """Peak bytes allocated while running `calculate()`."""
+    tracemalloc.start()
+    try:
+        calculate()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def retained_memory(parse, transcripts: list) -> int:
+    """Bytes still held by the parsed turns of every transcript once all are parsed."""
+    tracemalloc.start()
+    try:
+        parsed = [parse(transcript) for transcript in transcripts]
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    logger.info("=" * 70)
+    logger.info("📊 TRANSCRIPT METRICS BENCHMARK (best of %d runs)", args.repeat)
+    logger.info("=" * 70)
+    logger.info(
+        f"  {'turns':>8}{'words':>10}{'legacy ms':>12}{'current ms':>12}{'speedup':>10}"
+        f"{'legacy KB':>12}{'current KB':>12}  identical"
+    )
+
+    mismatches = 0
+    for turns in args.turns:
+        transcript = synthetic_transcript(turns, rng)
+        identical = (
+            comparable(LegacyTranscriptMetricsCalculator(transcript).calculate_all_metrics())
+            == comparable(TranscriptMetricsCalculator(transcript).calculate_all_metrics())
+        )
+        mismatches += not identical
+        legacy = best_time(LegacyTranscriptMetricsCalculator, transcript, args.repeat)
+        current = best_time(TranscriptMetricsCalculator, transcript, args.repeat)
+        legacy_peak = peak_memory(lambda: LegacyTranscriptMetricsCalculator(transcript).calculate_all_metrics())
+        current_peak = peak_memory(lambda: TranscriptMetricsCalculator(transcript).calculate_all_metrics())
+        logger.info(
+            f"  {turns:>8}{len(transcript.split()):>10}{legacy * 1000:>12.2f}{current * 1000:>12.2f}"
+            f"{legacy / current:>9.1f}x{legacy_peak / 1024:>12.0f}{current_peak / 1024:>12.0f}"
+            f"  {'✅' if identical else '❌'}"
+        )
+
+    if args.batch:
+        transcripts = [synthetic_transcript(args.batch_turns, rng) for _ in range(args.batch)]
+        size = sum(len(t) for t in transcripts)
+        legacy_held = retained_memory(lambda t: LegacyTranscriptMetricsCalculator(t).lines, transcripts)
+        current_held = retained_memory(lambda t: list(TranscriptMetricsCalculator.iter_turns(t)), transcripts)
+        logger.info("-" * 70)
+        logger.info(f"  📦 Parsed turns of {args.batch} x {args.batch_turns}-turn transcripts ({size / 1e6:.1f} MB of text):")
+        logger.info(
+            f"     legacy dicts {legacy_held / 1e6:.1f} MB, Turn objects {current_held / 1e6:.1f} MB "
+            f"({1 - current_held / legacy_held:.0%} less)"
+        )
+
+    logger.info("=" * 70)
+    if mismatches:
+        logger.error(f"❌ {mismatches} transcript(s) produced different metrics")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local transcript metrics")
+    parser.add_argument("--turns", type=int, nargs="+", default=[50, 500, 5000, 20000],
+                        help="Transcript lengths to test, in speaker turns")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per transcript; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for synthetic transcripts")
+    parser.add_argument("--batch", type=int, default=200, help="Transcripts in the batch memory test (0 to skip)")
+    parser.add_argument("--batch-turns", type=int, default=500, help="Turns per transcript in the batch memory test")
+    main(parser.parse_args())
@@ -0,0 +1,105 @@
+"""
+Near-Duplicate Index Backfill
+
+Adds every call that already has a complete, non-derived analysis to the
+MinHash/LSH near-duplicate index (transcript_signatures). New analyses are
+indexed automatically; run this once after enabling the feature, or with
+--rebuild after changing the shingling parameters.
+
+Works through call_logs in id order in chunks, so it can be stopped and
+re-run at any time.
+
+Usage:
+    python build_similarity_index.py
+    python build_similarity_index.py --chunk-size 2000 --rebuild
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import delete, func
+from sqlalchemy.future import select
+from app.core.database import AsyncSessionLocal
+from app.models.call_log import CallLog
+from app.models.unstructured_analysis import UnstructuredAnalysis
+from app.models.transcript_signature import TranscriptSignature
+from app.services.near_duplicate import compute_fingerprint, index_transcript
+from app.services.transcription_analyzer_langchain import is_complete
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def build_index(chunk_size: int, rebuild: bool):
+    """Index analyzed calls in chunks of `chunk_size`, keyed by call id."""
+    async with AsyncSessionLocal() as db:
+        if rebuild:
+            await db.execute(delete(TranscriptSignature))
+            await db.commit()
+            logger.info("🧹 Cleared the near-duplicate index")
+
+        # Latest original (non-derived) analysis per call
+        latest = (
+            select(func.max(UnstructuredAnalysis.id).label("analysis_id"), UnstructuredAnalysis.call_id)
+            .where(UnstructuredAnalysis.derived_from_id.is_(None))
+            .group_by(UnstructuredAnalysis.call_id)
+            .subquery()
+        )
+
+        last_call_id, indexed, skipped = 0, 0, 0
+        started = time.perf_counter()
+        while True:
+            result = await db.execute(
+                select(CallLog.id, CallLog.transcription, UnstructuredAnalysis)
+                .join(latest, latest.c.call_id == CallLog.id)
+                .join(UnstructuredAnalysis, UnstructuredAnalysis.id == latest.c.analysis_id)
+                .where(CallLog.transcription.isnot(None))
+                .where(CallLog.id > last_call_id)
+                .order_by(CallLog.id)
+                .limit(chunk_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            for call_id, transcription, analysis in rows:
+                if not is_complete(analysis):
+                    skipped += 1
+                    continue
+                await index_transcript(db, call_id, await compute_fingerprint(transcription), analysis.id)
+                indexed += 1
+            await db.commit()
+
+            last_call_id = rows[-1][0]
+            logger.info(
+                f"  📇 Indexed {indexed} calls so far (last call_id={last_call_id}, "
+                f"{indexed / (time.perf_counter() - started):.0f} calls/s)"
+            )
+
+        logger.info("=" * 70)
+        logger.info(f"  ✅ Indexed: {indexed}   ⏭️  Skipped (incomplete or local-only analysis): {skipped}")
+        logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the near-duplicate transcript index")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Calls loaded per query")
+    parser.add_argument("--rebuild", action="store_true", help="Clear the index before rebuilding it")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(build_index(args.chunk_size, args.rebuild))
+    except KeyboardInterrupt:
+        logger.info("\n\n⚠️  Process interrupted by user")
+        sys.exit(0)
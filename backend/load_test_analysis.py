@@ -0,0 +1,150 @@
+"""
+Offline Analysis Load Test
+
+Drives the analysis pipeline (local metrics + LLM sections) at a fixed
+concurrency against the fake LLM backend and reports throughput and latency.
+No network and no database are needed.
+
+Usage:
+    python load_test_analysis.py --transcripts 500 --concurrency 50
+    FAKE_LLM_LATENCY_MS=1200 FAKE_LLM_FAILURE_RATE=0.05 python load_test_analysis.py
+    python load_test_analysis.py --mode consolidated --turns 400
+    python load_test_analysis.py --batch --turns 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Default to the offline backend; export LLM_BACKEND=gemini to load test the real API
+os.environ.setdefault("LLM_BACKEND", "fake")
+# Models create the engine at import time; nothing here connects to it
+os.environ.setdefault("SUPABASE_DB_URL", "postgresql+asyncpg://localhost/unused")
+
+from app.services.transcript_metrics_calculator import calculate_transcript_metrics
+from app.services.transcription_analyzer_langchain import ANALYSIS_MODES, run_llm_analysis
+from app.services.llm_scheduler import llm_scheduler
+from app.services.batch_analyzer import pack_batches, run_batch
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+AGENT_LINES = [
+    "Good morning, thanks for calling about the personal loan.",
+    "Our current rate is 7.5% for a 36 month term.",
+    "Could you tell me a bit more about your monthly income?",
+    "I can send the approval documents by email today.",
+]
+CUSTOMER_LINES = [
+    "Hi, I wanted to ask about refinancing my car loan.",
+    "Maybe, but I'm not sure the payment fits my budget.",
+    "I think I could qualify, my credit is pretty good.",
+    "Thank you, please send it over.",
+]
+
+
+def synthetic_transcript(turns: int, rng: random.Random) -> str:
+    """Alternating Agent/Customer transcript of the given length."""
+    lines = []
+    for i in range(turns):
+        if i % 2 == 0:
+            lines.append(f"Agent: {rng.choice(AGENT_LINES)}")
+        else:
+            lines.append(f"Customer: {rng.choice(CUSTOMER_LINES)}")
+    return "\n".join(lines)
+
+
+async def analyze_one(transcript: str, mode: str) -> float:
+    """Run local metrics and LLM sections for one transcript; returns seconds taken."""
+    started = time.perf_counter()
+    calculate_transcript_metrics(transcript)
+    await run_llm_analysis(transcript, mode)
+    return time.perf_counter() - started
+
+
+async def analyze_batch(batch: list) -> tuple:
+    """Run local metrics and one batch request; returns (calls analyzed, seconds taken)."""
+    started = time.perf_counter()
+    for _, transcript in batch:
+        calculate_transcript_metrics(transcript)
+    results = await run_batch(batch)
+    return len(results), time.perf_counter() - started
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    transcripts = [synthetic_transcript(args.turns, rng) for _ in range(args.transcripts)]
+    queue = asyncio.Queue()
+    work = pack_batches(list(enumerate(transcripts))) if args.batch else transcripts
+    for item in work:
+        queue.put_nowait(item)
+
+    latencies, failures = [], 0
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            item = queue.get_nowait()
+            if args.batch:
+                # Latency is per request; every call in the batch shares it
+                completed, latency = await analyze_batch(item)
+                latencies.extend([latency] * completed)
+                failures += len(item) - completed
+                continue
+            try:
+                latencies.append(await analyze_one(item, args.mode))
+            except Exception as e:
+                failures += 1
+                logger.debug(f"Analysis failed: {e}")
+
+    logger.info(
+        f"🚀 Load test: {args.transcripts} transcripts x {args.turns} turns, "
+        f"concurrency={args.concurrency}, mode={'batch' if args.batch else args.mode}, "
+        f"backend={os.environ['LLM_BACKEND']}"
+    )
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    logger.info("=" * 70)
+    logger.info(f"  ✅ Completed: {len(latencies)}   ❌ Failed: {failures}")
+    logger.info(f"  ⏱️  Wall time: {elapsed:.2f}s")
+    logger.info(f"  📈 Throughput: {len(latencies) / elapsed * 60:.0f} transcripts/min")
+    if latencies:
+        ordered = sorted(latencies)
+        logger.info(
+            f"  🕒 Latency p50={statistics.median(ordered):.2f}s "
+            f"p95={ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]:.2f}s max={ordered[-1]:.2f}s"
+        )
+    logger.info(f"  🚦 Scheduler: {llm_scheduler.stats()}")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline throughput test of the analysis pipeline")
+    parser.add_argument("--transcripts", type=int, default=200, help="Number of transcripts to analyze")
+    parser.add_argument("--turns", type=int, default=40, help="Speaker turns per synthetic transcript")
+    parser.add_argument("--concurrency", type=int, default=20, help="Analyses running at once")
+    parser.add_argument("--mode", choices=ANALYSIS_MODES, default="multi", help="LLM analysis mode")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for synthetic transcripts")
+    parser.add_argument("--batch", action="store_true", help="Pack several transcripts into each LLM request")
+
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        logger.info("\n\n⚠️  Load test interrupted by user")
+        sys.exit(0)
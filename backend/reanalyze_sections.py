@@ -0,0 +1,169 @@
+"""
+Prompt Version Re-analysis Script
+
+After bumping a prompt in PROMPT_VERSIONS, re-runs only the sections whose
+recorded prompt version is out of date, on the latest analysis of every call.
+A change to one section prompt therefore costs one LLM call per analysis
+instead of a full backfill. Failed sections are left to analyze_all_leads.py.
+
+Works through call_logs in id order in chunks and saves its position in a
+checkpoint file after every chunk, so an interrupted run continues where it
+stopped. The checkpoint is discarded when PROMPT_VERSIONS change again.
+
+Usage:
+    python reanalyze_sections.py --dry-run
+    python reanalyze_sections.py --chunk-size 200 --concurrency 8
+    python reanalyze_sections.py --sections emotional_metrics --restart
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+from app.core.database import AsyncSessionLocal
+from app.models.call_log import CallLog
+from app.models.unstructured_analysis import UnstructuredAnalysis
+from app.services.near_duplicate import compute_fingerprint, index_transcript
+from app.services.transcription_schema import SECTION_SCHEMAS
+from app.services.transcription_analyzer_langchain import (
+    PROMPT_VERSIONS, PartialAnalysisError, apply_sections, is_complete, run_llm_analysis,
+    stale_sections, track_llm_calls
+)
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = Path(__file__).parent / ".reanalyze_sections.checkpoint.json"
+
+
+def load_checkpoint(restart: bool) -> int:
+    """Last call_id processed by an earlier run for the current prompt versions (0 if none)."""
+    if restart or not CHECKPOINT_FILE.exists():
+        return 0
+    checkpoint = json.loads(CHECKPOINT_FILE.read_text())
+    if checkpoint.get("prompt_versions") != PROMPT_VERSIONS:
+        logger.info("🔄 Prompt versions changed since the last run - starting from the beginning")
+        return 0
+    return checkpoint["last_call_id"]
+
+
+def save_checkpoint(last_call_id: int):
+    CHECKPOINT_FILE.write_text(json.dumps({"prompt_versions": PROMPT_VERSIONS, "last_call_id": last_call_id}))
+
+
+async def rerun(transcript: str, sections: list, semaphore: asyncio.Semaphore) -> tuple:
+    """LLM part for one analysis. Returns (completed sections, LLM call records)."""
+    async with semaphore:
+        with track_llm_calls() as calls:
+            try:
+                return await run_llm_analysis(transcript, "multi", sections), calls
+            except PartialAnalysisError as e:
+                return e.sections, calls
+            except Exception as e:
+                logger.error(f"  ❌ Re-analysis failed: {str(e)}")
+                return {}, calls
+
+
+async def reanalyze(chunk_size: int, concurrency: int, only: list, dry_run: bool, restart: bool):
+    """Re-run stale sections of the latest analysis per call, `chunk_size` calls at a time."""
+    last_call_id = load_checkpoint(restart)
+    if last_call_id:
+        logger.info(f"⏩ Resuming after call_id={last_call_id}")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncSessionLocal() as db:
+        # Latest analysis per call
+        latest = (
+            select(func.max(UnstructuredAnalysis.id).label("analysis_id"), UnstructuredAnalysis.call_id)
+            .group_by(UnstructuredAnalysis.call_id)
+            .subquery()
+        )
+
+        totals = {name: 0 for name in SECTION_SCHEMAS}
+        scanned, updated, failures = 0, 0, 0
+        started = time.perf_counter()
+        while True:
+            result = await db.execute(
+                select(CallLog.id, CallLog.transcription, UnstructuredAnalysis)
+                .join(latest, latest.c.call_id == CallLog.id)
+                .join(UnstructuredAnalysis, UnstructuredAnalysis.id == latest.c.analysis_id)
+                .where(CallLog.transcription.isnot(None))
+                .where(CallLog.id > last_call_id)
+                .order_by(CallLog.id)
+                .limit(chunk_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            scanned += len(rows)
+
+            work = []
+            for _, transcription, analysis in rows:
+                stale = [name for name in stale_sections(analysis) if not only or name in only]
+                if stale:
+                    work.append((transcription, analysis, stale))
+                    for name in stale:
+                        totals[name] += 1
+
+            if work and not dry_run:
+                outcomes = await asyncio.gather(
+                    *(rerun(transcription, stale, semaphore) for transcription, _, stale in work)
+                )
+                # Rows are updated sequentially: the session is not shared between tasks
+                for (transcription, analysis, stale), (sections, calls) in zip(work, outcomes):
+                    apply_sections(analysis, sections, calls)
+                    if len(sections) < len(stale):
+                        failures += 1
+                    if sections:
+                        updated += 1
+                    if sections and is_complete(analysis):
+                        await index_transcript(
+                            db, analysis.call_id, await compute_fingerprint(transcription),
+                            analysis.derived_from_id or analysis.id,
+                        )
+                await db.commit()
+
+            last_call_id = rows[-1][0]
+            if not dry_run:
+                save_checkpoint(last_call_id)
+            logger.info(
+                f"  📦 {scanned} calls scanned, {updated} analyses updated "
+                f"(last call_id={last_call_id}, {time.perf_counter() - started:.0f}s)"
+            )
+
+    logger.info("=" * 70)
+    logger.info(f"📊 Prompt versions: {PROMPT_VERSIONS}")
+    for name, count in totals.items():
+        logger.info(f"  • {name}: {count} {'stale' if dry_run else 're-run'}")
+    if not dry_run:
+        logger.info(f"  ✅ Updated: {updated}   ⚠️  Still stale after failures: {failures}")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-run analysis sections whose prompt version changed")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Calls loaded per query")
+    parser.add_argument("--concurrency", type=int, default=8, help="Analyses re-run at once")
+    parser.add_argument("--sections", nargs="+", choices=list(SECTION_SCHEMAS), help="Only re-run these sections")
+    parser.add_argument("--dry-run", action="store_true", help="Only count stale sections")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an earlier run")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(reanalyze(args.chunk_size, args.concurrency, args.sections, args.dry_run, args.restart))
+    except KeyboardInterrupt:
+        logger.info("\n\n⚠️  Process interrupted by user")
+        sys.exit(0)
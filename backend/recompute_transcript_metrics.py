@@ -0,0 +1,140 @@
+"""
+Local Metrics Recompute Script
+
+Recalculates the non-LLM fields of every UnstructuredAnalysis row (keywords,
+entities, deception markers, politeness, formality, phases, dominance, talk
+ratio, interruptions, response latency, talk time) from its call transcript, e.g. after a change to
+TranscriptMetricsCalculator. No LLM calls are made. Calls not yet in the
+corpus term index are added to it on the way.
+
+Metrics are calculated on a process pool using every core, while the next
+chunk is loaded and the previous one written, so the database and the workers
+are busy at the same time. Rows are processed in id order; the last id is
+logged after every chunk and can be passed to --start-after to resume.
+
+--rebuild-term-index discards the term index and first re-indexes every call,
+so the recomputed TF-IDF keywords are all scored against the full corpus.
+
+Usage:
+    python recompute_transcript_metrics.py
+    python recompute_transcript_metrics.py --workers 8 --chunk-size 5000
+    python recompute_transcript_metrics.py --start-after 120000
+    python recompute_transcript_metrics.py --rebuild-term-index
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import update
+from sqlalchemy.future import select
+from app.core.database import AsyncSessionLocal
+from app.models.call_log import CallLog
+from app.models.unstructured_analysis import UnstructuredAnalysis
+from app.services.term_index import term_index
+from app.services.transcript_metrics_calculator import (
+    METRICS_BATCH_CHUNK_SIZE, calculate_transcript_metrics_batch, create_metrics_pool
+)
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def load_chunk(db, last_id: int, chunk_size: int) -> list:
+    """Next (analysis id, call id, transcript) rows after `last_id`."""
+    result = await db.execute(
+        select(UnstructuredAnalysis.id, CallLog.id, CallLog.transcription)
+        .join(CallLog, CallLog.id == UnstructuredAnalysis.call_id)
+        .where(CallLog.transcription.isnot(None))
+        .where(UnstructuredAnalysis.id > last_id)
+        .order_by(UnstructuredAnalysis.id)
+        .limit(chunk_size)
+    )
+    return result.all()
+
+
+async def process_all(pool, chunk_size: int, workers: int, batch_size: int, start_after: int, write: bool) -> int:
+    """
+    Calculate metrics for every analysis after `start_after`, `chunk_size` rows
+    per query, and write them back if `write`. Returns the number of rows.
+    """
+    loop = asyncio.get_running_loop()
+
+    def calculate(rows: list) -> list:
+        # Runs in a thread so the event loop can load and write other chunks meanwhile
+        return list(calculate_transcript_metrics_batch(
+            (transcription for _, _, transcription in rows),
+            workers=workers, chunk_size=batch_size, executor=pool,
+            call_ids=(call_id for _, call_id, _ in rows),
+        ))
+
+    processed = 0
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        rows = await load_chunk(db, start_after, chunk_size)
+        while rows:
+            computing = loop.run_in_executor(None, calculate, rows)
+            next_rows = await load_chunk(db, rows[-1][0], chunk_size)
+            results = await computing
+
+            if write:
+                # Bulk UPDATE by primary key: one executemany per chunk
+                await db.execute(
+                    update(UnstructuredAnalysis),
+                    [{"id": analysis_id, **metrics} for (analysis_id, _, _), metrics in zip(rows, results)],
+                )
+                await db.commit()
+
+            processed += len(rows)
+            logger.info(
+                f"  {'🔁 Recomputed' if write else '📚 Indexed'} {processed} analyses (last id={rows[-1][0]}, "
+                f"{processed / (time.perf_counter() - started):.0f} rows/s)"
+            )
+            rows = next_rows
+    return processed
+
+
+async def recompute(chunk_size: int, workers: int, batch_size: int, start_after: int, rebuild_term_index: bool):
+    """Recompute local metrics for all analyses, optionally rebuilding the term index first."""
+    pool = create_metrics_pool(workers)
+    started = time.perf_counter()
+    try:
+        if rebuild_term_index and term_index is not None:
+            term_index.reset()
+            logger.info("🧹 Cleared the term index, re-indexing every call first")
+            await process_all(pool, chunk_size, workers, batch_size, 0, write=False)
+        updated = await process_all(pool, chunk_size, workers, batch_size, start_after, write=True)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    logger.info("=" * 70)
+    logger.info(f"  ✅ Recomputed: {updated} analyses in {time.perf_counter() - started:.0f}s")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute the non-LLM metrics of all analyses")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Analyses loaded and written per query")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=METRICS_BATCH_CHUNK_SIZE,
+                        help="Transcripts sent to a worker per task")
+    parser.add_argument("--start-after", type=int, default=0, help="Resume after this analysis id")
+    parser.add_argument("--rebuild-term-index", action="store_true",
+                        help="Clear and rebuild the corpus term index before recomputing")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(recompute(args.chunk_size, args.workers, args.batch_size, args.start_after, args.rebuild_term_index))
+    except KeyboardInterrupt:
+        logger.info("\n\n⚠️  Process interrupted by user")
+        sys.exit(0)